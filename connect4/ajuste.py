@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from connect4.avaliacao import BASE, TAMANHO_JANELA
+from connect4.lote import AvaliadorLote, empilhar_partida
+from connect4.partidas import MAGICO, LeitorPartidas
+
+# Este módulo importa numpy ao ser carregado, como connect4.lote; os motores
+# só leem o arquivo de pesos que ele escreve
+
+# Códigos de janela (jogador * BASE + ia) que recebem peso: todas as contagens
+# possíveis menos as janelas completas, que valem vitória ou derrota
+CODIGOS = tuple(
+    jogador * BASE + ia
+    for jogador in range(TAMANHO_JANELA)
+    for ia in range(min(TAMANHO_JANELA, BASE - jogador))
+)
+# Uma característica por código e a última para as peças da IA no centro
+CARACTERISTICAS = len(CODIGOS) + 1
+# Posições por bloco, tanto na extração quanto em cada passada do ajuste
+TAMANHO_BLOCO = 1 << 16
+# Pontos da avaliação por unidade de logit, para que os pesos sejam inteiros
+ESCALA = 1000
+REGULARIZACAO = 1e-4
+ITERACOES = 50
+TOLERANCIA = 1e-10
+ARMIJO = 1e-4
+PASSO_MINIMO = 1e-6
+
+
+def ler_partidas(caminho, linhas=7, colunas=8):
+    # (linhas, colunas, jogadas, resultado para quem começou) de cada partida
+    # terminada de um arquivo de connect4.partidas ou de um JSONL do torneio;
+    # o JSONL não guarda o tamanho do tabuleiro, que vem de `linhas`/`colunas`
+    with open(caminho, 'rb') as arquivo:
+        binario = arquivo.read(len(MAGICO)) == MAGICO
+    if binario:
+        with LeitorPartidas(caminho) as leitor:
+            for partida in leitor:
+                resultado = partida['resultado']
+                if resultado == 'interrompida':
+                    continue
+                yield (
+                    partida['linhas'],
+                    partida['colunas'],
+                    partida['jogadas'],
+                    {'primeiro': 1, 'segundo': -1}.get(resultado, 0),
+                )
+        return
+
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            if not linha.strip():
+                continue
+            registro = json.loads(linha)
+            vencedor = registro['vencedor']
+            resultado = 0
+            if vencedor is not None:
+                resultado = 1 if vencedor == registro['primeiro'] else -1
+            yield linhas, colunas, registro['jogadas'], resultado
+
+
+def caracteristicas(avaliador: AvaliadorLote, tabuleiros) -> np.ndarray:
+    # (N, CARACTERISTICAS) com quantas janelas de cada código o tabuleiro tem e
+    # quantas peças da IA (pecas[1]) estão na coluna central
+    codigos = avaliador.codigos(tabuleiros)
+    quantidade = len(codigos)
+    deslocamentos = np.arange(quantidade)[:, None] * (BASE * BASE)
+    contagens = np.bincount(
+        (codigos + deslocamentos).ravel(), minlength=quantidade * BASE * BASE
+    ).reshape(quantidade, BASE * BASE)
+    centro = np.count_nonzero(
+        np.asarray(tabuleiros)[:, :, avaliador.coluna_centro] == avaliador.pecas[1],
+        axis=1,
+    )
+    return np.column_stack((contagens[:, CODIGOS], centro)).astype(np.uint16)
+
+
+def extrair(caminhos, linhas=7, colunas=8, tamanho_bloco=TAMANHO_BLOCO):
+    # Características e alvos de todas as posições antes de cada jogada, do
+    # ponto de vista de quem vai jogar: o tabuleiro é invertido para que essa
+    # peça seja a da IA, e o alvo é 1, 0,5 ou 0 conforme ela venceu, empatou ou
+    # perdeu. Os tabuleiros são montados em blocos de `tamanho_bloco` posições,
+    # então a memória guarda só as características, uma linha de inteiros
+    # pequenos por posição. Os pesos servem a um tamanho de tabuleiro só, então
+    # todas as partidas precisam ter o mesmo, que é devolvido junto:
+    # (x, y, partidas, (linhas, colunas)).
+    blocos_x = []
+    blocos_y = []
+    # Tabuleiros e alvos ainda não extraídos
+    pendentes_tabuleiros = []
+    pendentes_alvos = []
+    pendentes = 0
+    tamanho = None
+    avaliador = None
+    partidas = 0
+
+    def esvaziar():
+        blocos_x.append(
+            caracteristicas(avaliador, np.concatenate(pendentes_tabuleiros))
+        )
+        blocos_y.append(np.concatenate(pendentes_alvos))
+        pendentes_tabuleiros.clear()
+        pendentes_alvos.clear()
+
+    for caminho in caminhos:
+        for tamanho_linhas, tamanho_colunas, jogadas, resultado in ler_partidas(
+            caminho, linhas, colunas
+        ):
+            if not jogadas:
+                continue
+            if tamanho is None:
+                tamanho = (tamanho_linhas, tamanho_colunas)
+                avaliador = AvaliadorLote(*tamanho, lambda n0, n1: 0)
+            elif (tamanho_linhas, tamanho_colunas) != tamanho:
+                raise ValueError(
+                    f'partidas em {tamanho[0]}x{tamanho[1]} e em '
+                    f'{tamanho_linhas}x{tamanho_colunas}: ajuste cada tamanho '
+                    'separadamente'
+                )
+            partidas += 1
+            tabuleiros = empilhar_partida(jogadas, *tamanho)[:-1]
+            # Quem começou joga nas posições pares e tem a peça 1
+            sinais = np.where(np.arange(len(tabuleiros)) % 2 == 0, -1, 1)
+            tabuleiros *= sinais[:, None, None].astype(np.int8)
+            alvos = ((1 - sinais * resultado) / 2).astype(np.float32)
+
+            pendentes_tabuleiros.append(tabuleiros)
+            pendentes_alvos.append(alvos)
+            pendentes += len(alvos)
+            if pendentes >= tamanho_bloco:
+                esvaziar()
+                pendentes = 0
+
+    if pendentes:
+        esvaziar()
+    if not blocos_x:
+        raise ValueError('nenhuma posição nas partidas')
+    return np.concatenate(blocos_x), np.concatenate(blocos_y), partidas, tamanho
+
+
+def _passada(  # noqa: PLR0913
+    x, y, pesos, regularizacao, tamanho_bloco, *, derivadas=True
+):
+    # Entropia cruzada média entre sigmoide(x @ pesos) e y, mais a penalidade
+    # L2; com `derivadas` também o gradiente e a hessiana. Tudo é acumulado
+    # bloco a bloco, sem converter x inteiro para float.
+    total = len(x)
+    perda = 0.0
+    gradiente = np.zeros(len(pesos))
+    hessiana = np.zeros((len(pesos), len(pesos)))
+    for inicio in range(0, total, tamanho_bloco):
+        bloco = x[inicio : inicio + tamanho_bloco].astype(np.float64)
+        alvo = y[inicio : inicio + tamanho_bloco]
+        logits = bloco @ pesos
+        perda += np.sum(np.logaddexp(0, logits) - alvo * logits)
+        if derivadas:
+            probabilidades = 0.5 * (1 + np.tanh(logits / 2))
+            gradiente += bloco.T @ (probabilidades - alvo)
+            curvatura = probabilidades * (1 - probabilidades)
+            hessiana += (bloco * curvatura[:, None]).T @ bloco
+
+    perda = perda / total + regularizacao / 2 * (pesos @ pesos)
+    if not derivadas:
+        return perda
+    gradiente = gradiente / total + regularizacao * pesos
+    hessiana = hessiana / total + regularizacao * np.eye(len(pesos))
+    return perda, gradiente, hessiana
+
+
+def ajustar(
+    x,
+    y,
+    iteracoes=ITERACOES,
+    regularizacao=REGULARIZACAO,
+    tamanho_bloco=TAMANHO_BLOCO,
+) -> tuple[np.ndarray, list[float]]:
+    # Regressão logística do resultado pelas características, sem termo
+    # independente: passos de Newton com busca linear por retrocesso. Devolve
+    # os pesos em unidades de logit e a perda depois de cada passo.
+    pesos = np.zeros(x.shape[1])
+    perda, gradiente, hessiana = _passada(x, y, pesos, regularizacao, tamanho_bloco)
+    historico = [perda]
+    for _ in range(iteracoes):
+        direcao = -np.linalg.solve(hessiana, gradiente)
+        declive = gradiente @ direcao
+        if -declive < TOLERANCIA:
+            break
+        passo = 1.0
+        while passo >= PASSO_MINIMO:
+            candidatos = pesos + passo * direcao
+            nova = _passada(
+                x, y, candidatos, regularizacao, tamanho_bloco, derivadas=False
+            )
+            if nova <= perda + ARMIJO * passo * declive:
+                break
+            passo /= 2
+        else:
+            break
+        pesos = candidatos
+        perda, gradiente, hessiana = _passada(
+            x, y, pesos, regularizacao, tamanho_bloco
+        )
+        historico.append(perda)
+    return pesos, historico
+
+
+def vetor_pesos(pontuar_janela, bonus_centro) -> np.ndarray:
+    # Uma pontuação de janela existente no formato das características
+    return np.array(
+        [pontuar_janela(codigo // BASE, codigo % BASE) for codigo in CODIGOS]
+        + [bonus_centro],
+        dtype=np.float64,
+    )
+
+
+def perda_com_escala(x, y, pesos, tamanho_bloco=TAMANHO_BLOCO) -> float:
+    # Perda de uma pontuação fixa com a melhor escala para logits: a avaliação
+    # vira uma característica só e o ajuste acha o fator
+    avaliacoes = np.concatenate([
+        x[inicio : inicio + tamanho_bloco].astype(np.float64) @ pesos
+        for inicio in range(0, len(x), tamanho_bloco)
+    ])
+    _, historico = ajustar(
+        avaliacoes[:, None], y, regularizacao=0, tamanho_bloco=tamanho_bloco
+    )
+    return historico[-1]
+
+
+def montar_pesos(pesos, linhas, colunas, escala=ESCALA) -> dict:
+    # Conteúdo do arquivo lido por avaliacao.carregar_pesos: janelas[jogador][ia]
+    # para ia de 0 a TAMANHO_JANELA - jogador; as completas ficam com 0, já que
+    # valem vitória ou derrota
+    janelas = [[0] * (BASE - jogador) for jogador in range(BASE)]
+    for codigo, peso in zip(CODIGOS, pesos):
+        janelas[codigo // BASE][codigo % BASE] = round(float(peso) * escala)
+    return {
+        'linhas': linhas,
+        'colunas': colunas,
+        'escala': escala,
+        'janelas': janelas,
+        'centro': round(float(pesos[-1]) * escala),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Ajusta os pesos da avaliação aos resultados de partidas'
+    )
+    parser.add_argument(
+        'entradas',
+        nargs='*',
+        help='arquivos de partidas gravadas ou JSONL do torneio',
+    )
+    parser.add_argument('--saida', default='pesos.json')
+    parser.add_argument(
+        '--caracteristicas',
+        help='arquivo .npz com as características; criado se não existir',
+    )
+    # As partidas gravadas guardam o tamanho do tabuleiro; os JSONL do torneio
+    # não, e usam estes
+    parser.add_argument('--linhas', type=int, default=7, help='para os JSONL')
+    parser.add_argument('--colunas', type=int, default=8, help='para os JSONL')
+    parser.add_argument('--iteracoes', type=int, default=ITERACOES)
+    parser.add_argument('--regularizacao', type=float, default=REGULARIZACAO)
+    parser.add_argument('--escala', type=float, default=ESCALA)
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO)
+    args = parser.parse_args()
+
+    # Importados aqui para comparar com as pontuações atuais dos dois motores
+    from connect4.backend import Connect4  # noqa: PLC0415
+    from connect4.main import IA  # noqa: PLC0415
+
+    inicio = time.perf_counter()
+    if args.caracteristicas and os.path.exists(args.caracteristicas):
+        with np.load(args.caracteristicas) as arquivo:
+            x, y = arquivo['x'], arquivo['y']
+            partidas = int(arquivo['partidas'])
+            tamanho = tuple(int(n) for n in arquivo['tamanho'])
+    else:
+        if not args.entradas:
+            parser.error('informe as partidas ou um arquivo de características')
+        x, y, partidas, tamanho = extrair(
+            args.entradas, args.linhas, args.colunas, args.tamanho_bloco
+        )
+        if args.caracteristicas:
+            np.savez(
+                args.caracteristicas, x=x, y=y, partidas=partidas, tamanho=tamanho
+            )
+    tempo_extracao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    pesos, historico = ajustar(
+        x, y, args.iteracoes, args.regularizacao, args.tamanho_bloco
+    )
+    tempo_ajuste = time.perf_counter() - inicio
+
+    resultado = montar_pesos(pesos, *tamanho, args.escala)
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, indent=2)
+
+    print(
+        json.dumps(
+            {
+                'partidas': partidas,
+                'posicoes': len(y),
+                'resultados': {
+                    nome: int(np.count_nonzero(y == alvo))
+                    for nome, alvo in (
+                        ('vitorias', 1),
+                        ('empates', 0.5),
+                        ('derrotas', 0),
+                    )
+                },
+                'tempo_extracao_s': tempo_extracao,
+                'tempo_ajuste_s': tempo_ajuste,
+                'passos': len(historico) - 1,
+                'perda_inicial': historico[0],
+                'perda_ajustada': historico[-1],
+                'perda_backend': perda_com_escala(
+                    x, y, vetor_pesos(Connect4.pontuar_janela, 5), args.tamanho_bloco
+                ),
+                'perda_interface': perda_com_escala(
+                    x, y, vetor_pesos(IA.pontuar_janela, 6), args.tamanho_bloco
+                ),
+                'saida': args.saida,
+                'pesos': resultado,
+            },
+            indent=2,
+        )
+    )
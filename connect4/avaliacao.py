@@ -0,0 +1,175 @@
+import json
+import math
+from functools import cache
+
+TAMANHO_JANELA = 4
+# Cada janela guarda suas contagens num único código: n0 * BASE + n1
+BASE = TAMANHO_JANELA + 1
+
+
+@cache
+def gerar_janelas(linhas, colunas) -> tuple[tuple[tuple[int, int], ...], ...]:
+    # Todas as janelas de 4 casas (linha, coluna) nas quatro direções
+    direcoes = ((0, 1), (1, 0), (1, 1), (-1, 1))
+    janelas = []
+    for delta_linha, delta_coluna in direcoes:
+        for linha in range(linhas):
+            for coluna in range(colunas):
+                casas = tuple(
+                    (linha + i * delta_linha, coluna + i * delta_coluna)
+                    for i in range(TAMANHO_JANELA)
+                )
+                if all(
+                    0 <= lin < linhas and 0 <= col < colunas for lin, col in casas
+                ):
+                    janelas.append(casas)
+    return tuple(janelas)
+
+
+@cache
+def janelas_por_casa(linhas, colunas) -> tuple[tuple[int, ...], ...]:
+    # Para cada casa (linha * colunas + coluna), os índices das janelas que a
+    # contêm. No máximo 16 janelas passam por uma casa.
+    por_casa = [[] for _ in range(linhas * colunas)]
+    for indice, casas in enumerate(gerar_janelas(linhas, colunas)):
+        for linha, coluna in casas:
+            por_casa[linha * colunas + coluna].append(indice)
+    return tuple(tuple(indices) for indices in por_casa)
+
+
+def tabelas_pontuacao(pontuar_janela) -> tuple[list, list[int], list[int]]:
+    # Pontuação de cada código de janela, com as vitórias e derrotas
+    # (pontuações infinitas) marcadas em tabelas separadas
+    tabela = [0] * (BASE * BASE)
+    vitorias = [0] * (BASE * BASE)
+    derrotas = [0] * (BASE * BASE)
+    for n0 in range(BASE):
+        for n1 in range(BASE - n0):
+            pontos = pontuar_janela(n0, n1)
+            codigo = n0 * BASE + n1
+            if pontos == math.inf:
+                vitorias[codigo] = 1
+            elif pontos == -math.inf:
+                derrotas[codigo] = 1
+            else:
+                tabela[codigo] = pontos
+    return tabela, vitorias, derrotas
+
+
+def carregar_pesos(caminho) -> dict:
+    # Arquivo JSON gerado por connect4.ajuste: 'janelas'[jogador][ia] são os
+    # pontos de uma janela com essas contagens e 'centro' o bônus por peça da
+    # IA na coluna central
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def conferir_pesos(pesos, linhas, colunas):
+    # Os pesos são ajustados às partidas de um tamanho de tabuleiro; num
+    # tabuleiro com outro número de janelas a escala deles não vale mais
+    esperadas = len(gerar_janelas(linhas, colunas))
+    ajustadas = len(gerar_janelas(pesos['linhas'], pesos['colunas']))
+    if ajustadas != esperadas:
+        raise ValueError(
+            f'pesos ajustados para {pesos["linhas"]}x{pesos["colunas"]} '
+            f'({ajustadas} janelas), mas o tabuleiro é {linhas}x{colunas} '
+            f'({esperadas} janelas)'
+        )
+
+
+class PontuacaoAjustada:
+    # `pontuar_janela(jogador, ia)` com os pesos de um arquivo de ajuste; as
+    # janelas completas continuam sendo vitória e derrota. É uma classe, e não
+    # uma função local, para poder ser enviada aos processos da busca paralela.
+    def __init__(self, pesos):
+        self.janelas = pesos['janelas']
+
+    def __call__(self, jogador, ia) -> int | float:
+        if ia == TAMANHO_JANELA:
+            return math.inf
+        if jogador == TAMANHO_JANELA:
+            return -math.inf
+        return self.janelas[jogador][ia]
+
+
+class AvaliadorIncremental:
+    # Mantém as contagens de peças de cada janela e a soma das pontuações,
+    # atualizadas em O(janelas pela casa) a cada jogada. `pontuar_janela(n0, n1)`
+    # recebe quantas peças de pecas[0] e de pecas[1] a janela tem.
+    def __init__(  # noqa: PLR0913
+        self,
+        linhas,
+        colunas,
+        pontuar_janela,
+        *,
+        pecas=(1, -1),
+        peca_centro=None,
+        bonus_centro=0,
+    ):
+        self.linhas = linhas
+        self.colunas = colunas
+        self.indices = {peca: indice for indice, peca in enumerate(pecas)}
+        self.passos = (BASE, 1)
+        self.janelas_por_casa = janelas_por_casa(linhas, colunas)
+        self.codigos = [0] * len(gerar_janelas(linhas, colunas))
+
+        # Pontuações infinitas (vitória) são contadas à parte para que desfazer
+        # uma jogada não produza inf - inf.
+        self.tabela, self.vitorias, self.derrotas = tabelas_pontuacao(pontuar_janela)
+        self.tem_infinitos = any(self.vitorias) or any(self.derrotas)
+
+        self.coluna_centro = colunas // 2
+        self.bonus = [0, 0]
+        if peca_centro is not None:
+            self.bonus[self.indices[peca_centro]] = bonus_centro
+
+        # Janelas vazias também podem pontuar
+        self.pontos = len(self.codigos) * self.tabela[0]
+        self.janelas_vencedoras = len(self.codigos) * self.vitorias[0]
+        self.janelas_perdedoras = len(self.codigos) * self.derrotas[0]
+
+    def copiar(self):
+        copia = AvaliadorIncremental.__new__(AvaliadorIncremental)
+        copia.__dict__.update(self.__dict__)
+        copia.codigos = list(self.codigos)
+        return copia
+
+    def atualizar(self, linha, coluna, indice, sinal):
+        passo = self.passos[indice] * sinal
+        codigos = self.codigos
+        tabela = self.tabela
+        janelas = self.janelas_por_casa[linha * self.colunas + coluna]
+        delta = 0
+        for janela in janelas:
+            antigo = codigos[janela]
+            novo = antigo + passo
+            codigos[janela] = novo
+            delta += tabela[novo] - tabela[antigo]
+
+        if self.tem_infinitos:
+            vitorias = self.vitorias
+            derrotas = self.derrotas
+            for janela in janelas:
+                novo = codigos[janela]
+                antigo = novo - passo
+                self.janelas_vencedoras += vitorias[novo] - vitorias[antigo]
+                self.janelas_perdedoras += derrotas[novo] - derrotas[antigo]
+
+        if coluna == self.coluna_centro:
+            delta += self.bonus[indice] * sinal
+        self.pontos += delta
+
+    def jogar(self, linha, coluna, peca):
+        self.atualizar(linha, coluna, self.indices[peca], 1)
+
+    def desfazer(self, linha, coluna, peca):
+        self.atualizar(linha, coluna, self.indices[peca], -1)
+
+    def valor(self):
+        if self.janelas_vencedoras and self.janelas_perdedoras:
+            return math.nan
+        if self.janelas_vencedoras:
+            return math.inf
+        if self.janelas_perdedoras:
+            return -math.inf
+        return self.pontos
@@ -1,82 +1,205 @@
+import copy
 import math
-
-
-class Connect4:
-    def __init__(
+import time
+
+from connect4.avaliacao import (
+    AvaliadorIncremental,
+    PontuacaoAjustada,
+    carregar_pesos,
+    conferir_pesos,
+)
+from connect4.bitboard import Bitboard
+from connect4.busca import (
+    INTERVALO_RELOGIO,
+    TempoEsgotado,
+    aprofundamento_iterativo,
+    conferir_relogio,
+)
+from connect4.instrumentacao import EstatisticasBusca
+from connect4.livro import MOTOR_BACKEND, Livro
+from connect4.ordenacao import OrdenadorMovimentos
+from connect4.partidas import EMPATE, INTERROMPIDA, PRIMEIRO, SEGUNDO, gravar_partida
+from connect4.ponderacao import Ponderador
+from connect4.solucionador import DERROTA, VITORIA, Solucionador
+from connect4.transposicao import (
+    EXATO,
+    TabelaTransposicao,
+    chave_posicao,
+    entrada_decide,
+    tipo_entrada,
+)
+
+# Meia largura inicial da janela de aspiração da raiz (PVS), em pontos da
+# avaliação, e quanto ela cresce a cada falha
+JANELA_ASPIRACAO = 2000
+FATOR_ASPIRACAO = 4
+# Abaixo desta profundidade a troca de mensagens com os processos custa mais do
+# que a busca, então as iterações rasas ficam no próprio processo
+PROFUNDIDADE_MINIMA_PARALELA = 7
+# Fração do orçamento de tempo dada ao solucionador do final; se ele não
+# terminar, a busca heurística usa o resto
+FRACAO_TEMPO_SOLUCIONADOR = 0.5
+
+
+class Connect4:  # noqa: PLR0904
+    def __init__(  # noqa: PLR0913
         self,
         linhas: int = 7,
         colunas: int = 8,
         ply: int = 4,
         usar_alpha_beta: bool = False,
+        *,
+        usar_pvs: bool = False,
+        memoria_tt_mb: float = 16,
+        tempo_ms: int | None = None,
+        ordenador: OrdenadorMovimentos | None = None,
+        ponderar: bool = False,
+        trabalhadores: int = 1,
+        livro: str | Livro | None = None,
+        limite_solucionador: int | None = 16,
+        pontuar_janela=None,
+        pesos: str | dict | None = None,
     ):
         self.linhas = linhas
         self.colunas = colunas
         self.tabuleiro = [[0 for _ in range(colunas)] for _ in range(linhas)]
+        self.bitboard = Bitboard(linhas, colunas, pecas=(1, -1))
+        # `pontuar_janela(jogador, ia)` substitui a pontuação padrão das janelas
+        self.funcao_janela = pontuar_janela
+        # `pesos` (caminho ou conteúdo de um arquivo de connect4.ajuste) troca a
+        # pontuação padrão e o bônus do centro pelos pesos ajustados
+        if isinstance(pesos, str):
+            pesos = carregar_pesos(pesos)
+        self.pesos = pesos
+        bonus_centro = 5
+        if pesos is not None:
+            conferir_pesos(pesos, linhas, colunas)
+            pontuar_janela = pontuar_janela or PontuacaoAjustada(pesos)
+            bonus_centro = pesos['centro']
+        self.avaliador = AvaliadorIncremental(
+            linhas,
+            colunas,
+            pontuar_janela or self.pontuar_janela,
+            pecas=(1, -1),
+            peca_centro=-1,
+            bonus_centro=bonus_centro,
+        )
         self.ply = ply
-        self.usar_alpha_beta = usar_alpha_beta
+        # A busca por variação principal (PVS) é uma alpha-beta que sonda com
+        # janela nula os filhos depois do primeiro e usa janelas de aspiração
+        # na raiz
+        self.usar_pvs = usar_pvs
+        self.usar_alpha_beta = usar_alpha_beta or usar_pvs
+        # (hash, valor) da última busca da raiz, centro da próxima aspiração
+        self.valor_anterior = None
+        # A tabela vive com o jogo, então é reaproveitada entre os turnos
+        self.memoria_tt_mb = memoria_tt_mb
+        self.tabela = TabelaTransposicao(memoria_tt_mb)
+        # Com orçamento de tempo a IA usa aprofundamento iterativo em vez do ply
+        self.tempo_ms = tempo_ms
+        self.prazo = None
+        self.cancelamento = None
+        self.nos = 0
+        # EstatisticasBusca da busca em andamento, se alguém pediu
+        self.estatisticas = None
+        self.ordenador = ordenador or OrdenadorMovimentos(colunas)
+        # Busca as respostas da IA enquanto o jogador pensa
+        self.ponderar = ponderar
+        self.ponderador = None
+        # Com mais de um trabalhador os movimentos da raiz vão para processos,
+        # criados na primeira busca e encerrados por fechar(). As cópias usam o
+        # mesmo pool.
+        self.trabalhadores = trabalhadores
+        self.busca_paralela = None
+        if trabalhadores > 1:
+            # Importado aqui porque o módulo paralelo importa esta classe
+            from connect4.paralelo import BuscaParalela  # noqa: PLC0415
+
+            self.busca_paralela = BuscaParalela(
+                trabalhadores,
+                linhas=linhas,
+                colunas=colunas,
+                usar_alpha_beta=self.usar_alpha_beta,
+                usar_pvs=usar_pvs,
+                memoria_tt_mb=memoria_tt_mb,
+                pontuar_janela=self.funcao_janela,
+                pesos=pesos,
+            )
+        # O arquivo do livro só é aberto na primeira consulta
+        self.livro = Livro(livro, MOTOR_BACKEND) if isinstance(livro, str) else livro
+        # Com até `limite_solucionador` casas livres a IA resolve o final
+        # exatamente em vez de usar a heurística
+        self.limite_solucionador = limite_solucionador
+        self.solucionador = None
+        if limite_solucionador is not None:
+            self.solucionador = Solucionador(linhas, colunas, memoria_tt_mb)
         self.player_atual = 1  # 1 para jogador, -1 para IA
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        # Para a ponderação e encerra os processos da busca paralela
+        if self.ponderador is not None:
+            self.ponderador.parar()
+            self.ponderador = None
+        if self.busca_paralela is not None:
+            self.busca_paralela.fechar()
+
+    def copiar(self):
+        # Cópia independente do tabuleiro que compartilha a tabela de
+        # transposição e o ordenador, para buscar numa outra thread
+        copia = copy.copy(self)
+        copia.tabuleiro = [linha[:] for linha in self.tabuleiro]
+        copia.bitboard = self.bitboard.copiar()
+        copia.avaliador = self.avaliador.copiar()
+        copia.ponderador = None
+        return copia
+
+    def carregar_jogadas(self, jogadas, peca=1):
+        # Reproduz uma sequência de colunas (a partir de 0) alternando as peças
+        for coluna in jogadas:
+            self.realizar_jogada(coluna, peca)
+            peca = -peca
+
+    def carregar_tabuleiro(self, tabuleiro):
+        # Reproduz um tabuleiro no formato de self.tabuleiro, coluna a coluna
+        for coluna in range(self.colunas):
+            for linha in range(self.linhas - 1, -1, -1):
+                if tabuleiro[linha][coluna] == 0:
+                    break
+                self.realizar_jogada(coluna, tabuleiro[linha][coluna])
+
     def desenhar_tabuleiro(self):
         for linha in self.tabuleiro:
             print('  '.join(map(str, linha)))
         print('\n')
 
     def validar_movimento(self, coluna) -> bool:
-        return self.tabuleiro[0][coluna] == 0
+        return self.bitboard.validar_movimento(coluna)
 
     def get_movimentos_validos(self) -> list[int]:
-        return [
-            coluna
-            for coluna in range(self.colunas)
-            if self.validar_movimento(coluna)
-        ]
+        return self.bitboard.movimentos_validos()
 
     def realizar_jogada(self, coluna, player):
-        for linha in reversed(self.tabuleiro):
-            if linha[coluna] == 0:
-                linha[coluna] = player
-                return
+        if not self.bitboard.validar_movimento(coluna):
+            return
+        linha = self.bitboard.jogar(coluna, player)
+        self.tabuleiro[linha][coluna] = player
+        self.avaliador.jogar(linha, coluna, player)
 
     def retornar_movimento(self, coluna):
-        for linha in self.tabuleiro:
-            if linha[coluna] != 0:
-                linha[coluna] = 0
-                return
+        if self.bitboard.alturas[coluna] == 0:
+            return
+        linha = self.bitboard.desfazer(coluna)
+        self.avaliador.desfazer(linha, coluna, self.tabuleiro[linha][coluna])
+        self.tabuleiro[linha][coluna] = 0
 
     def movimento_ganhador(self, player) -> bool:
-        # Verificar horizontal
-        for linha in range(self.linhas):
-            for coluna in range(self.colunas - 3):
-                if all(
-                    self.tabuleiro[linha][coluna + i] == player for i in range(4)
-                ):
-                    return True
-
-        # Verificar vertical
-        for linha in range(self.linhas - 3):
-            for coluna in range(self.colunas):
-                if all(
-                    self.tabuleiro[linha + i][coluna] == player for i in range(4)
-                ):
-                    return True
-
-        # Verificar diagonal principal \
-        for linha in range(self.linhas - 3):
-            for coluna in range(self.colunas - 3):
-                if all(
-                    self.tabuleiro[linha + i][coluna + i] == player for i in range(4)
-                ):
-                    return True
-
-        # Verificar diagonal secundaria /
-        for linha in range(3, self.linhas):
-            for coluna in range(self.colunas - 3):
-                if all(
-                    self.tabuleiro[linha - i][coluna + i] == player for i in range(4)
-                ):
-                    return True
-
-        return False
+        return self.bitboard.movimento_ganhador(player)
 
     @staticmethod
     def avaliar_janela(janela: list[int]) -> int | float:
@@ -118,162 +241,468 @@ class Connect4:
 
         return pontos
 
-    def avaliar_tabuleiro(self) -> int:
-        pontos = 0
-
-        coluna_central = self.colunas // 2
-        centro = [
-            self.tabuleiro[linha][coluna_central] for linha in range(self.linhas)
-        ]
-        pontos += centro.count(-1) * 5
-
-        # avaliando linhas
-        for linha in range(self.linhas):
-            for coluna in range(self.colunas - 3):
-                janela = [self.tabuleiro[linha][coluna + i] for i in range(4)]
-                pontos += self.avaliar_janela(janela)
+    @classmethod
+    def pontuar_janela(cls, jogador, ia) -> int | float:
+        # Pontuação de uma janela a partir das contagens de peças
+        janela = [1] * jogador + [-1] * ia + [0] * (4 - jogador - ia)
+        return cls.avaliar_janela(janela)
 
-        # avaliando colunas
-        for coluna in range(self.colunas):
-            for linha in range(self.linhas - 3):
-                janela = [self.tabuleiro[linha + i][coluna] for i in range(4)]
-                pontos += self.avaliar_janela(janela)
-
-        # avaliando as diagonais \
-        for linha in range(self.linhas - 3):
-            for coluna in range(self.colunas - 3):
-                janela = [self.tabuleiro[linha + i][coluna + i] for i in range(4)]
-                pontos += self.avaliar_janela(janela)
-
-        # avaliando as diagonais /
-        for linha in range(3, self.linhas):
-            for coluna in range(self.colunas - 3):
-                janela = [self.tabuleiro[linha - i][coluna + i] for i in range(4)]
-                pontos += self.avaliar_janela(janela)
-
-        return pontos
+    def avaliar_tabuleiro(self) -> int:
+        # As janelas são atualizadas a cada jogada, então a avaliação é O(1)
+        return self.avaliador.valor()
 
     def minimax(self, profundidade, alpha, beta, maximizar_jogador):
         # Função Minimax com suporte a poda alfa-beta e Minimax puro.
+        self.nos += 1
+        if self.nos % INTERVALO_RELOGIO == 0:
+            conferir_relogio(self.cancelamento, self.prazo)
+        estatisticas = self.estatisticas
+        if estatisticas is not None:
+            estatisticas.visitar(self.bitboard.jogadas)
+
         movimentos_validos = self.get_movimentos_validos()
         if profundidade == 0 or not movimentos_validos:
+            if estatisticas is not None:
+                estatisticas.avaliar()
             return self.avaliar_tabuleiro(), None
 
-        if maximizar_jogador:
-            valor_maximo = -math.inf
-            melhor_movimento = None
-
-            for coluna in movimentos_validos:
-                self.realizar_jogada(coluna, 1)
-                if self.usar_alpha_beta:
-                    eval = self.minimax(profundidade - 1, alpha, beta, False)[0]
-                else:
-                    eval = self.minimax(profundidade - 1, None, None, False)[0]
+        # Sem alpha-beta toda entrada é exata, então a janela vazia não é usada
+        chave = chave_posicao(self.bitboard.hash, maximizar_jogador)
+        entrada = self.tabela.consultar(chave)
+        if entrada_decide(entrada, profundidade, alpha, beta):
+            return entrada[2], entrada[4]
+
+        decidido, movimentos_validos = self.filtrar_ameacas(
+            movimentos_validos, maximizar_jogador
+        )
+        if decidido is not None:
+            return decidido
+
+        movimentos_validos = self.ordenador.ordenar(
+            movimentos_validos,
+            self.bitboard.jogadas,
+            1 if maximizar_jogador else 0,
+            entrada[4] if entrada is not None else None,
+        )
+        valor, movimento = self.buscar_filhos(
+            movimentos_validos, profundidade, alpha, beta, maximizar_jogador
+        )
+        tipo = tipo_entrada(valor, alpha, beta) if self.usar_alpha_beta else EXATO
+        self.tabela.gravar(chave, profundidade, valor, tipo, movimento)
+        return valor, movimento
+
+    def filtrar_ameacas(self, movimentos_validos, maximizar_jogador):
+        # As ameaças decidem o nó sem busca quando há vitória imediata ou duas
+        # ameaças do adversário, e cortam as jogadas que perdem na hora. Devolve
+        # o (valor, movimento) do nó quando ele está decidido, ou None, e as
+        # jogadas que restam
+        vitoria = math.inf if maximizar_jogador else -math.inf
+        vitorias, bloqueios, perdedoras = self.bitboard.ameacas(
+            -1 if maximizar_jogador else 1
+        )
+        if vitorias:
+            return (vitoria, self.bitboard.colunas_da_mascara(vitorias)[0]), []
+        if bloqueios:
+            colunas = self.bitboard.colunas_da_mascara(bloqueios)
+            if bloqueios & (bloqueios - 1):
+                return (-vitoria, colunas[0]), []
+            return None, colunas
+        if perdedoras:
+            seguros = [
+                coluna
+                for coluna in movimentos_validos
+                if not perdedoras & self.bitboard.mascaras_coluna[coluna]
+            ]
+            if not seguros:
+                return (-vitoria, movimentos_validos[0]), []
+            return None, seguros
+        return None, movimentos_validos
+
+    def buscar_filhos(
+        self, movimentos, profundidade, alpha, beta, maximizar_jogador
+    ):
+        # Melhor valor e jogada entre os filhos, na ordem dada; com alpha-beta o
+        # limite de quem escolhe sobe a cada filho até o corte
+        peca = -1 if maximizar_jogador else 1
+        sinal = 1 if maximizar_jogador else -1
+        ply = self.bitboard.jogadas
+        indice_peca = 1 if maximizar_jogador else 0
+        melhor_valor = -sinal * math.inf
+        melhor_movimento = movimentos[0]
+
+        for posicao, coluna in enumerate(movimentos):
+            self.realizar_jogada(coluna, peca)
+            try:
+                eval = self.buscar_filho(
+                    profundidade - 1, alpha, beta, not maximizar_jogador, posicao > 0
+                )
+            finally:
+                # Desfaz a jogada mesmo se a busca for interrompida pelo prazo
                 self.retornar_movimento(coluna)
 
-                if eval > valor_maximo:
-                    valor_maximo = eval
-                    melhor_movimento = coluna
+            if sinal * eval > sinal * melhor_valor:
+                melhor_valor = eval
+                melhor_movimento = coluna
 
-                if self.usar_alpha_beta:
+            if self.usar_alpha_beta:
+                if maximizar_jogador:
                     alpha = max(alpha, eval)
-                    if beta is not None and beta <= alpha:
-                        break
-            return valor_maximo, melhor_movimento
+                else:
+                    beta = min(beta, eval)
+                if beta <= alpha:
+                    self.ordenador.registrar_corte(
+                        coluna, ply, indice_peca, profundidade, posicao
+                    )
+                    if self.estatisticas is not None:
+                        self.estatisticas.registrar_corte(posicao)
+                    break
+        return melhor_valor, melhor_movimento
+
+    def buscar_filho(self, profundidade, alpha, beta, maximizar_jogador, sondar):
+        # Valor de um filho para quem o escolhe. Com PVS e `sondar`, o filho é
+        # buscado antes com uma janela nula junto ao limite de quem escolhe; se
+        # a sonda não bastar para descartá-lo, é buscado de novo entre o valor
+        # da sonda e o outro limite
+        if not self.usar_alpha_beta:
+            return self.minimax(profundidade, None, None, maximizar_jogador)[0]
+        if sondar and self.usar_pvs:
+            if maximizar_jogador:
+                if beta != math.inf:
+                    valor = self.minimax(profundidade, beta - 1, beta, True)[0]
+                    if not alpha < valor <= beta - 1:
+                        return valor
+                    beta = valor
+            elif alpha != -math.inf:
+                valor = self.minimax(profundidade, alpha, alpha + 1, False)[0]
+                if not alpha + 1 <= valor < beta:
+                    return valor
+                alpha = valor
+        return self.minimax(profundidade, alpha, beta, maximizar_jogador)[0]
+
+    def buscar_aspiracao(self, profundidade):
+        # Janela centrada no valor da busca anterior da mesma posição, ou no da
+        # tabela. A cada falha o lado que falhou é alargado FATOR_ASPIRACAO
+        # vezes a partir do valor devolvido, até chegar ao infinito.
+        centro = None
+        chave = chave_posicao(self.bitboard.hash, True)
+        if self.valor_anterior is not None:
+            chave_anterior, valor = self.valor_anterior
+            if chave_anterior == chave:
+                centro = valor
+        if centro is None:
+            entrada = self.tabela.consultar(chave)
+            if entrada is not None:
+                centro = entrada[2]
+        if centro is None or not math.isfinite(centro):
+            return self.minimax(profundidade, -math.inf, math.inf, True)
+
+        delta = JANELA_ASPIRACAO
+        alpha, beta = centro - delta, centro + delta
+        while True:
+            valor, movimento = self.minimax(profundidade, alpha, beta, True)
+            if valor <= alpha and alpha != -math.inf:
+                delta *= FATOR_ASPIRACAO
+                alpha = valor - delta
+            elif valor >= beta and beta != math.inf:
+                delta *= FATOR_ASPIRACAO
+                beta = valor + delta
+            else:
+                return valor, movimento
 
-        else:
-            valor_minimo = math.inf
-            melhor_movimento = None
+    def buscar_profundidade(self, profundidade, prazo=None):
+        estatisticas = self.estatisticas
+        if estatisticas is not None:
+            estatisticas.iniciar_iteracao()
 
-            for coluna in movimentos_validos:
-                self.realizar_jogada(coluna, -1)
-                if self.usar_alpha_beta:
-                    eval = self.minimax(profundidade - 1, alpha, beta, True)[0]
+        if (
+            self.busca_paralela is not None
+            and profundidade >= PROFUNDIDADE_MINIMA_PARALELA
+        ):
+            # Os nós dos processos entram só no total
+            nos = self.nos
+            resultado = self.buscar_em_paralelo(profundidade, prazo)
+            if estatisticas is not None:
+                estatisticas.nos += self.nos - nos
+        else:
+            self.prazo = prazo
+            try:
+                if self.usar_pvs:
+                    resultado = self.buscar_aspiracao(profundidade)
+                elif self.usar_alpha_beta:
+                    resultado = self.minimax(profundidade, -math.inf, math.inf, True)
                 else:
-                    eval = self.minimax(profundidade - 1, None, None, True)[0]
+                    resultado = self.minimax(profundidade, None, None, True)
+            finally:
+                self.prazo = None
+        self.valor_anterior = (chave_posicao(self.bitboard.hash, True), resultado[0])
+
+        if estatisticas is not None:
+            valor, movimento = resultado
+            estatisticas.concluir_iteracao(
+                profundidade,
+                valor,
+                movimento,
+                self.variacao_principal(movimento, profundidade),
+            )
+        return resultado
+
+    def variacao_principal(self, movimento, profundidade) -> list[int]:
+        # Segue os melhores movimentos guardados na tabela a partir da jogada
+        # escolhida na raiz
+        variacao = []
+        peca = -1
+        try:
+            while movimento is not None and len(variacao) < profundidade:
+                if not self.validar_movimento(movimento):
+                    break
+                variacao.append(movimento)
+                self.realizar_jogada(movimento, peca)
+                if self.movimento_ganhador(peca):
+                    break
+                peca = -peca
+                entrada = self.tabela.consultar(
+                    chave_posicao(self.bitboard.hash, peca == -1)
+                )
+                movimento = entrada[4] if entrada is not None else None
+        finally:
+            for coluna in reversed(variacao):
                 self.retornar_movimento(coluna)
+        return variacao
 
-                if eval < valor_minimo:
-                    valor_minimo = eval
-                    melhor_movimento = coluna
+    def buscar_em_paralelo(self, profundidade, prazo=None):
+        resultado = self.busca_paralela.buscar(
+            self, profundidade, prazo, self.cancelamento
+        )
+        self.nos += self.busca_paralela.nos
+        return resultado
 
-                if self.usar_alpha_beta:
-                    beta = min(beta, eval)
-                    if beta is not None and beta <= alpha:
-                        break
-            return valor_minimo, melhor_movimento
-
-    def turno_ia(self):
-        movimentos_validos = self.get_movimentos_validos()
+    def buscar(
+        self,
+        tempo_ms=None,
+        cancelamento=None,
+        estatisticas: EstatisticasBusca | None = None,
+    ):
+        # `cancelamento` é um threading.Event; se for acionado a busca levanta
+        # BuscaCancelada em vez de devolver uma jogada. `estatisticas` é uma
+        # EstatisticasBusca a ser preenchida durante a busca.
+        self.tabela.nova_busca()
+        self.ordenador.nova_busca()
+        if self.busca_paralela is not None:
+            self.busca_paralela.nova_busca()
+        self.nos = 0
+        self.valor_anterior = None
+        self.cancelamento = cancelamento
+        self.estatisticas = estatisticas
+        if estatisticas is not None:
+            estatisticas.iniciar(self.bitboard.jogadas)
+        tempo_ms = tempo_ms or self.tempo_ms
+        inicio = time.perf_counter()
+        try:
+            if self.final_resolvivel():
+                prazo = None
+                if tempo_ms is not None:
+                    prazo = inicio + tempo_ms * FRACAO_TEMPO_SOLUCIONADOR / 1000
+                try:
+                    return self.buscar_final(prazo)
+                except TempoEsgotado:
+                    # O final não coube na sua parte do tempo: a heurística usa
+                    # o resto
+                    pass
+
+            if tempo_ms is None:
+                return self.buscar_profundidade(self.ply)
+
+            livres = self.linhas * self.colunas - self.bitboard.jogadas
+            return aprofundamento_iterativo(
+                self.buscar_profundidade,
+                tempo_ms - (time.perf_counter() - inicio) * 1000,
+                livres,
+                resolvido=lambda resultado: math.isinf(resultado[0]),
+            )
+        finally:
+            self.cancelamento = None
+            self.estatisticas = None
+            if estatisticas is not None:
+                estatisticas.finalizar()
+
+    def buscar_final(self, prazo=None):
+        # O solucionador conta só os nós; a solução entra como uma iteração
+        # que vai até o fim do jogo. Levanta TempoEsgotado se passar do `prazo`.
+        estatisticas = self.estatisticas
+        if estatisticas is not None:
+            estatisticas.iniciar_iteracao()
+        nos = self.nos
+        try:
+            resultado, distancia, coluna = self.resolver_final(prazo)
+        finally:
+            if estatisticas is not None:
+                estatisticas.nos += self.nos - nos
+        valor = 0
+        if resultado == VITORIA:
+            valor = math.inf
+        elif resultado == DERROTA:
+            valor = -math.inf
+        if estatisticas is not None:
+            estatisticas.concluir_iteracao(distancia, valor, coluna, [coluna])
+        return valor, coluna
+
+    def final_resolvivel(self) -> bool:
+        livres = self.linhas * self.colunas - self.bitboard.jogadas
+        return (
+            self.limite_solucionador is not None
+            and livres <= self.limite_solucionador
+        )
+
+    def resolver_final(self, prazo=None):
+        # Resultado exato da posição para a IA: (resultado, lances até o fim,
+        # coluna). O resultado é 'vitoria', 'derrota' ou 'empate' e os lances
+        # contam as jogadas dos dois lados.
+        solucionador = self.solucionador
+        if solucionador is None:
+            solucionador = Solucionador(
+                self.linhas, self.colunas, self.memoria_tt_mb
+            )
+        nos = solucionador.nos
+        solucionador.cancelamento = self.cancelamento
+        solucionador.prazo = prazo
+        try:
+            pontuacao, coluna = solucionador.resolver(self.bitboard, -1)
+        finally:
+            solucionador.cancelamento = None
+            solucionador.prazo = None
+            self.nos += solucionador.nos - nos
+        resultado, distancia = solucionador.desfecho(
+            pontuacao, self.bitboard.jogadas
+        )
+        return resultado, distancia, coluna
+
+    def iniciar_ponderacao(self):
+        # As jogadas do jogador são ponderadas na ordem em que a própria busca
+        # as tentaria, começando pela que a tabela aponta como a melhor dele
+        entrada = self.tabela.consultar(chave_posicao(self.bitboard.hash, False))
+        colunas = self.ordenador.ordenar(
+            self.get_movimentos_validos(),
+            self.bitboard.jogadas,
+            0,
+            entrada[4] if entrada is not None else None,
+        )
+        self.ponderador = Ponderador(self.responder_ponderando, colunas)
+
+    def responder_ponderando(self, coluna, cancelamento):
+        copia = self.copiar()
+        copia.realizar_jogada(coluna, 1)
+        if copia.movimento_ganhador(1):
+            return None
+        return copia.escolher_jogada(cancelamento=cancelamento)
+
+    def parar_ponderacao(self, coluna=None):
+        # Devolve a resposta já calculada para a jogada `coluna`, se houver
+        if self.ponderador is None:
+            return None
+        resposta = self.ponderador.resultado(coluna)
+        self.ponderador = None
+        return resposta
+
+    def turno_ia(self, tempo_ms=None, resposta=None):
+        if resposta is None:
+            resposta = self.escolher_jogada(tempo_ms)
+        if resposta is not None:
+            self.realizar_jogada(resposta, -1)
+        return resposta
+
+    def escolher_jogada(self, tempo_ms=None, cancelamento=None, estatisticas=None):
+        vitorias, bloqueios, _ = self.bitboard.ameacas(-1)
 
         # Prioridade 1: vitória da IA
-        for coluna in movimentos_validos:
-            self.realizar_jogada(coluna, -1)
-            if self.movimento_ganhador(-1):
-                self.retornar_movimento(coluna)
-                self.realizar_jogada(coluna, -1)
-                return
-            self.retornar_movimento(coluna)
+        if vitorias:
+            return self.bitboard.colunas_da_mascara(vitorias)[0]
 
         # Prioridade 2: bloquear vitória do jogador
-        for coluna in movimentos_validos:
-            self.realizar_jogada(coluna, 1)
-            if self.movimento_ganhador(1):
-                self.retornar_movimento(coluna)
-                self.realizar_jogada(coluna, -1)
-                return
-            self.retornar_movimento(coluna)
-
-        # Prioriodade 3: bloquear ameaças críticas
-        maior_ameaca = None
-        melhor_pontuacao = -math.inf
+        if bloqueios:
+            return self.bitboard.colunas_da_mascara(bloqueios)[0]
 
-        for coluna in movimentos_validos:
-            self.realizar_jogada(coluna, -1)
-            pontuacao_atual = self.avaliar_tabuleiro()
-            self.retornar_movimento(coluna)
-
-            if pontuacao_atual > melhor_pontuacao:
-                melhor_pontuacao = pontuacao_atual
-                maior_ameaca = coluna
-
-        if maior_ameaca is not None:
-            self.realizar_jogada(maior_ameaca, -1)
-            return
+        # Prioridade 3: jogada do livro de aberturas
+        if self.livro is not None:
+            jogada = self.livro.consultar(self.bitboard, -1)
+            if jogada is not None:
+                return jogada[0]
 
-        # Prioridade 4: melhor jogada com melhor pontuação
-        _, melhor_movimento = self.minimax(
-            self.ply, -math.inf, math.inf, True
-        ) if self.usar_alpha_beta else self.minimax(self.ply, None, None, True)
-        if melhor_movimento is not None:
-            self.realizar_jogada(melhor_movimento, -1)
+        # Prioridade 4: busca, ou o final resolvido exatamente quando der
+        _, melhor_movimento = self.buscar(tempo_ms, cancelamento, estatisticas)
+        return melhor_movimento
 
     def turno_humano(self, coluna):
         if self.validar_movimento(coluna):
             self.realizar_jogada(coluna, 1)
 
-    def jogar(self):
-        while True:
-            self.desenhar_tabuleiro()
-            if self.player_atual == 1:
-                coluna = int(input(f'escolha a coluna (1-{self.colunas}): ')) - 1
-                if not self.validar_movimento(coluna):
-                    print('Movimento inválido! Realize outro.')
-                    continue
-                self.turno_humano(coluna)
-            else:
-                self.turno_ia()
-
-            if self.movimento_ganhador(self.player_atual):
+    def jogar(self, arquivo_partidas=None):
+        # Com `arquivo_partidas` a partida é acrescentada a esse arquivo ao
+        # terminar, mesmo se for interrompida
+        resposta = None
+        primeiro = self.player_atual
+        jogadas = []
+        tempos_ms = []
+        resultado = INTERROMPIDA
+        inicio = time.perf_counter()
+        try:
+            while True:
                 self.desenhar_tabuleiro()
-                vencedor = str(
-                    'O jogador ganhou' if self.player_atual == 1 else 'A I.A. venceu'
+                if self.player_atual == 1:
+                    if self.ponderar and self.ponderador is None:
+                        self.iniciar_ponderacao()
+                    coluna = int(input(f'escolha a coluna (1-{self.colunas}): ')) - 1
+                    if not self.validar_movimento(coluna):
+                        print('Movimento inválido! Realize outro.')
+                        continue
+                    resposta = self.parar_ponderacao(coluna)
+                    self.turno_humano(coluna)
+                else:
+                    coluna = self.turno_ia(resposta=resposta)
+                    resposta = None
+                jogadas.append(coluna)
+                tempos_ms.append((time.perf_counter() - inicio) * 1000)
+                inicio = time.perf_counter()
+
+                if self.movimento_ganhador(self.player_atual):
+                    self.desenhar_tabuleiro()
+                    vencedor = str(
+                        'O jogador ganhou'
+                        if self.player_atual == 1
+                        else 'A I.A. venceu'
+                    )
+                    print(vencedor)
+                    resultado = (
+                        PRIMEIRO if self.player_atual == primeiro else SEGUNDO
+                    )
+                    break
+
+                if self.bitboard.cheio():
+                    self.desenhar_tabuleiro()
+                    print('Empate')
+                    resultado = EMPATE
+                    break
+
+                self.player_atual *= -1
+        finally:
+            if arquivo_partidas is not None and jogadas:
+                gravar_partida(
+                    arquivo_partidas,
+                    self.linhas,
+                    self.colunas,
+                    jogadas,
+                    tempos_ms,
+                    resultado,
+                    {
+                        'profundidade': self.ply,
+                        'tempo_ms': self.tempo_ms,
+                        'alpha_beta': self.usar_alpha_beta,
+                        'ponderar': self.ponderar,
+                        'livro': self.livro is not None,
+                        'ia_comeca': primeiro == -1,
+                    },
                 )
-                print(vencedor)
-                break
-
-            self.player_atual *= -1
 
 
-game = Connect4(ply=7, usar_alpha_beta=False)
-game.jogar()
+if __name__ == '__main__':
+    game = Connect4(ply=7, usar_alpha_beta=True)
+    game.jogar()
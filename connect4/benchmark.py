@@ -0,0 +1,365 @@
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from connect4.backend import Connect4
+from connect4.corpus import FASES, VERSAO_CORPUS, posicoes
+from connect4.lote import AvaliadorLote
+from connect4.main import IA, PECA_IA, PECA_JOGADOR, Tabuleiro
+
+MODOS = ('minimax', 'alpha_beta', 'pvs')
+PROFUNDIDADES = {'minimax': 4, 'alpha_beta': 6, 'pvs': 6}
+LIMITE_REGRESSAO = 0.10
+# Cada busca é repetida com um motor novo e fica o menor tempo, que é o menos
+# afetado por outros processos da máquina
+REPETICOES = 5
+# Tempo mínimo de cada medição das funções rápidas (avaliação e vitória)
+DURACAO_MINIMA_S = 0.2
+# Tabuleiros por chamada na medição da avaliação em lote
+TAMANHO_LOTE = 256
+# Importar estes módulos não pode carregar numpy nem pygame
+IMPORTACOES = ('connect4.backend', 'connect4.main', 'connect4.cli')
+MODULOS_PESADOS = ('numpy', 'pygame')
+# Uma análise rasa pela linha de comando, com a partida do interpretador
+COMANDO_INICIALIZACAO = ('-m', 'connect4.cli', 'analisar', '--profundidade', '1')
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Resultado de referência guardado no repositório, gerado com --saida. Os
+# tempos dependem da máquina: numa máquina diferente, gere uma base nova antes
+# de comparar.
+BASE = os.path.join(RAIZ, 'connect4', 'base_benchmark.json')
+
+
+def _preparar_backend(linhas, colunas, jogadas, modo):
+    # A IA (-1) é sempre quem joga na posição medida. O solucionador exato fica
+    # desligado para que os finais também meçam a busca.
+    jogo = Connect4(
+        linhas,
+        colunas,
+        usar_alpha_beta=modo == 'alpha_beta',
+        usar_pvs=modo == 'pvs',
+        limite_solucionador=None,
+    )
+    jogo.carregar_jogadas(jogadas, -1 if len(jogadas) % 2 == 0 else 1)
+
+    def buscar(profundidade):
+        jogo.nos = 0
+        jogo.buscar_profundidade(profundidade)
+        return jogo.nos
+
+    lote = AvaliadorLote.do_motor(jogo.avaliador)
+    tabuleiros = np.repeat([jogo.tabuleiro], TAMANHO_LOTE, axis=0)
+    return (
+        buscar,
+        jogo.avaliar_tabuleiro,
+        lambda: jogo.movimento_ganhador(-1),
+        lambda: lote.avaliar(tabuleiros),
+    )
+
+
+def _preparar_interface(linhas, colunas, jogadas, modo):
+    ia = IA(usar_poda=modo == 'alpha_beta')
+    tabuleiro = Tabuleiro()
+    peca = PECA_IA if len(jogadas) % 2 == 0 else PECA_JOGADOR
+    for coluna in jogadas:
+        tabuleiro.jogar(coluna, peca)
+        peca = PECA_JOGADOR if peca == PECA_IA else PECA_IA
+
+    def buscar(profundidade):
+        ia.nos = 0
+        ia.buscar_profundidade(tabuleiro, profundidade)
+        return ia.nos
+
+    lote = AvaliadorLote.do_motor(tabuleiro.avaliador)
+    tabuleiros = np.repeat([tabuleiro.tabuleiro], TAMANHO_LOTE, axis=0)
+    return (
+        buscar,
+        # A avaliação que a busca usa nas folhas
+        tabuleiro.avaliador.valor,
+        lambda: tabuleiro.movimento_ganhador(PECA_IA),
+        lambda: lote.avaliar(tabuleiros),
+    )
+
+
+# Preparação e modos de busca de cada motor; só o do terminal tem PVS
+MOTORES = {
+    (6, 7): (_preparar_interface, ('minimax', 'alpha_beta')),
+    (7, 8): (_preparar_backend, MODOS),
+}
+
+
+def _chamadas_por_segundo(funcao) -> float:
+    # Dobra o número de chamadas até a medição durar o suficiente
+    chamadas = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(chamadas):
+            funcao()
+        tempo = time.perf_counter() - inicio
+        if tempo >= DURACAO_MINIMA_S:
+            return chamadas / tempo
+        chamadas *= 2
+
+
+def medir_busca(  # noqa: PLR0913
+    linhas, colunas, fase, modo, profundidade, *, repeticoes=REPETICOES
+) -> dict:
+    # Aprofunda de 1 até `profundidade` em cada posição, com a tabela de
+    # transposição e o ordenador aquecidos entre as iterações, como na busca
+    # por tempo. Os tempos por profundidade são somados sobre as posições.
+    preparar, _ = MOTORES[linhas, colunas]
+    tempos = [0.0] * profundidade
+    nos = 0
+    for jogadas in posicoes(linhas, colunas, fase):
+        melhores = [math.inf] * profundidade
+        for _ in range(repeticoes):
+            buscar, *_ = preparar(linhas, colunas, jogadas, modo)
+            acumulado = 0.0
+            nos_posicao = 0
+            for atual in range(1, profundidade + 1):
+                inicio = time.perf_counter()
+                nos_posicao += buscar(atual)
+                acumulado += time.perf_counter() - inicio
+                melhores[atual - 1] = min(melhores[atual - 1], acumulado)
+        nos += nos_posicao
+        for indice, tempo in enumerate(melhores):
+            tempos[indice] += tempo
+
+    metricas = {
+        'nos': nos,
+        'nos_por_segundo': nos / tempos[-1] if tempos[-1] else 0.0,
+    }
+    for atual, tempo in enumerate(tempos, 1):
+        metricas[f'tempo_profundidade_{atual}_s'] = tempo
+    return metricas
+
+
+def relatorio_nos(profundidade=8, linhas=7, colunas=8, modos=('alpha_beta', 'pvs')):
+    # Nós de cada modo no corpus, aprofundando até a mesma profundidade, e a
+    # razão em relação ao primeiro modo. Só conta nós: não depende da máquina.
+    preparar, _ = MOTORES[linhas, colunas]
+    relatorio = {}
+    for fase in FASES:
+        nos = {}
+        for modo in modos:
+            nos[modo] = 0
+            for jogadas in posicoes(linhas, colunas, fase):
+                buscar, *_ = preparar(linhas, colunas, jogadas, modo)
+                for atual in range(1, profundidade + 1):
+                    nos[modo] += buscar(atual)
+        relatorio[fase] = {
+            'nos': nos,
+            'razao': {modo: nos[modo] / nos[modos[0]] for modo in modos[1:]},
+        }
+    return relatorio
+
+
+def medir_importacao(modulo, repeticoes=REPETICOES) -> dict:
+    # Cada medição roda num interpretador novo, sem nada em cache
+    codigo = (
+        'import sys, time\n'
+        'inicio = time.perf_counter()\n'
+        f'import {modulo}\n'
+        'print(time.perf_counter() - inicio, '
+        f'sum(nome in sys.modules for nome in {MODULOS_PESADOS!r}))'
+    )
+    tempo = math.inf
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, '-c', codigo],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        tempo = min(tempo, float(saida[0]))
+    return {'tempo_s': tempo, 'modulos_pesados': int(saida[1])}
+
+
+def medir_inicializacao(repeticoes=REPETICOES) -> float:
+    tempo = math.inf
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *COMANDO_INICIALIZACAO],
+            cwd=RAIZ,
+            capture_output=True,
+            check=True,
+        )
+        tempo = min(tempo, time.perf_counter() - inicio)
+    return tempo
+
+
+def medir_funcoes(linhas, colunas, fase) -> dict:
+    # Média das taxas sobre as posições da fase
+    preparar, _ = MOTORES[linhas, colunas]
+    avaliacoes = []
+    verificacoes = []
+    avaliacoes_lote = []
+    for jogadas in posicoes(linhas, colunas, fase):
+        _, avaliar, verificar_vitoria, avaliar_lote = preparar(
+            linhas, colunas, jogadas, 'minimax'
+        )
+        avaliacoes.append(_chamadas_por_segundo(avaliar))
+        verificacoes.append(_chamadas_por_segundo(verificar_vitoria))
+        avaliacoes_lote.append(_chamadas_por_segundo(avaliar_lote) * TAMANHO_LOTE)
+    return {
+        'avaliacoes_por_segundo': sum(avaliacoes) / len(avaliacoes),
+        'verificacoes_vitoria_por_segundo': sum(verificacoes) / len(verificacoes),
+        'avaliacoes_lote_por_segundo': sum(avaliacoes_lote) / len(avaliacoes_lote),
+    }
+
+
+def executar(
+    profundidades=None,
+    tamanhos=tuple(MOTORES),
+    repeticoes=REPETICOES,
+    progresso=None,
+) -> dict:
+    profundidades = {**PROFUNDIDADES, **(profundidades or {})}
+    metricas = {}
+    if progresso is not None:
+        progresso('importação')
+    for modulo in IMPORTACOES:
+        for nome, valor in medir_importacao(modulo, repeticoes).items():
+            metricas[f'importacao/{modulo}/{nome}'] = valor
+    metricas['inicializacao/analisar/tempo_s'] = medir_inicializacao(repeticoes)
+
+    for linhas, colunas in tamanhos:
+        tamanho = f'{linhas}x{colunas}'
+        for fase in FASES:
+            if progresso is not None:
+                progresso(f'{tamanho} {fase}')
+            for nome, valor in medir_funcoes(linhas, colunas, fase).items():
+                metricas[f'{tamanho}/{fase}/{nome}'] = valor
+            for modo in MOTORES[linhas, colunas][1]:
+                resultado = medir_busca(
+                    linhas,
+                    colunas,
+                    fase,
+                    modo,
+                    profundidades[modo],
+                    repeticoes=repeticoes,
+                )
+                for nome, valor in resultado.items():
+                    metricas[f'{tamanho}/{modo}/{fase}/{nome}'] = valor
+
+    return {
+        'versao_corpus': VERSAO_CORPUS,
+        'profundidades': profundidades,
+        'repeticoes': repeticoes,
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'metricas': metricas,
+    }
+
+
+def comparar(atual, base, limite=LIMITE_REGRESSAO) -> list[dict]:
+    # Métricas que pioraram mais que `limite` (fração) em relação à base.
+    # Taxas (_por_segundo) pioram quando caem e tempos (_s) quando sobem; as
+    # contagens de nós só mudam com a busca e não entram na comparação.
+    # Qualquer módulo pesado a mais numa importação é regressão.
+    if atual['versao_corpus'] != base['versao_corpus']:
+        raise ValueError(
+            f'corpus da base é a versão {base["versao_corpus"]}, '
+            f'o atual é a {atual["versao_corpus"]}'
+        )
+    for modo, profundidade in atual['profundidades'].items():
+        if base['profundidades'].get(modo, profundidade) != profundidade:
+            raise ValueError(f'a base mediu {modo} com outra profundidade')
+
+    regressoes = []
+    for nome, valor in atual['metricas'].items():
+        referencia = base['metricas'].get(nome)
+        if nome.endswith('modulos_pesados'):
+            if referencia is not None and valor > referencia:
+                regressoes.append({
+                    'metrica': nome,
+                    'base': referencia,
+                    'atual': valor,
+                    'piora': math.inf,
+                })
+            continue
+        if not referencia:
+            continue
+        if nome.endswith('_por_segundo'):
+            variacao = (referencia - valor) / referencia
+        elif nome.endswith('_s'):
+            variacao = (valor - referencia) / referencia
+        else:
+            continue
+        if variacao > limite:
+            regressoes.append({
+                'metrica': nome,
+                'base': referencia,
+                'atual': valor,
+                'piora': variacao,
+            })
+    return regressoes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Mede os motores no corpus fixo e compara com uma base'
+    )
+    parser.add_argument('--saida', help='arquivo JSON com o resultado')
+    parser.add_argument(
+        '--base',
+        default=BASE,
+        help='resultado anterior para comparar (padrão: a base do repositório; '
+        'vazio não compara)',
+    )
+    parser.add_argument('--limite', type=float, default=LIMITE_REGRESSAO)
+    parser.add_argument(
+        '--profundidade-minimax', type=int, default=PROFUNDIDADES['minimax']
+    )
+    parser.add_argument(
+        '--profundidade-alpha-beta', type=int, default=PROFUNDIDADES['alpha_beta']
+    )
+    parser.add_argument('--profundidade-pvs', type=int, default=PROFUNDIDADES['pvs'])
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES)
+    parser.add_argument(
+        '--relatorio-nos',
+        type=int,
+        metavar='PROFUNDIDADE',
+        help='só compara os nós de alpha-beta e PVS nessa profundidade',
+    )
+    args = parser.parse_args()
+
+    if args.relatorio_nos:
+        print(json.dumps(relatorio_nos(args.relatorio_nos), indent=2))
+        sys.exit()
+
+    resultado = executar(
+        {
+            'minimax': args.profundidade_minimax,
+            'alpha_beta': args.profundidade_alpha_beta,
+            'pvs': args.profundidade_pvs,
+        },
+        repeticoes=args.repeticoes,
+        progresso=lambda etapa: print(etapa, file=sys.stderr, flush=True),
+    )
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2)
+    else:
+        print(json.dumps(resultado, indent=2))
+
+    if args.base:
+        with open(args.base, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        regressoes = comparar(resultado, base, args.limite)
+        for regressao in regressoes:
+            print(
+                f'{regressao["metrica"]}: {regressao["base"]:.4g} -> '
+                f'{regressao["atual"]:.4g} ({regressao["piora"]:+.1%})',
+                file=sys.stderr,
+            )
+        if regressoes:
+            sys.exit(1)
@@ -0,0 +1,189 @@
+import random
+
+SEMENTE_ZOBRIST = 2024
+_tabelas_zobrist = {}
+
+
+def tabela_zobrist(linhas, colunas) -> list[list[int]]:
+    # Um número aleatório de 64 bits por (peça, casa), fixo para cada tamanho de
+    # tabuleiro para que os hashes sejam reprodutíveis entre execuções.
+    chave = (linhas, colunas)
+    if chave not in _tabelas_zobrist:
+        gerador = random.Random(SEMENTE_ZOBRIST + linhas * 100 + colunas)
+        total_bits = colunas * (linhas + 1)
+        _tabelas_zobrist[chave] = [
+            [gerador.getrandbits(64) for _ in range(total_bits)] for _ in range(2)
+        ]
+    return _tabelas_zobrist[chave]
+
+
+class Bitboard:
+    # Cada coluna ocupa (linhas + 1) bits: o bit extra no topo funciona como
+    # sentinela e impede que os deslocamentos "vazem" para a coluna vizinha.
+    # O bit 0 de cada coluna é a casa de baixo.
+    def __init__(self, linhas: int = 6, colunas: int = 7, pecas=(1, -1)):
+        self.linhas = linhas
+        self.colunas = colunas
+        self.pecas = tuple(pecas)
+        self.indices = {peca: indice for indice, peca in enumerate(self.pecas)}
+        self.mascaras = [0, 0]
+        self.alturas = [0] * colunas
+        self.jogadas = 0
+        self.hash = 0
+        self.zobrist = tabela_zobrist(linhas, colunas)
+
+        self.altura_coluna = linhas + 1
+        self.mascara_fundo = sum(
+            1 << (coluna * self.altura_coluna) for coluna in range(colunas)
+        )
+        self.mascara_tabuleiro = self.mascara_fundo * ((1 << linhas) - 1)
+        self.deslocamentos = (
+            1,  # vertical
+            self.altura_coluna,  # horizontal
+            self.altura_coluna - 1,  # diagonal /
+            self.altura_coluna + 1,  # diagonal \
+        )
+        self.mascaras_coluna = [
+            ((1 << linhas) - 1) << (coluna * self.altura_coluna)
+            for coluna in range(colunas)
+        ]
+
+    @classmethod
+    def de_matriz(cls, matriz, pecas=(1, -1)):
+        # A matriz segue a convenção dos tabuleiros do jogo: linha 0 no topo.
+        linhas = len(matriz)
+        colunas = len(matriz[0])
+        bitboard = cls(linhas, colunas, pecas)
+        for coluna in range(colunas):
+            for linha in range(linhas - 1, -1, -1):
+                peca = matriz[linha][coluna]
+                if peca == 0:
+                    break
+                bitboard.jogar(coluna, int(peca))
+        return bitboard
+
+    def copiar(self):
+        copia = Bitboard.__new__(Bitboard)
+        copia.__dict__.update(self.__dict__)
+        copia.mascaras = list(self.mascaras)
+        copia.alturas = list(self.alturas)
+        return copia
+
+    def bit(self, linha, coluna) -> int:
+        return 1 << (coluna * self.altura_coluna + self.linhas - 1 - linha)
+
+    def ocupado(self) -> int:
+        return self.mascaras[0] | self.mascaras[1]
+
+    def peca_em(self, linha, coluna):
+        bit = self.bit(linha, coluna)
+        for indice, mascara in enumerate(self.mascaras):
+            if mascara & bit:
+                return self.pecas[indice]
+        return 0
+
+    def chave(self, peca) -> int:
+        # Identifica a posição do ponto de vista de quem joga com `peca`: as
+        # peças dele mais a máscara de ocupação. A soma é única porque cada
+        # coluna ocupada é um bloco contínuo a partir do fundo.
+        return self.mascaras[self.indices[peca]] + self.ocupado()
+
+    def espelhar(self, mascara) -> int:
+        # Inverte a ordem das colunas (espelho esquerda-direita)
+        mascara_coluna = (1 << self.altura_coluna) - 1
+        espelhada = 0
+        for coluna in range(self.colunas):
+            bloco = (mascara >> (coluna * self.altura_coluna)) & mascara_coluna
+            espelhada |= bloco << ((self.colunas - 1 - coluna) * self.altura_coluna)
+        return espelhada
+
+    def chave_canonica(self, peca) -> tuple[int, bool]:
+        # A menor chave entre a posição e o seu espelho; o booleano diz se a
+        # chave devolvida é a do espelho
+        chave = self.chave(peca)
+        espelhada = self.espelhar(chave)
+        if espelhada < chave:
+            return espelhada, True
+        return chave, False
+
+    def validar_movimento(self, coluna) -> bool:
+        return self.alturas[coluna] < self.linhas
+
+    def movimentos_validos(self) -> list[int]:
+        return [
+            coluna
+            for coluna in range(self.colunas)
+            if self.alturas[coluna] < self.linhas
+        ]
+
+    def mascara_movimentos_validos(self) -> int:
+        # Somar a máscara de fundo "empurra" cada coluna até a primeira casa livre
+        return (self.ocupado() + self.mascara_fundo) & self.mascara_tabuleiro
+
+    def cheio(self) -> bool:
+        return self.jogadas == self.linhas * self.colunas
+
+    def jogar(self, coluna, peca) -> int:
+        # Retorna a linha (contada do topo) onde a peça caiu
+        altura = self.alturas[coluna]
+        indice = self.indices[peca]
+        posicao = coluna * self.altura_coluna + altura
+        self.mascaras[indice] |= 1 << posicao
+        self.hash ^= self.zobrist[indice][posicao]
+        self.alturas[coluna] = altura + 1
+        self.jogadas += 1
+        return self.linhas - 1 - altura
+
+    def desfazer(self, coluna) -> int:
+        altura = self.alturas[coluna] - 1
+        posicao = coluna * self.altura_coluna + altura
+        bit = 1 << posicao
+        indice = 0 if self.mascaras[0] & bit else 1
+        self.mascaras[indice] &= ~bit
+        self.hash ^= self.zobrist[indice][posicao]
+        self.alturas[coluna] = altura
+        self.jogadas -= 1
+        return self.linhas - 1 - altura
+
+    def alinhou_quatro(self, mascara) -> bool:
+        for deslocamento in self.deslocamentos:
+            pares = mascara & (mascara >> deslocamento)
+            if pares & (pares >> (2 * deslocamento)):
+                return True
+        return False
+
+    def movimento_ganhador(self, peca) -> bool:
+        return self.alinhou_quatro(self.mascaras[self.indices[peca]])
+
+    def casas_vencedoras(self, posicao, mascara) -> int:
+        # Casas livres que completariam quatro peças de `posicao`
+        resultado = (posicao << 1) & (posicao << 2) & (posicao << 3)
+        for deslocamento in self.deslocamentos[1:]:
+            pares = (posicao << deslocamento) & (posicao << 2 * deslocamento)
+            resultado |= pares & (posicao << 3 * deslocamento)
+            resultado |= pares & (posicao >> deslocamento)
+            pares = (posicao >> deslocamento) & (posicao >> 2 * deslocamento)
+            resultado |= pares & (posicao << deslocamento)
+            resultado |= pares & (posicao >> 3 * deslocamento)
+        return resultado & (self.mascara_tabuleiro ^ mascara)
+
+    def ameacas(self, peca) -> tuple[int, int, int]:
+        # Máscaras táticas para quem joga com `peca`, sem simular jogadas:
+        # casas onde ele vence agora, casas que ele precisa bloquear e casas
+        # que entregariam a vitória ao adversário na casa de cima
+        indice = self.indices[peca]
+        ocupado = self.mascaras[0] | self.mascaras[1]
+        jogaveis = (ocupado + self.mascara_fundo) & self.mascara_tabuleiro
+        adversario = self.casas_vencedoras(self.mascaras[1 - indice], ocupado)
+        return (
+            jogaveis & self.casas_vencedoras(self.mascaras[indice], ocupado),
+            jogaveis & adversario,
+            jogaveis & (adversario >> 1),
+        )
+
+    def colunas_da_mascara(self, mascara) -> list[int]:
+        return [
+            coluna
+            for coluna, mascara_coluna in enumerate(self.mascaras_coluna)
+            if mascara & mascara_coluna
+        ]
@@ -0,0 +1,42 @@
+import time
+
+# De quantos em quantos nós a busca confere o relógio
+INTERVALO_RELOGIO = 64
+
+
+class TempoEsgotado(Exception):
+    pass
+
+
+class BuscaCancelada(Exception):
+    # Diferente de TempoEsgotado, interrompe também o aprofundamento iterativo
+    pass
+
+
+def conferir_relogio(cancelamento, prazo):
+    # Chamada a cada INTERVALO_RELOGIO nós: interrompe a busca cancelada ou que
+    # passou do prazo
+    if cancelamento is not None and cancelamento.is_set():
+        raise BuscaCancelada
+    if prazo is not None and time.perf_counter() >= prazo:
+        raise TempoEsgotado
+
+
+def aprofundamento_iterativo(buscar, tempo_ms, profundidade_maxima, resolvido=None):
+    # `buscar(profundidade, prazo)` deve levantar TempoEsgotado ao passar do
+    # prazo. Retorna o resultado da iteração mais profunda que terminou.
+    prazo = time.perf_counter() + tempo_ms / 1000
+    resultado = None
+    for profundidade in range(1, profundidade_maxima + 1):
+        try:
+            # A primeira iteração roda sem prazo para sempre haver uma jogada
+            resultado = buscar(profundidade, None if resultado is None else prazo)
+        except TempoEsgotado:
+            break
+
+        # Vitória ou derrota forçada: aprofundar não muda a jogada
+        if resolvido is not None and resolvido(resultado):
+            break
+        if time.perf_counter() >= prazo:
+            break
+    return resultado
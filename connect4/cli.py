@@ -0,0 +1,147 @@
+import argparse
+import json
+import runpy
+import sys
+import time
+
+# Subcomandos que só repassam os argumentos ao módulo correspondente. O
+# motor é importado dentro dos outros subcomandos: se ele já estivesse
+# carregado, o runpy executaria de novo módulos que ele importa, como o livro.
+MODULOS = {
+    'servidor': 'connect4.servidor',
+    'livro': 'connect4.livro',
+    'torneio': 'connect4.torneio',
+    'benchmark': 'connect4.benchmark',
+    'lote': 'connect4.lote',
+    'partidas': 'connect4.partidas',
+    'sessoes': 'connect4.sessoes',
+    'ajuste': 'connect4.ajuste',
+}
+
+
+def jogar(args):
+    from connect4.backend import Connect4  # noqa: PLC0415
+
+    with Connect4(
+        ply=args.ply,
+        usar_alpha_beta=not args.minimax_puro,
+        usar_pvs=args.pvs,
+        tempo_ms=args.tempo_ms,
+        ponderar=args.ponderar,
+        livro=args.livro,
+        pesos=args.pesos,
+    ) as jogo:
+        jogo.jogar(args.gravar)
+
+
+def interface(args):
+    from connect4.main import Jogo  # noqa: PLC0415
+
+    Jogo(
+        tempo_ms=args.tempo_ms,
+        ponderar=args.ponderar,
+        livro=args.livro,
+        fps=args.fps,
+        arquivo_partidas=args.gravar,
+        pesos=args.pesos,
+    ).loop()
+
+
+def analisar(args):
+    from connect4.backend import Connect4  # noqa: PLC0415
+    from connect4.instrumentacao import (  # noqa: PLC0415
+        EstatisticasBusca,
+        valor_json,
+    )
+
+    # Quem joga depois das jogadas é analisado como a IA do motor
+    jogo = Connect4(
+        args.linhas,
+        args.colunas,
+        ply=args.profundidade,
+        usar_alpha_beta=not args.minimax_puro,
+        usar_pvs=args.pvs,
+        livro=args.livro,
+        pesos=args.pesos,
+    )
+    jogadas = [int(coluna) for coluna in args.jogadas]
+    jogo.carregar_jogadas(jogadas, -1 if len(jogadas) % 2 == 0 else 1)
+
+    inicio = time.perf_counter()
+    jogada = jogo.livro.consultar(jogo.bitboard, -1) if jogo.livro else None
+    estatisticas = EstatisticasBusca()
+    if jogada is not None:
+        coluna, valor = jogada
+    else:
+        valor, coluna = jogo.buscar(args.tempo_ms, estatisticas=estatisticas)
+    resultado = {
+        'coluna': coluna,
+        'valor': valor_json(valor),
+        'nos': estatisticas.nos,
+        'variacao_principal': estatisticas.variacao_principal,
+        'tempo_ms': (time.perf_counter() - inicio) * 1000,
+    }
+    print(json.dumps(resultado))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in MODULOS:
+        sys.argv = [f'connect4 {argv[0]}', *argv[1:]]
+        runpy.run_module(MODULOS[argv[0]], run_name='__main__', alter_sys=True)
+        return
+
+    parser = argparse.ArgumentParser(prog='connect4')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    parser_jogar = subcomandos.add_parser('jogar', help='jogo no terminal')
+    parser_jogar.add_argument('--ply', type=int, default=7)
+    parser_jogar.add_argument('--minimax-puro', action='store_true')
+    parser_jogar.add_argument('--pvs', action='store_true')
+    parser_jogar.add_argument('--tempo-ms', type=int)
+    parser_jogar.add_argument('--ponderar', action='store_true')
+    parser_jogar.add_argument('--livro')
+    parser_jogar.add_argument('--gravar', help='arquivo de partidas (acrescenta)')
+    parser_jogar.add_argument('--pesos', help='arquivo de pesos de connect4 ajuste')
+    parser_jogar.set_defaults(funcao=jogar)
+
+    parser_interface = subcomandos.add_parser('interface', help='jogo com pygame')
+    parser_interface.add_argument('--tempo-ms', type=int)
+    parser_interface.add_argument('--ponderar', action='store_true')
+    parser_interface.add_argument('--livro')
+    parser_interface.add_argument('--fps', type=int, default=60)
+    parser_interface.add_argument(
+        '--gravar', help='arquivo de partidas (acrescenta)'
+    )
+    parser_interface.add_argument(
+        '--pesos', help='arquivo de pesos de connect4 ajuste'
+    )
+    parser_interface.set_defaults(funcao=interface)
+
+    parser_analisar = subcomandos.add_parser(
+        'analisar', help='melhor jogada de uma posição, em JSON'
+    )
+    parser_analisar.add_argument(
+        'jogadas', nargs='?', default='', help='colunas a partir de 0, ex.: 3443'
+    )
+    parser_analisar.add_argument('--profundidade', type=int, default=6)
+    parser_analisar.add_argument('--tempo-ms', type=int)
+    parser_analisar.add_argument('--linhas', type=int, default=7)
+    parser_analisar.add_argument('--colunas', type=int, default=8)
+    parser_analisar.add_argument('--minimax-puro', action='store_true')
+    parser_analisar.add_argument('--pvs', action='store_true')
+    parser_analisar.add_argument('--livro')
+    parser_analisar.add_argument(
+        '--pesos', help='arquivo de pesos de connect4 ajuste'
+    )
+    parser_analisar.set_defaults(funcao=analisar)
+
+    for nome, modulo in MODULOS.items():
+        subcomandos.add_parser(nome, help=f'repassa os argumentos a {modulo}')
+
+    args = parser.parse_args(argv)
+    args.funcao(args)
+
+
+if __name__ == '__main__':
+    main()
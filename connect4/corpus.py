@@ -0,0 +1,50 @@
+# Posições fixas para medir o desempenho dos motores. Cada posição é a
+# sequência de colunas (a partir de 0) jogadas desde o tabuleiro vazio, sem
+# vencedor e sem vitória imediata para nenhum dos lados. Mudar qualquer posição
+# exige subir a versão, para que medições antigas não sejam comparadas com as
+# novas.
+VERSAO_CORPUS = 1
+
+FASES = ('abertura', 'meio', 'final')
+
+CORPUS = {
+    # Tabuleiro da interface gráfica
+    (6, 7): {
+        'abertura': ('3', '32', '334', '3243'),
+        'meio': (
+            '36206214302663',
+            '624121156202015',
+            '5456556500532021',
+            '22665450242545033',
+        ),
+        'final': (
+            '41251005323265564433603543',
+            '513024130405204662350110326',
+            '6101162201311530422560600556',
+            '23442416333345010312214022141',
+        ),
+    },
+    # Tabuleiro do jogo no terminal
+    (7, 8): {
+        'abertura': ('3', '34', '434', '4435'),
+        'meio': (
+            '767663411153002450',
+            '4313353500132422012',
+            '20772107477406665353',
+            '507573770037300771222',
+        ),
+        'final': (
+            '435632510564704245447024255502066062',
+            '0074756431777443704424265522317621166',
+            '42176412777603040011417436110002252422',
+            '533026574164550670727700443214244752333',
+        ),
+    },
+}
+
+
+def posicoes(linhas, colunas, fase) -> tuple[tuple[int, ...], ...]:
+    return tuple(
+        tuple(int(coluna) for coluna in posicao)
+        for posicao in CORPUS[linhas, colunas][fase]
+    )
@@ -0,0 +1,118 @@
+import math
+import time
+
+# De quantos em quantos nós `ao_progresso` é chamado
+INTERVALO_PROGRESSO = 10000
+
+
+def percentil(valores, fracao):
+    # Percentil pelo método do posto mais próximo; 0.0 sem valores
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, math.ceil(fracao * len(ordenados)) - 1)]
+
+
+def valor_json(valor):
+    # JSON não tem infinito: vitória e derrota forçadas viram texto
+    if isinstance(valor, float) and math.isinf(valor):
+        return 'vitoria' if valor > 0 else 'derrota'
+    return valor
+
+
+class EstatisticasBusca:
+    # Preenchida pela busca quando passada a `buscar`. Sem ela a busca só
+    # confere um atributo None por nó. `ao_iterar` é chamado ao fim de cada
+    # iteração do aprofundamento e `ao_progresso` a cada `intervalo_nos` nós,
+    # os dois recebendo as próprias estatísticas.
+    def __init__(
+        self,
+        ao_iterar=None,
+        ao_progresso=None,
+        intervalo_nos: int = INTERVALO_PROGRESSO,
+    ):
+        self.ao_iterar = ao_iterar
+        self.ao_progresso = ao_progresso
+        self.intervalo_nos = intervalo_nos
+
+        self.ply_raiz = 0
+        self.nos = 0
+        # Índice: distância da raiz em plies
+        self.nos_por_profundidade = []
+        self.avaliacoes = 0
+        self.cortes = 0
+        # Índice: posição, na ordem de busca, do movimento que causou o corte
+        self.cortes_por_indice = []
+        self.variacao_principal = []
+        self.iteracoes = []
+        self.tempo_s = 0.0
+
+        self.inicio = time.perf_counter()
+        self.inicio_iteracao = self.inicio
+        self.nos_inicio_iteracao = 0
+
+    def iniciar(self, ply_raiz):
+        self.ply_raiz = ply_raiz
+        self.inicio = time.perf_counter()
+
+    def finalizar(self):
+        self.tempo_s = time.perf_counter() - self.inicio
+
+    def visitar(self, ply):
+        self.nos += 1
+        distancia = ply - self.ply_raiz
+        while len(self.nos_por_profundidade) <= distancia:
+            self.nos_por_profundidade.append(0)
+        self.nos_por_profundidade[distancia] += 1
+        if self.ao_progresso is not None and self.nos % self.intervalo_nos == 0:
+            self.ao_progresso(self)
+
+    def avaliar(self):
+        self.avaliacoes += 1
+
+    def registrar_corte(self, indice):
+        self.cortes += 1
+        while len(self.cortes_por_indice) <= indice:
+            self.cortes_por_indice.append(0)
+        self.cortes_por_indice[indice] += 1
+
+    def iniciar_iteracao(self):
+        self.inicio_iteracao = time.perf_counter()
+        self.nos_inicio_iteracao = self.nos
+
+    def concluir_iteracao(self, profundidade, valor, movimento, variacao):
+        self.variacao_principal = list(variacao)
+        self.iteracoes.append({
+            'profundidade': profundidade,
+            'valor': valor,
+            'movimento': movimento,
+            'nos': self.nos - self.nos_inicio_iteracao,
+            'tempo_s': time.perf_counter() - self.inicio_iteracao,
+            'variacao_principal': self.variacao_principal,
+        })
+        if self.ao_iterar is not None:
+            self.ao_iterar(self)
+
+    @property
+    def fator_ramificacao_efetivo(self) -> float:
+        # Razão entre os nós das duas últimas iterações; com uma iteração só,
+        # a raiz de ordem `profundidade` dos nós dela
+        if not self.iteracoes:
+            return 0.0
+        ultima = self.iteracoes[-1]
+        if len(self.iteracoes) > 1 and self.iteracoes[-2]['nos']:
+            return ultima['nos'] / self.iteracoes[-2]['nos']
+        return ultima['nos'] ** (1 / max(1, ultima['profundidade']))
+
+    def resumo(self) -> dict:
+        return {
+            'nos': self.nos,
+            'nos_por_profundidade': self.nos_por_profundidade,
+            'avaliacoes': self.avaliacoes,
+            'cortes': self.cortes,
+            'cortes_por_indice': self.cortes_por_indice,
+            'variacao_principal': self.variacao_principal,
+            'iteracoes': self.iteracoes,
+            'fator_ramificacao_efetivo': self.fator_ramificacao_efetivo,
+            'tempo_s': self.tempo_s,
+        }
@@ -0,0 +1,278 @@
+import argparse
+import math
+import mmap
+import struct
+import time
+
+MAGICO = b'C4LV'
+VERSAO = 2
+# magico, versão, motor, linhas, colunas, plies, quantidade de registros
+CABECALHO = struct.Struct('<4sBBBBBI')
+# chave canônica, melhor coluna (na orientação canônica), pontuação
+REGISTRO = struct.Struct('<QBi')
+# Pontuações infinitas (vitória/derrota forçada) ficam nos extremos do int32
+PONTUACAO_MAXIMA = 2**31 - 1
+# Motores que leem o livro, na ordem do byte gravado no cabeçalho. Cada um tem
+# a sua avaliação e escala de pontuação, então o livro só serve para o motor
+# que o gerou.
+MOTOR_BACKEND = 'backend'
+MOTOR_INTERFACE = 'interface'
+MOTORES = (MOTOR_BACKEND, MOTOR_INTERFACE)
+
+
+class Livro:
+    # Livro de aberturas num arquivo binário ordenado pela chave canônica, lido
+    # via mmap com busca binária. O arquivo só é aberto na primeira consulta,
+    # então criar o livro não atrasa a inicialização do jogo. Com `motor` o
+    # livro gerado por outro motor é recusado ao abrir.
+    def __init__(self, caminho, motor=None):
+        self.caminho = caminho
+        self.motor = motor
+        self.arquivo = None
+        self.mapa = None
+        self.linhas = None
+        self.colunas = None
+        self.plies = 0
+        self.quantidade = 0
+
+        self.consultas = 0
+        self.acertos = 0
+
+    def abrir(self):
+        self.arquivo = open(self.caminho, 'rb')
+        self.mapa = mmap.mmap(self.arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magico, versao, motor, linhas, colunas, plies, quantidade = (
+            CABECALHO.unpack_from(self.mapa, 0)
+        )
+        if magico != MAGICO or versao != VERSAO or motor >= len(MOTORES):
+            self.fechar()
+            raise ValueError(f'{self.caminho} não é um livro de aberturas válido')
+        if self.motor is not None and MOTORES[motor] != self.motor:
+            self.fechar()
+            raise ValueError(
+                f'livro gerado pelo motor {MOTORES[motor]}, lido pelo {self.motor}'
+            )
+        self.linhas = linhas
+        self.colunas = colunas
+        self.plies = plies
+        self.quantidade = quantidade
+
+    def fechar(self):
+        if self.mapa is not None:
+            self.mapa.close()
+            self.mapa = None
+        if self.arquivo is not None:
+            self.arquivo.close()
+            self.arquivo = None
+
+    def registro(self, indice):
+        return REGISTRO.unpack_from(
+            self.mapa, CABECALHO.size + indice * REGISTRO.size
+        )
+
+    def procurar(self, chave):
+        inicio, fim = 0, self.quantidade
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            registro = self.registro(meio)
+            if registro[0] == chave:
+                return registro
+            if registro[0] < chave:
+                inicio = meio + 1
+            else:
+                fim = meio
+        return None
+
+    def consultar(self, bitboard, peca):
+        # Devolve (coluna, pontuação) para quem joga com `peca`, ou None se a
+        # posição não está no livro
+        if self.mapa is None:
+            self.abrir()
+        if (bitboard.linhas, bitboard.colunas) != (self.linhas, self.colunas):
+            raise ValueError(
+                f'livro para {self.linhas}x{self.colunas}, '
+                f'tabuleiro {bitboard.linhas}x{bitboard.colunas}'
+            )
+        if bitboard.jogadas >= self.plies:
+            return None
+
+        self.consultas += 1
+        chave, espelhada = bitboard.chave_canonica(peca)
+        registro = self.procurar(chave)
+        if registro is None:
+            return None
+        self.acertos += 1
+
+        _, coluna, pontuacao = registro
+        if espelhada:
+            coluna = self.colunas - 1 - coluna
+        if abs(pontuacao) == PONTUACAO_MAXIMA:
+            pontuacao = math.copysign(math.inf, pontuacao)
+        return coluna, pontuacao
+
+
+def _pontuacao_registro(valor) -> int:
+    if math.isnan(valor):
+        return 0
+    return int(max(-PONTUACAO_MAXIMA, min(PONTUACAO_MAXIMA, valor)))
+
+
+class _GeradorBackend:
+    # Posições e buscas do Connect4 do backend, em que a IA é -1
+    def __init__(self, linhas, colunas, usar_alpha_beta, pesos):
+        # Importado aqui porque o motor importa este módulo para consultar o livro
+        from connect4.backend import Connect4  # noqa: PLC0415
+
+        self.jogo = Connect4(
+            linhas, colunas, usar_alpha_beta=usar_alpha_beta, pesos=pesos
+        )
+        self.bitboard = self.jogo.bitboard
+        self.peca_ia, self.peca_jogador = -1, 1
+
+    def jogar(self, coluna, peca):
+        self.jogo.realizar_jogada(coluna, peca)
+
+    def desfazer(self, coluna):
+        self.jogo.retornar_movimento(coluna)
+
+    def buscar(self, profundidade):
+        # (coluna, pontuação) de uma busca com a tabela vazia
+        jogo = self.jogo
+        jogo.tabela.limpar()
+        jogo.tabela.nova_busca()
+        jogo.ordenador.nova_busca()
+        valor, coluna = jogo.buscar_profundidade(profundidade)
+        return coluna, valor
+
+
+class _GeradorInterface:
+    # Posições e buscas da IA da interface, que joga só no tabuleiro da janela
+    def __init__(self, linhas, colunas, usar_alpha_beta, pesos):
+        # Importado aqui porque a interface importa este módulo
+        from connect4 import main  # noqa: PLC0415
+
+        if (linhas, colunas) != (main.LINHAS, main.COLUNAS):
+            raise ValueError(
+                f'a interface joga em {main.LINHAS}x{main.COLUNAS}, '
+                f'não em {linhas}x{colunas}'
+            )
+        self.ia = main.IA(usar_poda=usar_alpha_beta)
+        self.tabuleiro = main.Tabuleiro(pesos)
+        self.bitboard = self.tabuleiro.bitboard
+        self.peca_ia, self.peca_jogador = main.PECA_IA, main.PECA_JOGADOR
+
+    def jogar(self, coluna, peca):
+        self.tabuleiro.jogar(coluna, peca)
+
+    def desfazer(self, _):
+        self.tabuleiro.desfazer()
+
+    def buscar(self, profundidade):
+        self.ia.tabela.limpar()
+        self.ia.tabela.nova_busca()
+        self.ia.ordenador.nova_busca()
+        return self.ia.buscar_profundidade(self.tabuleiro, profundidade)
+
+
+def gerar_livro(  # noqa: PLR0913
+    caminho,
+    linhas=7,
+    colunas=8,
+    *,
+    motor=MOTOR_BACKEND,
+    plies=4,
+    profundidade=6,
+    usar_alpha_beta=True,
+    pesos=None,
+    progresso=None,
+):
+    # Busca a fundo, com o `motor` que vai ler o livro e a mesma avaliação
+    # (`pesos`), todas as posições com menos de `plies` peças. Quem joga é
+    # sempre colocado como a IA do motor, então a jogada e a pontuação são do
+    # ponto de vista de quem joga; posições espelhadas são guardadas uma vez só.
+    geradores = {MOTOR_BACKEND: _GeradorBackend, MOTOR_INTERFACE: _GeradorInterface}
+    gerador = geradores[motor](linhas, colunas, usar_alpha_beta, pesos)
+    registros = {}
+
+    def visitar(jogadas):
+        if len(jogadas) >= plies:
+            return
+        pecas = [gerador.peca_ia, gerador.peca_jogador]
+        if len(jogadas) % 2:
+            pecas.reverse()
+        for indice, coluna in enumerate(jogadas):
+            gerador.jogar(coluna, pecas[indice % 2])
+        try:
+            chave, espelhada = gerador.bitboard.chave_canonica(gerador.peca_ia)
+            if chave in registros:
+                return
+
+            # Cada raiz começa com a tabela vazia: o registro é o mesmo de uma
+            # busca nova, qualquer que seja a ordem de visita
+            coluna, valor = gerador.buscar(profundidade)
+            if espelhada:
+                coluna = colunas - 1 - coluna
+            registros[chave] = (coluna, _pontuacao_registro(valor))
+            if progresso is not None:
+                progresso(len(registros))
+
+            proximas = []
+            for proxima in gerador.bitboard.movimentos_validos():
+                gerador.jogar(proxima, gerador.peca_ia)
+                if not gerador.bitboard.movimento_ganhador(gerador.peca_ia):
+                    proximas.append(proxima)
+                gerador.desfazer(proxima)
+        finally:
+            for coluna in reversed(jogadas):
+                gerador.desfazer(coluna)
+
+        for proxima in proximas:
+            visitar(jogadas + [proxima])
+
+    visitar([])
+
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(
+            CABECALHO.pack(
+                MAGICO,
+                VERSAO,
+                MOTORES.index(motor),
+                linhas,
+                colunas,
+                plies,
+                len(registros),
+            )
+        )
+        for chave in sorted(registros):
+            arquivo.write(REGISTRO.pack(chave, *registros[chave]))
+    return len(registros)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera o livro de aberturas')
+    parser.add_argument('saida')
+    parser.add_argument('--linhas', type=int, default=7)
+    parser.add_argument('--colunas', type=int, default=8)
+    parser.add_argument('--plies', type=int, default=4)
+    parser.add_argument('--profundidade', type=int, default=6)
+    parser.add_argument(
+        '--motor',
+        choices=MOTORES,
+        default=MOTOR_BACKEND,
+        help='motor que vai ler o livro (a interface joga em 6x7)',
+    )
+    parser.add_argument('--pesos', help='arquivo de pesos de connect4 ajuste')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    quantidade = gerar_livro(
+        args.saida,
+        args.linhas,
+        args.colunas,
+        motor=args.motor,
+        plies=args.plies,
+        profundidade=args.profundidade,
+        pesos=args.pesos,
+        progresso=lambda n: print(f'\r{n} posições', end='', flush=True),
+    )
+    print(f'\n{quantidade} posições em {time.perf_counter() - inicio:.1f}s')
@@ -0,0 +1,171 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from connect4.avaliacao import BASE, gerar_janelas, tabelas_pontuacao
+
+# Este módulo importa numpy ao ser carregado; os motores não o importam, então
+# ele só pesa para quem avalia em lote
+
+
+class AvaliadorLote:
+    # Mesma pontuação de AvaliadorIncremental para uma pilha de tabuleiros
+    # (N, linhas, colunas) no formato dos jogos (linha 0 no topo), numa única
+    # chamada: as casas de todas as janelas são reunidas por índice e as
+    # contagens de peças viram códigos que indexam a tabela de pontuação.
+    def __init__(  # noqa: PLR0913
+        self,
+        linhas,
+        colunas,
+        pontuar_janela,
+        *,
+        pecas=(1, -1),
+        peca_centro=None,
+        bonus_centro=0,
+    ):
+        self.linhas = linhas
+        self.colunas = colunas
+        self.pecas = tuple(pecas)
+        # (janelas, 4) com o índice de cada casa no tabuleiro achatado
+        self.indices_janelas = np.array(
+            [
+                [linha * colunas + coluna for linha, coluna in casas]
+                for casas in gerar_janelas(linhas, colunas)
+            ],
+            dtype=np.intp,
+        )
+        tabela, vitorias, derrotas = tabelas_pontuacao(pontuar_janela)
+        self.tabela = np.array(tabela, dtype=np.float64)
+        self.vitorias = np.array(vitorias, dtype=bool)
+        self.derrotas = np.array(derrotas, dtype=bool)
+        self.coluna_centro = colunas // 2
+        self.peca_centro = peca_centro
+        self.bonus_centro = bonus_centro
+
+    @classmethod
+    def do_motor(cls, avaliador):
+        # Avaliador em lote equivalente a um AvaliadorIncremental já montado
+        pecas = tuple(sorted(avaliador.indices, key=avaliador.indices.get))
+        peca_centro = None
+        bonus_centro = 0
+        for indice, bonus in enumerate(avaliador.bonus):
+            if bonus:
+                peca_centro, bonus_centro = pecas[indice], bonus
+        lote = cls(
+            avaliador.linhas,
+            avaliador.colunas,
+            lambda n0, n1: 0,
+            pecas=pecas,
+            peca_centro=peca_centro,
+            bonus_centro=bonus_centro,
+        )
+        lote.tabela = np.array(avaliador.tabela, dtype=np.float64)
+        lote.vitorias = np.array(avaliador.vitorias, dtype=bool)
+        lote.derrotas = np.array(avaliador.derrotas, dtype=bool)
+        return lote
+
+    def codigos(self, tabuleiros) -> np.ndarray:
+        # (N, janelas) com n0 * BASE + n1 de cada janela
+        planos = np.asarray(tabuleiros).reshape(len(tabuleiros), -1)
+        janelas = planos[:, self.indices_janelas]
+        n0 = np.count_nonzero(janelas == self.pecas[0], axis=2)
+        n1 = np.count_nonzero(janelas == self.pecas[1], axis=2)
+        return n0 * BASE + n1
+
+    def avaliar(self, tabuleiros) -> np.ndarray:
+        # N pontuações; inf/-inf com uma janela vencedora de um lado só e nan
+        # com as dos dois, como AvaliadorIncremental.valor
+        tabuleiros = np.asarray(tabuleiros)
+        codigos = self.codigos(tabuleiros)
+        pontos = self.tabela[codigos].sum(axis=1)
+        if self.peca_centro is not None:
+            centro = tabuleiros[:, :, self.coluna_centro] == self.peca_centro
+            pontos += self.bonus_centro * np.count_nonzero(centro, axis=1)
+
+        vencedoras = self.vitorias[codigos].any(axis=1)
+        perdedoras = self.derrotas[codigos].any(axis=1)
+        pontos[vencedoras] = np.inf
+        pontos[perdedoras] = -np.inf
+        pontos[vencedoras & perdedoras] = np.nan
+        return pontos
+
+
+def empilhar_partida(jogadas, linhas=7, colunas=8, pecas=(1, -1)) -> np.ndarray:
+    # (jogadas + 1, linhas, colunas): o tabuleiro vazio e a posição depois de
+    # cada jogada, com pecas[0] começando
+    tabuleiros = np.zeros((len(jogadas) + 1, linhas, colunas), dtype=np.int8)
+    alturas = [0] * colunas
+    for indice, coluna in enumerate(jogadas):
+        tabuleiros[indice + 1] = tabuleiros[indice]
+        tabuleiros[indice + 1, linhas - 1 - alturas[coluna], coluna] = pecas[
+            indice % 2
+        ]
+        alturas[coluna] += 1
+    return tabuleiros
+
+
+def avaliar_partidas(registros, avaliador: AvaliadorLote) -> list[dict]:
+    # Curva de avaliação de cada partida de um torneio, do ponto de vista de
+    # quem começou; todas as posições de todas as partidas vão numa pilha só
+    pilhas = [
+        empilhar_partida(
+            registro['jogadas'], avaliador.linhas, avaliador.colunas, avaliador.pecas
+        )
+        for registro in registros
+    ]
+    if not pilhas:
+        return []
+    valores = avaliador.avaliar(np.concatenate(pilhas))
+    # As pontuações do motor são do ponto de vista de pecas[1]
+    valores = -valores
+
+    curvas = []
+    inicio = 0
+    for registro, pilha in zip(registros, pilhas):
+        curva = valores[inicio : inicio + len(pilha)]
+        inicio += len(pilha)
+        curvas.append({
+            'partida': registro['partida'],
+            'primeiro': registro['primeiro'],
+            'vencedor': registro['vencedor'],
+            'avaliacoes': curva.tolist(),
+        })
+    return curvas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Avalia em lote todas as posições das partidas de um torneio'
+    )
+    parser.add_argument('partidas', help='arquivo JSONL gerado pelo torneio')
+    parser.add_argument('--linhas', type=int, default=7)
+    parser.add_argument('--colunas', type=int, default=8)
+    parser.add_argument('--pesos', help='arquivo de pesos de connect4 ajuste')
+    args = parser.parse_args()
+
+    # Importado aqui para que a pontuação seja exatamente a do motor
+    from connect4.backend import Connect4  # noqa: PLC0415
+
+    with open(args.partidas, encoding='utf-8') as arquivo:
+        registros = [json.loads(linha) for linha in arquivo if linha.strip()]
+    avaliador = AvaliadorLote.do_motor(
+        Connect4(
+            args.linhas, args.colunas, limite_solucionador=None, pesos=args.pesos
+        ).avaliador
+    )
+
+    inicio = time.perf_counter()
+    curvas = avaliar_partidas(registros, avaliador)
+    tempo = time.perf_counter() - inicio
+    posicoes = sum(len(curva['avaliacoes']) for curva in curvas)
+    print(
+        json.dumps({
+            'partidas': len(curvas),
+            'posicoes': posicoes,
+            'tempo_s': tempo,
+            'posicoes_por_segundo': posicoes / tempo if tempo else 0.0,
+            'curvas': curvas,
+        })
+    )
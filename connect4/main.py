@@ -1,10 +1,33 @@
 import math
 import random
 import sys
-from threading import Timer
-
-import numpy as np
-import pygame
+from threading import Event, Thread, Timer
+
+from connect4.avaliacao import (
+    AvaliadorIncremental,
+    PontuacaoAjustada,
+    carregar_pesos,
+    conferir_pesos,
+)
+from connect4.bitboard import Bitboard
+from connect4.busca import (
+    INTERVALO_RELOGIO,
+    BuscaCancelada,
+    aprofundamento_iterativo,
+    conferir_relogio,
+)
+from connect4.instrumentacao import EstatisticasBusca
+from connect4.livro import MOTOR_INTERFACE, Livro
+from connect4.ordenacao import OrdenadorMovimentos
+from connect4.partidas import EMPATE, INTERROMPIDA, PRIMEIRO, SEGUNDO, gravar_partida
+from connect4.ponderacao import Ponderador
+from connect4.transposicao import (
+    EXATO,
+    TabelaTransposicao,
+    chave_posicao,
+    entrada_decide,
+    tipo_entrada,
+)
 
 # Constantes
 LINHAS = 6
@@ -16,72 +39,131 @@ TURNO_IA = 1
 PECA_JOGADOR = 1
 PECA_IA = 2
 
+VALOR_VITORIA = 10000000
+
 AZUL = (0, 0, 255)
 PRETO = (0, 0, 0)
 VERMELHO = (255, 0, 0)
 AMARELO = (255, 255, 0)
 
+FPS = 60
+ESPERA_IA_MS = 500
+
+# numpy e pygame só são importados quando um tabuleiro ou a janela do jogo são
+# criados, para que importar o motor não pague por eles
+np = None
+pygame = None
+
+
+def carregar_numpy():
+    global np  # noqa: PLW0603
+    if np is None:
+        import numpy  # noqa: PLC0415
+
+        np = numpy
+
+
+def carregar_pygame():
+    global pygame  # noqa: PLW0603
+    if pygame is None:
+        import pygame as modulo  # noqa: PLC0415
+
+        pygame = modulo
+
 
 class Tabuleiro:
-    def __init__(self):
+    def __init__(self, pesos=None):
+        carregar_numpy()
         self.tabuleiro = np.zeros((LINHAS, COLUNAS))
+        self.bitboard = Bitboard(LINHAS, COLUNAS, pecas=(PECA_JOGADOR, PECA_IA))
+        # Avaliação do ponto de vista da IA, mantida a cada peça solta; `pesos`
+        # (caminho ou conteúdo de um arquivo de connect4.ajuste) substitui a
+        # pontuação padrão
+        if isinstance(pesos, str):
+            pesos = carregar_pesos(pesos)
+        pontuar_janela = IA.pontuar_janela
+        bonus_centro = 6
+        if pesos is not None:
+            conferir_pesos(pesos, LINHAS, COLUNAS)
+            pontuar_janela = PontuacaoAjustada(pesos)
+            bonus_centro = pesos['centro']
+        self.avaliador = AvaliadorIncremental(
+            LINHAS,
+            COLUNAS,
+            pontuar_janela,
+            pecas=(PECA_JOGADOR, PECA_IA),
+            peca_centro=PECA_IA,
+            bonus_centro=bonus_centro,
+        )
+
+        # Colunas jogadas, para desfazer as jogadas em ordem durante a busca
+        self.pilha = []
+
+    def copiar(self):
+        copia = Tabuleiro.__new__(Tabuleiro)
+        copia.tabuleiro = np.copy(self.tabuleiro)
+        copia.bitboard = self.bitboard.copiar()
+        copia.avaliador = self.avaliador.copiar()
+        copia.pilha = list(self.pilha)
+        return copia
 
     def soltar_peca(self, linha, coluna, peca):
-        self.tabuleiro[linha][coluna] = peca
+        self.jogar(coluna, peca)
+
+    def jogar(self, coluna, peca):
+        linha = self.bitboard.jogar(coluna, peca)
+        self.tabuleiro[linha, coluna] = peca
+        self.avaliador.jogar(linha, coluna, peca)
+        self.pilha.append(coluna)
+        return linha
+
+    def desfazer(self):
+        coluna = self.pilha.pop()
+        linha = self.bitboard.desfazer(coluna)
+        peca = int(self.tabuleiro[linha, coluna])
+        self.tabuleiro[linha, coluna] = 0
+        self.avaliador.desfazer(linha, coluna, peca)
+        return coluna
 
     def validar_movimento(self, coluna):
-        return self.tabuleiro[0][coluna] == 0
+        return self.bitboard.validar_movimento(coluna)
 
     def obter_proxima_linha(self, coluna):
-        for linha in range(LINHAS - 1, -1, -1):
-            if self.tabuleiro[linha][coluna] == 0:
-                return linha
+        if self.bitboard.validar_movimento(coluna):
+            return LINHAS - 1 - self.bitboard.alturas[coluna]
 
     def movimento_ganhador(self, player) -> bool:
-        # Verificar horizontal
-        for linha in range(LINHAS):
-            for coluna in range(COLUNAS - 3):
-                if all(
-                    self.tabuleiro[linha][coluna + i] == player for i in range(4)
-                ):
-                    return True
-
-        # Verificar vertical
-        for linha in range(LINHAS - 3):
-            for coluna in range(COLUNAS):
-                if all(
-                    self.tabuleiro[linha + i][coluna] == player for i in range(4)
-                ):
-                    return True
-
-        # Verificar diagonal principal \
-        for linha in range(LINHAS - 3):
-            for coluna in range(COLUNAS - 3):
-                if all(
-                    self.tabuleiro[linha + i][coluna + i] == player for i in range(4)
-                ):
-                    return True
-
-        # Verificar diagonal secundaria /
-        for linha in range(3, LINHAS):
-            for coluna in range(COLUNAS - 3):
-                if all(
-                    self.tabuleiro[linha - i][coluna + i] == player for i in range(4)
-                ):
-                    return True
-
-        return False
+        return self.bitboard.movimento_ganhador(player)
 
     def get_movimentos_validos(self):
-        return [
-            coluna for coluna in range(COLUNAS) if self.validar_movimento(coluna)
-        ]
+        return self.bitboard.movimentos_validos()
 
 
 class IA:
-    def __init__(self, profundidade=4, usar_poda=False):
+    def __init__(  # noqa: PLR0913
+        self,
+        profundidade=4,
+        usar_poda=False,
+        *,
+        memoria_tt_mb=16,
+        tempo_ms=None,
+        ordenador=None,
+        livro=None,
+    ):
         self.profundidade = profundidade
         self.usar_poda = usar_poda
+        self.tabela = TabelaTransposicao(memoria_tt_mb)
+        self.tempo_ms = tempo_ms
+        self.prazo = None
+        self.cancelamento = None
+        self.nos = 0
+        # EstatisticasBusca da busca em andamento, se alguém pediu
+        self.estatisticas = None
+        self.ordenador = ordenador or OrdenadorMovimentos(COLUNAS)
+        # O arquivo do livro só é aberto na primeira consulta
+        self.livro = (
+            Livro(livro, MOTOR_INTERFACE) if isinstance(livro, str) else livro
+        )
 
     @staticmethod
     def avaliar_janela(janela, peca):
@@ -99,148 +181,452 @@ class IA:
 
         return pontuacao
 
-    def avaliar_tabuleiro(self, tabuleiro, peca):
-        pontuacao = 0
-        # Coluna central
-        coluna_central = [int(i) for i in list(tabuleiro[:, COLUNAS // 2])]
-        pontuacao += coluna_central.count(peca) * 6
-
-        # Linhas
-        for r in range(LINHAS):
-            linha_array = [int(i) for i in list(tabuleiro[r, :])]
-            for c in range(COLUNAS - 3):
-                janela = linha_array[c : c + 4]
-                pontuacao += self.avaliar_janela(janela, peca)
-
-        # Colunas
-        for c in range(COLUNAS):
-            coluna_array = [int(i) for i in list(tabuleiro[:, c])]
-            for r in range(LINHAS - 3):
-                janela = coluna_array[r : r + 4]
-                pontuacao += self.avaliar_janela(janela, peca)
-
-        # Diagonais positivas
-        for r in range(3, LINHAS):
-            for c in range(COLUNAS - 3):
-                janela = [tabuleiro[r - i][c + i] for i in range(4)]
-                pontuacao += self.avaliar_janela(janela, peca)
-
-        # Diagonais negativas
-        for r in range(3, LINHAS):
-            for c in range(3, COLUNAS):
-                janela = [tabuleiro[r - i][c - i] for i in range(4)]
-                pontuacao += self.avaliar_janela(janela, peca)
-
-        return pontuacao
-
-    def minimax(self, tabuleiro_obj, profundidade, alfa, beta, jogador_maximizador):
+    @staticmethod
+    def pontuar_janela(jogador, ia):
+        # Pontuação de uma janela para a IA a partir das contagens de peças
+        janela = [PECA_JOGADOR] * jogador + [PECA_IA] * ia + [0] * (4 - jogador - ia)
+        return IA.avaliar_janela(janela, PECA_IA)
+
+    def minimax(  # noqa: PLR0913, PLR0917
+        self,
+        tabuleiro_obj,
+        profundidade,
+        alfa,
+        beta,
+        jogador_maximizador,
+        raiz=False,
+    ):
+        # Busca no próprio tabuleiro: cada jogada é desfeita ao voltar do filho
+        self.nos += 1
+        if self.nos % INTERVALO_RELOGIO == 0:
+            conferir_relogio(self.cancelamento, self.prazo)
+        estatisticas = self.estatisticas
+        if estatisticas is not None:
+            estatisticas.visitar(tabuleiro_obj.bitboard.jogadas)
+
+        if tabuleiro_obj.movimento_ganhador(PECA_IA):
+            return None, VALOR_VITORIA
+        if tabuleiro_obj.movimento_ganhador(PECA_JOGADOR):
+            return None, -VALOR_VITORIA
         locais_validos = tabuleiro_obj.get_movimentos_validos()
-        terminal = (
-            tabuleiro_obj.movimento_ganhador(PECA_JOGADOR)
-            or tabuleiro_obj.movimento_ganhador(PECA_IA)
-            or not locais_validos
+        if not locais_validos:
+            return None, 0
+        if profundidade == 0:
+            if estatisticas is not None:
+                estatisticas.avaliar()
+            return None, tabuleiro_obj.avaliador.valor()
+
+        chave = chave_posicao(tabuleiro_obj.bitboard.hash, jogador_maximizador)
+        entrada = self.tabela.consultar(chave)
+        if not raiz and entrada_decide(entrada, profundidade, alfa, beta):
+            return entrada[4], entrada[2]
+
+        movimentos = self.ordenador.ordenar(
+            locais_validos,
+            tabuleiro_obj.bitboard.jogadas,
+            1 if jogador_maximizador else 0,
+            entrada[4] if entrada is not None else None,
         )
-
-        if profundidade == 0 or terminal:
-            if terminal:
-                if tabuleiro_obj.movimento_ganhador(PECA_IA):
-                    return None, 10000000
-                elif tabuleiro_obj.movimento_ganhador(PECA_JOGADOR):
-                    return None, -10000000
-                else:
-                    return None, 0
-            else:
-                return None, self.avaliar_tabuleiro(tabuleiro_obj.tabuleiro, PECA_IA)
-
-        if jogador_maximizador:
-            valor = -math.inf
-            coluna = random.choice(locais_validos)
-            for col in locais_validos:
-                linha = tabuleiro_obj.obter_proxima_linha(col)
-                copia_tabuleiro = Tabuleiro()
-                copia_tabuleiro.tabuleiro = np.copy(tabuleiro_obj.tabuleiro)
-                copia_tabuleiro.soltar_peca(linha, col, PECA_IA)
+        coluna, valor, empates = self.buscar_filhos(
+            tabuleiro_obj,
+            movimentos,
+            profundidade,
+            alfa,
+            beta,
+            jogador_maximizador,
+            raiz,
+        )
+        # Na raiz as jogadas empatadas com a melhor são sorteadas
+        if raiz and len(empates) > 1:
+            coluna = random.choice(empates)
+        tipo = tipo_entrada(valor, alfa, beta) if self.usar_poda else EXATO
+        self.tabela.gravar(chave, profundidade, valor, tipo, coluna)
+        return coluna, valor
+
+    def buscar_filhos(  # noqa: PLR0913, PLR0917
+        self,
+        tabuleiro_obj,
+        movimentos,
+        profundidade,
+        alfa,
+        beta,
+        jogador_maximizador,
+        raiz,
+    ):
+        # Melhor coluna e valor entre os filhos, na ordem dada, e as colunas
+        # empatadas com ela; com poda o limite de quem escolhe sobe a cada filho
+        # até o corte
+        peca = PECA_IA if jogador_maximizador else PECA_JOGADOR
+        sinal = 1 if jogador_maximizador else -1
+        ply = tabuleiro_obj.bitboard.jogadas
+        indice_peca = 1 if jogador_maximizador else 0
+        valor = -sinal * math.inf
+        coluna = movimentos[0]
+        empates = []
+
+        for posicao, col in enumerate(movimentos):
+            tabuleiro_obj.jogar(col, peca)
+            try:
+                # Na raiz a janela fica 1 além do melhor valor, para que um
+                # empate seja um valor exato e não só um limite
                 novo_valor = self.minimax(
-                    copia_tabuleiro, profundidade - 1, alfa, beta, False
+                    tabuleiro_obj,
+                    profundidade - 1,
+                    alfa - 1 if raiz and jogador_maximizador else alfa,
+                    beta + 1 if raiz and not jogador_maximizador else beta,
+                    not jogador_maximizador,
                 )[1]
-                if novo_valor > valor:
-                    valor = novo_valor
-                    coluna = col
-                if self.usar_poda:
+            finally:
+                tabuleiro_obj.desfazer()
+            if sinal * novo_valor > sinal * valor:
+                valor = novo_valor
+                coluna = col
+                empates = [col]
+            elif novo_valor == valor:
+                empates.append(col)
+            if self.usar_poda:
+                if jogador_maximizador:
                     alfa = max(alfa, valor)
-                    if alfa >= beta:
-                        break
-            return coluna, valor
-        else:
-            valor = math.inf
-            coluna = random.choice(locais_validos)
-            for col in locais_validos:
-                linha = tabuleiro_obj.obter_proxima_linha(col)
-                copia_tabuleiro = Tabuleiro()
-                copia_tabuleiro.tabuleiro = np.copy(tabuleiro_obj.tabuleiro)
-                copia_tabuleiro.soltar_peca(linha, col, PECA_JOGADOR)
-                novo_valor = self.minimax(
-                    copia_tabuleiro, profundidade - 1, alfa, beta, True
-                )[1]
-                if novo_valor < valor:
-                    valor = novo_valor
-                    coluna = col
-                if self.usar_poda:
+                else:
                     beta = min(beta, valor)
-                    if alfa >= beta:
-                        break
-            return coluna, valor
+                if alfa >= beta:
+                    self.ordenador.registrar_corte(
+                        col, ply, indice_peca, profundidade, posicao
+                    )
+                    if self.estatisticas is not None:
+                        self.estatisticas.registrar_corte(posicao)
+                    break
+        return coluna, valor, empates
+
+    def buscar_profundidade(self, tabuleiro_obj, profundidade, prazo=None):
+        estatisticas = self.estatisticas
+        if estatisticas is not None:
+            estatisticas.iniciar_iteracao()
+
+        self.prazo = prazo
+        try:
+            resultado = self.minimax(
+                tabuleiro_obj, profundidade, -math.inf, math.inf, True, raiz=True
+            )
+        finally:
+            self.prazo = None
+
+        if estatisticas is not None:
+            coluna, valor = resultado
+            estatisticas.concluir_iteracao(
+                profundidade,
+                valor,
+                coluna,
+                self.variacao_principal(tabuleiro_obj, coluna, profundidade),
+            )
+        return resultado
+
+    def variacao_principal(self, tabuleiro_obj, coluna, profundidade):
+        # Segue os melhores movimentos guardados na tabela a partir da jogada
+        # escolhida na raiz
+        variacao = []
+        peca = PECA_IA
+        try:
+            while coluna is not None and len(variacao) < profundidade:
+                if not tabuleiro_obj.validar_movimento(coluna):
+                    break
+                variacao.append(coluna)
+                tabuleiro_obj.jogar(coluna, peca)
+                if tabuleiro_obj.movimento_ganhador(peca):
+                    break
+                peca = PECA_JOGADOR if peca == PECA_IA else PECA_IA
+                entrada = self.tabela.consultar(
+                    chave_posicao(tabuleiro_obj.bitboard.hash, peca == PECA_IA)
+                )
+                coluna = entrada[4] if entrada is not None else None
+        finally:
+            for _ in variacao:
+                tabuleiro_obj.desfazer()
+        return variacao
+
+    def buscar(
+        self,
+        tabuleiro_obj,
+        tempo_ms=None,
+        cancelamento=None,
+        estatisticas: EstatisticasBusca | None = None,
+    ):
+        # `cancelamento` é um threading.Event; se for acionado a busca levanta
+        # BuscaCancelada em vez de devolver uma jogada. `estatisticas` é uma
+        # EstatisticasBusca a ser preenchida durante a busca.
+        if self.livro is not None:
+            jogada = self.livro.consultar(tabuleiro_obj.bitboard, PECA_IA)
+            if jogada is not None:
+                return jogada
+
+        self.tabela.nova_busca()
+        self.ordenador.nova_busca()
+        self.nos = 0
+        self.cancelamento = cancelamento
+        self.estatisticas = estatisticas
+        if estatisticas is not None:
+            estatisticas.iniciar(tabuleiro_obj.bitboard.jogadas)
+        tempo_ms = tempo_ms or self.tempo_ms
+        try:
+            if tempo_ms is None:
+                return self.buscar_profundidade(tabuleiro_obj, self.profundidade)
+
+            livres = LINHAS * COLUNAS - tabuleiro_obj.bitboard.jogadas
+            return aprofundamento_iterativo(
+                lambda profundidade, prazo: self.buscar_profundidade(
+                    tabuleiro_obj, profundidade, prazo
+                ),
+                tempo_ms,
+                livres,
+                resolvido=lambda resultado: abs(resultado[1]) >= VALOR_VITORIA,
+            )
+        finally:
+            self.cancelamento = None
+            self.estatisticas = None
+            if estatisticas is not None:
+                estatisticas.finalizar()
+
+    def iniciar_ponderacao(self, tabuleiro_obj):
+        # Pondera as jogadas do jogador na ordem em que a busca as tentaria
+        entrada = self.tabela.consultar(
+            chave_posicao(tabuleiro_obj.bitboard.hash, False)
+        )
+        colunas = self.ordenador.ordenar(
+            tabuleiro_obj.get_movimentos_validos(),
+            tabuleiro_obj.bitboard.jogadas,
+            0,
+            entrada[4] if entrada is not None else None,
+        )
+        copia = tabuleiro_obj.copiar()
+
+        def responder(coluna, cancelamento):
+            copia.jogar(coluna, PECA_JOGADOR)
+            try:
+                if copia.movimento_ganhador(PECA_JOGADOR):
+                    return None
+                return self.buscar(copia, cancelamento=cancelamento)
+            finally:
+                copia.desfazer()
+
+        return Ponderador(responder, colunas)
+
+
+class BuscaAssincrona:
+    # Roda a busca da IA numa thread própria, sobre uma cópia do tabuleiro, para
+    # que o loop do pygame continue desenhando e tratando eventos. O loop
+    # consulta `pronta()` a cada quadro e nunca espera pela busca.
+    def __init__(self, ia, tabuleiro_obj):
+        self.ia = ia
+        self.tabuleiro = tabuleiro_obj.copiar()
+        self.cancelamento = Event()
+        self.concluida = Event()
+        self.resultado = None
+        self.erro = None
+        self.thread = Thread(target=self.executar, daemon=True)
+        self.thread.start()
+
+    def executar(self):
+        try:
+            self.resultado = self.ia.buscar(
+                self.tabuleiro, cancelamento=self.cancelamento
+            )
+        except BuscaCancelada:
+            pass
+        except Exception as erro:
+            self.erro = erro
+        finally:
+            self.concluida.set()
+
+    def pronta(self) -> bool:
+        return self.concluida.is_set()
+
+    def obter_resultado(self):
+        if self.erro is not None:
+            raise self.erro
+        return self.resultado
+
+    def cancelar(self):
+        self.cancelamento.set()
+
+
+class Renderizador:
+    # Desenha só o que mudou desde o último quadro. As casas (fundo azul com a
+    # peça ou o buraco) e a peça que segue o mouse são pré-renderizadas uma
+    # vez; cada mudança guarda o seu retângulo e `desenhar` atualiza na tela
+    # só esses retângulos, uma vez por quadro.
+    def __init__(self, tela, tamanho_quadrado):
+        self.tela = tela
+        self.tamanho = tamanho_quadrado
+        self.raio = int(tamanho_quadrado / 2 - 5)
+        self.fonte = pygame.font.SysFont('monospace', 75)
+        self.faixa = pygame.Rect(0, 0, tela.get_width(), tamanho_quadrado)
+
+        self.sprites = {
+            0: self.criar_casa(PRETO),
+            PECA_JOGADOR: self.criar_casa(VERMELHO),
+            PECA_IA: self.criar_casa(AMARELO),
+        }
+        self.sprite_cursor = pygame.Surface((2 * self.raio, 2 * self.raio))
+        self.sprite_cursor.fill(PRETO)
+        pygame.draw.circle(
+            self.sprite_cursor, VERMELHO, (self.raio, self.raio), self.raio
+        )
+
+        # O que está na tela agora: a peça de cada casa (None se a casa ainda
+        # não foi desenhada) e o retângulo da peça do mouse
+        self.casas = [[None] * COLUNAS for _ in range(LINHAS)]
+        self.cursor = None
+        self.mensagem = None
+        self.sujos = []
+        self.invalidar()
+
+    def criar_casa(self, cor):
+        casa = pygame.Surface((self.tamanho, self.tamanho))
+        casa.fill(AZUL)
+        centro = self.tamanho // 2
+        pygame.draw.circle(casa, cor, (centro, centro), self.raio)
+        return casa
+
+    def invalidar(self):
+        # Redesenha tudo no próximo quadro, por exemplo quando a janela volta
+        # a aparecer
+        self.tela.fill(PRETO)
+        self.casas = [[None] * COLUNAS for _ in range(LINHAS)]
+        self.cursor = None
+        if self.mensagem is not None:
+            self.tela.blit(self.mensagem, (40, 10))
+        self.sujos = [self.tela.get_rect()]
+
+    def atualizar_tabuleiro(self, tabuleiro):
+        for r in range(LINHAS):
+            for c in range(COLUNAS):
+                peca = int(tabuleiro[r][c])
+                if self.casas[r][c] != peca:
+                    self.casas[r][c] = peca
+                    self.sujos.append(
+                        self.tela.blit(
+                            self.sprites[peca],
+                            (c * self.tamanho, (r + 1) * self.tamanho),
+                        )
+                    )
+
+    def atualizar_cursor(self, xpos):
+        # `xpos` None esconde a peça do mouse
+        if self.cursor is not None:
+            if xpos is not None and self.cursor.centerx == xpos:
+                return
+            self.tela.fill(PRETO, self.cursor)
+            self.sujos.append(self.cursor)
+            self.cursor = None
+        if xpos is not None and self.mensagem is None:
+            self.cursor = self.tela.blit(
+                self.sprite_cursor, (xpos - self.raio, self.tamanho // 2 - self.raio)
+            )
+            self.sujos.append(self.cursor)
+
+    def escrever(self, texto, cor):
+        self.cursor = None
+        self.mensagem = self.fonte.render(texto, 1, cor)
+        self.tela.fill(PRETO, self.faixa)
+        self.tela.blit(self.mensagem, (40, 10))
+        self.sujos.append(self.faixa)
+
+    def desenhar(self):
+        if self.sujos:
+            pygame.display.update(self.sujos)
+            self.sujos = []
 
 
 class Jogo:
-    def __init__(self):
-        self.tabuleiro = Tabuleiro()
-        self.ia = IA(profundidade=4, usar_poda=False)
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        tempo_ms=None,
+        ponderar=False,
+        livro=None,
+        fps=FPS,
+        arquivo_partidas=None,
+        pesos=None,
+    ):
+        self.tabuleiro = Tabuleiro(pesos)
+        self.ia = IA(profundidade=4, usar_poda=False, tempo_ms=tempo_ms, livro=livro)
         self.jogo_acabou = False
         self.em_andamento = True
         self.turno = random.randint(TURNO_JOGADOR, TURNO_IA)
-
+        self.busca = None
+        self.inicio_busca = None
+        self.resultado_ia = None
+        # Busca as respostas da IA enquanto o jogador move o mouse
+        self.ponderar = ponderar
+        self.ponderador = None
+        # Com `arquivo_partidas` a partida é acrescentada a esse arquivo ao
+        # terminar, ou ao fechar a janela no meio dela
+        self.arquivo_partidas = arquivo_partidas
+        self.primeiro = self.turno
+        self.tempos_ms = []
+        self.tempo_busca_ms = 0
+
+        carregar_pygame()
         pygame.init()
+        self.relogio = pygame.time.Clock()
+        # Quadros por segundo fixos: sem eventos nem mudanças o quadro não
+        # desenha nada
+        self.fps = fps
         self.TAMANHO_QUADRADO = 100
         self.largura = COLUNAS * self.TAMANHO_QUADRADO
         self.altura = (LINHAS + 1) * self.TAMANHO_QUADRADO
-        self.raio_circulo = int(self.TAMANHO_QUADRADO / 2 - 5)
         self.tela = pygame.display.set_mode((self.largura, self.altura))
-        self.fonte = pygame.font.SysFont('monospace', 75)
+        self.renderizador = Renderizador(self.tela, self.TAMANHO_QUADRADO)
+        # Posição x do mouse, desenhada uma vez por quadro
+        self.xpos = None
+        self.inicio_turno = pygame.time.get_ticks()
         self.desenhar_tabuleiro()
 
     def desenhar_tabuleiro(self):
-        for c in range(COLUNAS):
-            for r in range(LINHAS):
-                pygame.draw.rect(
-                    self.tela,
-                    AZUL,
-                    (
-                        c * self.TAMANHO_QUADRADO,
-                        r * self.TAMANHO_QUADRADO + self.TAMANHO_QUADRADO,
-                        self.TAMANHO_QUADRADO,
-                        self.TAMANHO_QUADRADO,
-                    ),
-                )
-                cor = PRETO
-                if self.tabuleiro.tabuleiro[r][c] == PECA_JOGADOR:
-                    cor = VERMELHO
-                elif self.tabuleiro.tabuleiro[r][c] == PECA_IA:
-                    cor = AMARELO
-                pygame.draw.circle(
-                    self.tela,
-                    cor,
-                    (
-                        int(c * self.TAMANHO_QUADRADO + self.TAMANHO_QUADRADO / 2),
-                        int(
-                            r * self.TAMANHO_QUADRADO
-                            + self.TAMANHO_QUADRADO
-                            + self.TAMANHO_QUADRADO / 2
-                        ),
-                    ),
-                    self.raio_circulo,
-                )
-        pygame.display.update()
+        self.renderizador.atualizar_tabuleiro(self.tabuleiro.tabuleiro)
+
+    def registrar_jogada(self, coluna, peca, tempo_ms):
+        self.tabuleiro.jogar(coluna, peca)
+        self.tempos_ms.append(tempo_ms)
+        self.inicio_turno = pygame.time.get_ticks()
+        if self.tabuleiro.movimento_ganhador(peca):
+            texto, cor = (
+                ('JOGADOR VENCEU', VERMELHO)
+                if peca == PECA_JOGADOR
+                else ('IA VENCEU!', AMARELO)
+            )
+            vez = TURNO_JOGADOR if peca == PECA_JOGADOR else TURNO_IA
+            resultado = PRIMEIRO if vez == self.primeiro else SEGUNDO
+        elif not self.tabuleiro.get_movimentos_validos():
+            texto, cor = 'EMPATE', AZUL
+            resultado = EMPATE
+        else:
+            return
+        print(texto)
+        self.renderizador.escrever(texto, cor)
+        self.em_andamento = False
+        self.gravar_partida(resultado)
+        Timer(3.0, self.terminar_jogo).start()
+
+    def gravar_partida(self, resultado):
+        if self.arquivo_partidas is None or not self.tabuleiro.pilha:
+            return
+        gravar_partida(
+            self.arquivo_partidas,
+            LINHAS,
+            COLUNAS,
+            self.tabuleiro.pilha,
+            self.tempos_ms,
+            resultado,
+            {
+                'profundidade': self.ia.profundidade,
+                'tempo_ms': self.ia.tempo_ms,
+                'alpha_beta': self.ia.usar_poda,
+                'ponderar': self.ponderar,
+                'livro': self.ia.livro is not None,
+                'ia_comeca': self.primeiro == TURNO_IA,
+            },
+        )
 
     def terminar_jogo(self):
         self.jogo_acabou = True
@@ -250,57 +636,98 @@ class Jogo:
         while not self.jogo_acabou:
             for evento in pygame.event.get():
                 if evento.type == pygame.QUIT:
-                    sys.exit()
-                if evento.type == pygame.MOUSEMOTION and self.em_andamento:
-                    pygame.draw.rect(
-                        self.tela, PRETO, (0, 0, self.largura, self.TAMANHO_QUADRADO)
-                    )
-                    xpos = pygame.mouse.get_pos()[0]
-                    if self.turno == TURNO_JOGADOR:
-                        pygame.draw.circle(
-                            self.tela,
-                            VERMELHO,
-                            (xpos, int(self.TAMANHO_QUADRADO / 2)),
-                            self.raio_circulo,
-                        )
-
-                if evento.type == pygame.MOUSEBUTTONDOWN and self.em_andamento:
-                    pygame.draw.rect(
-                        self.tela, PRETO, (0, 0, self.largura, self.TAMANHO_QUADRADO)
-                    )
-                    if self.turno == TURNO_JOGADOR:
-                        xpos = evento.pos[0]
-                        coluna = int(math.floor(xpos / self.TAMANHO_QUADRADO))
-                        if self.tabuleiro.validar_movimento(coluna):
-                            linha = self.tabuleiro.obter_proxima_linha(coluna)
-                            self.tabuleiro.soltar_peca(linha, coluna, PECA_JOGADOR)
-                            if self.tabuleiro.movimento_ganhador(PECA_JOGADOR):
-                                print('JOGADOR VENCEU')
-                                mensagem = self.fonte.render(
-                                    'JOGADOR VENCEU', 1, VERMELHO
-                                )
-                                self.tela.blit(mensagem, (40, 10))
-                                self.em_andamento = False
-                                Timer(3.0, self.terminar_jogo).start()
-                        self.desenhar_tabuleiro()
-                        self.turno = (self.turno + 1) % 2
+                    self.fechar()
+                if evento.type == pygame.MOUSEMOTION:
+                    self.xpos = evento.pos[0]
+                if evento.type in {pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED}:
+                    self.renderizador.invalidar()
+                    self.desenhar_tabuleiro()
+
+                if (
+                    evento.type == pygame.MOUSEBUTTONDOWN
+                    and self.em_andamento
+                    and self.turno == TURNO_JOGADOR
+                ):
+                    self.turno_jogador(evento.pos[0])
 
             if self.turno == TURNO_IA and not self.jogo_acabou and self.em_andamento:
-                coluna, _ = self.ia.minimax(
-                    self.tabuleiro, self.ia.profundidade, -math.inf, math.inf, True
-                )
-                if self.tabuleiro.validar_movimento(coluna):
-                    pygame.time.wait(500)
-                    linha = self.tabuleiro.obter_proxima_linha(coluna)
-                    self.tabuleiro.soltar_peca(linha, coluna, PECA_IA)
-                    if self.tabuleiro.movimento_ganhador(PECA_IA):
-                        print('IA VENCEU!')
-                        mensagem = self.fonte.render('IA VENCEU!', 1, AMARELO)
-                        self.tela.blit(mensagem, (40, 10))
-                        self.em_andamento = False
-                        Timer(3.0, self.terminar_jogo).start()
-                self.desenhar_tabuleiro()
-                self.turno = (self.turno + 1) % 2
+                self.turno_ia()
+            elif (
+                self.ponderar
+                and self.ponderador is None
+                and self.turno == TURNO_JOGADOR
+                and self.em_andamento
+            ):
+                self.ponderador = self.ia.iniciar_ponderacao(self.tabuleiro)
+
+            # A peça do mouse só aparece na vez do jogador
+            self.renderizador.atualizar_cursor(
+                self.xpos
+                if self.turno == TURNO_JOGADOR and self.em_andamento
+                else None
+            )
+            self.renderizador.desenhar()
+            # Também cede a thread da busca entre um quadro e outro
+            self.relogio.tick(self.fps)
+
+    def fechar(self):
+        # As threads são daemon, então basta pedir que parem
+        if self.busca is not None:
+            self.busca.cancelar()
+        if self.ponderador is not None:
+            self.ponderador.cancelar()
+        if self.em_andamento:
+            self.gravar_partida(INTERROMPIDA)
+        sys.exit()
+
+    def turno_jogador(self, xpos):
+        coluna = int(math.floor(xpos / self.TAMANHO_QUADRADO))
+        if self.ponderador is not None:
+            self.ponderador.cancelar(coluna)
+        if self.tabuleiro.validar_movimento(coluna):
+            self.registrar_jogada(
+                coluna,
+                PECA_JOGADOR,
+                pygame.time.get_ticks() - self.inicio_turno,
+            )
+        self.desenhar_tabuleiro()
+        self.turno = (self.turno + 1) % 2
+
+    def turno_ia(self):
+        # A ponderação foi cancelada na jogada do jogador, mas a thread dela
+        # ainda pode estar usando a IA: espera, quadro a quadro, que ela termine
+        # e aproveita a resposta calculada para essa jogada, se houver
+        if self.ponderador is not None:
+            if not self.ponderador.pronto():
+                return
+            self.resultado_ia = self.ponderador.resposta()
+            self.ponderador = None
+
+        if self.inicio_busca is None:
+            self.inicio_busca = pygame.time.get_ticks()
+            self.tempo_busca_ms = 0
+            # Com a resposta ponderada não é preciso buscar
+            if self.resultado_ia is None:
+                self.busca = BuscaAssincrona(self.ia, self.tabuleiro)
+
+        if self.busca is not None:
+            if not self.busca.pronta():
+                return
+            self.resultado_ia = self.busca.obter_resultado()
+            self.busca = None
+            self.tempo_busca_ms = pygame.time.get_ticks() - self.inicio_busca
+
+        # A pausa mínima antes da jogada da IA não bloqueia mais a janela
+        if pygame.time.get_ticks() - self.inicio_busca < ESPERA_IA_MS:
+            return
+
+        coluna, _ = self.resultado_ia
+        self.resultado_ia = None
+        self.inicio_busca = None
+        if self.tabuleiro.validar_movimento(coluna):
+            self.registrar_jogada(coluna, PECA_IA, self.tempo_busca_ms)
+        self.desenhar_tabuleiro()
+        self.turno = (self.turno + 1) % 2
 
 
 if __name__ == '__main__':
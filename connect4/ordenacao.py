@@ -0,0 +1,99 @@
+ASSASSINOS_POR_PLY = 2
+
+
+class OrdenadorMovimentos:
+    # Ordem de busca: movimento da tabela de transposição, movimentos assassinos
+    # do mesmo ply, pontuação da heurística de histórico e, por fim, a ordem
+    # estática do centro para as bordas.
+    def __init__(
+        self,
+        colunas: int,
+        usar_assassinos: bool = True,
+        usar_historico: bool = True,
+    ):
+        self.colunas = colunas
+        self.usar_assassinos = usar_assassinos
+        self.usar_historico = usar_historico
+
+        centro = (colunas - 1) / 2
+        self.ordem_estatica = sorted(
+            range(colunas), key=lambda coluna: (abs(coluna - centro), coluna)
+        )
+        self.peso_estatico = [0] * colunas
+        for posicao, coluna in enumerate(self.ordem_estatica):
+            self.peso_estatico[coluna] = colunas - posicao
+
+        # O ply é o número de peças no tabuleiro, então os assassinos continuam
+        # valendo entre as iterações do aprofundamento iterativo.
+        self.assassinos = {}
+        self.historico = [[0] * colunas, [0] * colunas]
+
+        self.cortes = 0
+        self.cortes_primeiro = 0
+
+    def nova_busca(self):
+        self.assassinos.clear()
+        for tabela in self.historico:
+            for coluna in range(self.colunas):
+                tabela[coluna] //= 2
+        self.cortes = 0
+        self.cortes_primeiro = 0
+
+    def ordenar(self, movimentos, ply, indice_peca, movimento_tabela=None):
+        assassinos = ()
+        if self.usar_assassinos:
+            assassinos = self.assassinos.get(ply, ())
+        historico = self.historico[indice_peca] if self.usar_historico else None
+        peso_estatico = self.peso_estatico
+
+        notas = []
+        for coluna in movimentos:
+            if coluna == movimento_tabela:
+                prioridade = ASSASSINOS_POR_PLY + 1
+            elif coluna in assassinos:
+                prioridade = ASSASSINOS_POR_PLY - assassinos.index(coluna)
+            else:
+                prioridade = 0
+            pontos = historico[coluna] if historico is not None else 0
+            notas.append((prioridade, pontos, peso_estatico[coluna], coluna))
+        notas.sort(reverse=True)
+        return [nota[3] for nota in notas]
+
+    def registrar_corte(self, coluna, ply, indice_peca, profundidade, posicao):
+        self.cortes += 1
+        if posicao == 0:
+            self.cortes_primeiro += 1
+
+        if self.usar_assassinos:
+            assassinos = self.assassinos.setdefault(ply, [])
+            if coluna in assassinos:
+                assassinos.remove(coluna)
+            assassinos.insert(0, coluna)
+            del assassinos[ASSASSINOS_POR_PLY:]
+
+        if self.usar_historico:
+            self.historico[indice_peca][coluna] += profundidade * profundidade
+
+    @property
+    def taxa_corte_primeiro(self) -> float:
+        return self.cortes_primeiro / self.cortes if self.cortes else 0.0
+
+    def estatisticas(self) -> dict:
+        return {
+            'cortes': self.cortes,
+            'cortes_primeiro': self.cortes_primeiro,
+            'taxa_corte_primeiro': self.taxa_corte_primeiro,
+        }
+
+
+class OrdenadorFixo(OrdenadorMovimentos):
+    # Mantém a ordem da esquerda para a direita de get_movimentos_validos.
+    # Serve de referência para medir o ganho da ordenação.
+    @staticmethod
+    def ordenar(movimentos, ply, indice_peca, movimento_tabela=None):
+        return movimentos
+
+    def registrar_corte(self, coluna, ply, indice_peca, profundidade, posicao):
+        self.cortes += 1
+        if posicao == 0:
+            self.cortes_primeiro += 1
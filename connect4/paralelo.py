@@ -0,0 +1,270 @@
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from connect4.backend import Connect4
+from connect4.busca import BuscaCancelada, TempoEsgotado
+
+# Posições fixas (colunas a partir de 0, começando pelo jogador) em que a IA
+# é a próxima a jogar, usadas no relatório de escalabilidade
+POSICOES_ESCALABILIDADE = (
+    '3',
+    '434',
+    '33425',
+    '4435260',
+    '343434021',
+)
+# De quanto em quanto tempo a espera pelos processos confere o cancelamento
+INTERVALO_CANCELAMENTO_S = 0.01
+
+# Estado de cada processo trabalhador: o alpha e o cancelamento compartilhados
+# entre todos e um jogo por busca paralela, cuja tabela de transposição
+# continua aquecida entre as tarefas que o processo recebe, com a última busca
+# da raiz que ele viu
+_alpha = None
+_cancelamento = None
+_jogos = {}
+_sessoes = itertools.count()
+
+
+def _iniciar_trabalhador(alpha, cancelamento):
+    global _alpha, _cancelamento  # noqa: PLW0603
+    _alpha = alpha
+    _cancelamento = cancelamento
+
+
+def _preparar_jogo(sessao, busca, config, tabuleiro):
+    # A sessão identifica a BuscaParalela, para que processos criados por fork
+    # não herdem a tabela aquecida de outra busca
+    if sessao not in _jogos:
+        _jogos[sessao] = (Connect4(**config), None)
+    guardado, ultima = _jogos[sessao]
+    # A tabela e o ordenador envelhecem uma vez por busca da raiz, como os do
+    # motor que distribui as tarefas
+    if busca != ultima:
+        guardado.tabela.nova_busca()
+        guardado.ordenador.nova_busca()
+        _jogos[sessao] = (guardado, busca)
+    # A cópia compartilha a tabela e o ordenador do jogo guardado
+    jogo = guardado.copiar()
+    jogo.carregar_tabuleiro(tabuleiro)
+    return jogo
+
+
+def _buscar_filho(contexto, coluna, janela_cheia=False):
+    # Busca um filho da raiz com a janela (alpha compartilhado, inf); com
+    # `janela_cheia`, com (-inf, inf). Um filho que não supera o alpha devolve
+    # só um limite superior, marcado como não exato. `contexto` é (sessão,
+    # busca, configuração, tabuleiro, profundidade, prazo).
+    sessao, busca, config, tabuleiro, profundidade, prazo = contexto
+    jogo = _preparar_jogo(sessao, busca, config, tabuleiro)
+    jogo.realizar_jogada(coluna, -1)
+    if jogo.movimento_ganhador(-1):
+        return coluna, math.inf, True, 1
+
+    jogo.prazo = prazo
+    jogo.cancelamento = _cancelamento
+    alpha = -math.inf if janela_cheia else _alpha.value
+    try:
+        if jogo.usar_alpha_beta:
+            valor, _ = jogo.minimax(profundidade - 1, alpha, math.inf, False)
+        else:
+            valor, _ = jogo.minimax(profundidade - 1, None, None, False)
+    except (TempoEsgotado, BuscaCancelada):
+        return coluna, None, False, jogo.nos
+
+    exato = not jogo.usar_alpha_beta or valor > alpha or alpha == -math.inf
+    if jogo.usar_alpha_beta and not janela_cheia:
+        with _alpha.get_lock():
+            _alpha.value = max(_alpha.value, valor)
+    return coluna, valor, exato, jogo.nos
+
+
+class BuscaParalela:
+    # Divide os movimentos da raiz entre processos. Com um trabalhador a busca
+    # roda no próprio processo, na mesma ordem, e o resultado é determinístico;
+    # com mais, só valores exatos disputam a raiz e o empate entre eles é
+    # desfeito pela ordem da raiz, então a jogada escolhida não depende de qual
+    # processo terminou antes.
+    def __init__(self, trabalhadores: int = 1, **config):
+        self.trabalhadores = trabalhadores
+        self.config = config
+        self.sessao = next(_sessoes)
+        self.alpha = multiprocessing.Value('d', -math.inf)
+        # Repassa aos processos o cancelamento pedido a quem espera por eles
+        self.cancelamento = multiprocessing.Event()
+        self.busca = 0
+        self.executor = None
+        self.nos = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+        _jogos.pop(self.sessao, None)
+
+    def nova_busca(self):
+        # Chamada a cada busca da raiz, que pode ter várias iterações, para os
+        # processos envelhecerem as suas tabelas
+        self.busca += 1
+
+    def resolver(
+        self, contexto, colunas, janela_cheia=False, cancelamento=None
+    ) -> dict:
+        # {coluna: (valor, exato)} dos filhos, somando os nós em self.nos.
+        # `cancelamento` é o threading.Event de quem pediu a busca.
+        if self.trabalhadores == 1:
+            _iniciar_trabalhador(
+                self.alpha,
+                self.cancelamento if cancelamento is None else cancelamento,
+            )
+            resultados = [
+                _buscar_filho(contexto, coluna, janela_cheia) for coluna in colunas
+            ]
+        else:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    self.trabalhadores,
+                    initializer=_iniciar_trabalhador,
+                    initargs=(self.alpha, self.cancelamento),
+                )
+            futuros = [
+                self.executor.submit(_buscar_filho, contexto, coluna, janela_cheia)
+                for coluna in colunas
+            ]
+            # Os processos param ao ver o cancelamento, então a espera continua
+            # até todos devolverem e nenhuma tarefa fica para a próxima busca
+            pendentes = set(futuros)
+            while pendentes:
+                _, pendentes = wait(pendentes, timeout=INTERVALO_CANCELAMENTO_S)
+                if cancelamento is not None and cancelamento.is_set():
+                    self.cancelamento.set()
+            resultados = [futuro.result() for futuro in futuros]
+
+        self.nos += sum(nos for *_, nos in resultados)
+        if any(valor is None for _, valor, _, _ in resultados):
+            if cancelamento is not None and cancelamento.is_set():
+                raise BuscaCancelada
+            raise TempoEsgotado
+        return {coluna: (valor, exato) for coluna, valor, exato, _ in resultados}
+
+    def buscar(self, jogo, profundidade, prazo=None, cancelamento=None):
+        movimentos = jogo.ordenador.ordenar(
+            jogo.get_movimentos_validos(), jogo.bitboard.jogadas, 1
+        )
+        if not movimentos:
+            return jogo.avaliar_tabuleiro(), None
+
+        self.alpha.value = -math.inf
+        self.cancelamento.clear()
+        self.nos = 0
+        contexto = (
+            self.sessao,
+            self.busca,
+            self.config,
+            jogo.tabuleiro,
+            profundidade,
+            prazo,
+        )
+        resultados = self.resolver(contexto, movimentos, cancelamento=cancelamento)
+
+        def melhor():
+            return max(
+                (coluna for coluna in movimentos if resultados[coluna][1]),
+                key=lambda coluna: (
+                    resultados[coluna][0],
+                    -movimentos.index(coluna),
+                ),
+            )
+
+        # Um limite superior igual ao melhor valor exato pode esconder uma
+        # jogada de mesmo valor que vem antes na ordem da raiz; essas são
+        # buscadas de novo com a janela cheia antes de decidir
+        melhor_movimento = melhor()
+        valor = resultados[melhor_movimento][0]
+        duvidas = [
+            coluna
+            for coluna in movimentos[: movimentos.index(melhor_movimento)]
+            if not resultados[coluna][1] and resultados[coluna][0] >= valor
+        ]
+        if duvidas:
+            resultados.update(
+                self.resolver(contexto, duvidas, True, cancelamento=cancelamento)
+            )
+            melhor_movimento = melhor()
+        return resultados[melhor_movimento][0], melhor_movimento
+
+
+def relatorio_escalabilidade(
+    profundidade=6,
+    trabalhadores=(1, 2, 4, 8, 16),
+    posicoes=POSICOES_ESCALABILIDADE,
+    usar_alpha_beta=True,
+):
+    # Tempo total de busca no conjunto fixo de posições para cada número de
+    # trabalhadores, com a aceleração em relação a um trabalhador
+    relatorio = []
+    for quantidade in trabalhadores:
+        config = {'usar_alpha_beta': usar_alpha_beta}
+        with BuscaParalela(quantidade, **config) as busca:
+            inicio = time.perf_counter()
+            nos = 0
+            jogadas = []
+            for posicao in posicoes:
+                busca.nova_busca()
+                jogo = Connect4(**config)
+                jogo.carregar_jogadas(int(coluna) for coluna in posicao)
+                _, movimento = busca.buscar(jogo, profundidade)
+                nos += busca.nos
+                jogadas.append(movimento)
+            tempo = time.perf_counter() - inicio
+
+        relatorio.append({
+            'trabalhadores': quantidade,
+            'tempo_s': tempo,
+            'nos': nos,
+            'nos_por_segundo': nos / tempo if tempo else 0.0,
+            'jogadas': jogadas,
+        })
+
+    base = relatorio[0]['tempo_s']
+    for linha in relatorio:
+        linha['aceleracao'] = base / linha['tempo_s'] if linha['tempo_s'] else 0.0
+    return relatorio
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Aceleração da busca paralela em função do número de núcleos'
+    )
+    parser.add_argument('--profundidade', type=int, default=6)
+    parser.add_argument(
+        '--trabalhadores',
+        type=int,
+        nargs='+',
+        default=[n for n in (1, 2, 4, 8, 16) if n <= (os.cpu_count() or 1)],
+    )
+    parser.add_argument('--minimax-puro', action='store_true')
+    args = parser.parse_args()
+
+    print(
+        json.dumps(
+            relatorio_escalabilidade(
+                args.profundidade,
+                args.trabalhadores,
+                usar_alpha_beta=not args.minimax_puro,
+            ),
+            indent=2,
+        )
+    )
@@ -0,0 +1,197 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+
+from connect4.bitboard import Bitboard
+
+MAGICO = b'C4PT'
+VERSAO = 1
+# magico, versão; escrito uma vez, no início do arquivo
+CABECALHO = struct.Struct('<4sB')
+# linhas, colunas, jogadas, resultado, profundidade, opções, tempo por jogada
+# em ms (0 sem limite). Depois vêm o tempo de cada jogada (uint16, ms) e as
+# colunas, 4 bits cada, duas por byte com a primeira nos bits baixos.
+PARTIDA = struct.Struct('<BBBBBBH')
+TEMPO = struct.Struct('<H')
+TEMPO_MAXIMO_MS = 2**16 - 1
+# Cada coluna ocupa 4 bits e o número de jogadas, um byte
+COLUNAS_MAXIMAS = 2**4
+CASAS_MAXIMAS = 2**8 - 1
+
+# Resultado, do ponto de vista de quem começou
+EMPATE = 0
+PRIMEIRO = 1
+SEGUNDO = 2
+INTERROMPIDA = 3
+RESULTADOS = {
+    EMPATE: 'empate',
+    PRIMEIRO: 'primeiro',
+    SEGUNDO: 'segundo',
+    INTERROMPIDA: 'interrompida',
+}
+
+# Bits do campo de opções, na ordem da configuração gravada
+OPCOES = ('alpha_beta', 'ponderar', 'livro', 'ia_comeca')
+
+
+def codificar_partida(  # noqa: PLR0913, PLR0917
+    linhas, colunas, jogadas, tempos_ms, resultado, configuracao
+) -> bytes:
+    # `configuracao` tem 'profundidade', 'tempo_ms' e as chaves de OPCOES
+    if colunas > COLUNAS_MAXIMAS or linhas * colunas > CASAS_MAXIMAS:
+        raise ValueError(f'tabuleiro {linhas}x{colunas} grande demais')
+    opcoes = 0
+    for bit, nome in enumerate(OPCOES):
+        if configuracao.get(nome):
+            opcoes |= 1 << bit
+    dados = bytearray(
+        PARTIDA.pack(
+            linhas,
+            colunas,
+            len(jogadas),
+            resultado,
+            configuracao.get('profundidade') or 0,
+            opcoes,
+            min(configuracao.get('tempo_ms') or 0, TEMPO_MAXIMO_MS),
+        )
+    )
+    for tempo in tempos_ms:
+        dados += TEMPO.pack(min(round(tempo), TEMPO_MAXIMO_MS))
+    for indice in range(0, len(jogadas), 2):
+        par = jogadas[indice : indice + 2]
+        dados.append(par[0] | (par[1] << 4 if len(par) > 1 else 0))
+    return bytes(dados)
+
+
+def gravar_partida(  # noqa: PLR0913, PLR0917
+    caminho, linhas, colunas, jogadas, tempos_ms, resultado, configuracao
+):
+    # Acrescenta uma partida ao arquivo numa única escrita; o cabeçalho do
+    # arquivo é escrito quando ele ainda não existe ou está vazio
+    dados = codificar_partida(
+        linhas, colunas, jogadas, tempos_ms, resultado, configuracao
+    )
+    with open(caminho, 'ab') as arquivo:
+        if arquivo.tell() == 0:
+            dados = CABECALHO.pack(MAGICO, VERSAO) + dados
+        arquivo.write(dados)
+
+
+class LeitorPartidas:
+    # Lê o arquivo via mmap, uma partida por vez, sem carregá-lo na memória
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.arquivo = open(caminho, 'rb')
+        if os.fstat(self.arquivo.fileno()).st_size == 0:
+            self.arquivo.close()
+            raise ValueError(f'{caminho} está vazio')
+        self.mapa = mmap.mmap(self.arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magico, versao = CABECALHO.unpack_from(self.mapa, 0)
+        if magico != MAGICO or versao != VERSAO:
+            self.fechar()
+            raise ValueError(f'{caminho} não é um arquivo de partidas válido')
+
+    def fechar(self):
+        if self.mapa is not None:
+            self.mapa.close()
+            self.mapa = None
+        if self.arquivo is not None:
+            self.arquivo.close()
+            self.arquivo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def __iter__(self):
+        return self.partidas()
+
+    def partidas(self):
+        # Um dicionário por partida, na ordem em que foram gravadas
+        mapa = self.mapa
+        deslocamento = CABECALHO.size
+        while deslocamento < len(mapa):
+            (
+                linhas,
+                colunas,
+                quantidade,
+                resultado,
+                profundidade,
+                opcoes,
+                tempo_ms,
+            ) = PARTIDA.unpack_from(mapa, deslocamento)
+            deslocamento += PARTIDA.size
+            tempos_ms = list(
+                struct.unpack_from(f'<{quantidade}H', mapa, deslocamento)
+            )
+            deslocamento += TEMPO.size * quantidade
+            compactadas = mapa[deslocamento : deslocamento + (quantidade + 1) // 2]
+            deslocamento += len(compactadas)
+            jogadas = []
+            for byte in compactadas:
+                jogadas += (byte & 0xF, byte >> 4)
+            del jogadas[quantidade:]
+
+            partida = {
+                'linhas': linhas,
+                'colunas': colunas,
+                'jogadas': jogadas,
+                'tempos_ms': tempos_ms,
+                'resultado': RESULTADOS[resultado],
+                'profundidade': profundidade,
+                'tempo_ms': tempo_ms or None,
+            }
+            for bit, nome in enumerate(OPCOES):
+                partida[nome] = bool(opcoes & (1 << bit))
+            yield partida
+
+    def posicoes(self):
+        # (bitboard, coluna jogada, resultado para quem joga: 1, 0 ou -1) para
+        # cada jogada das partidas que terminaram; quem começou tem a peça 1.
+        # O bitboard é o mesmo objeto ao longo da partida, copie-o para guardar.
+        for partida in self.partidas():
+            if partida['resultado'] == RESULTADOS[INTERROMPIDA]:
+                continue
+            bitboard = Bitboard(partida['linhas'], partida['colunas'], pecas=(1, -1))
+            resultado = {'primeiro': 1, 'segundo': -1}.get(partida['resultado'], 0)
+            peca = 1
+            for coluna in partida['jogadas']:
+                yield bitboard, coluna, resultado * peca
+                bitboard.jogar(coluna, peca)
+                peca = -peca
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Resumo de um arquivo de partidas gravadas'
+    )
+    parser.add_argument('arquivo')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    partidas = 0
+    posicoes = 0
+    resultados = dict.fromkeys(RESULTADOS.values(), 0)
+    with LeitorPartidas(args.arquivo) as leitor:
+        for partida in leitor:
+            partidas += 1
+            posicoes += len(partida['jogadas'])
+            resultados[partida['resultado']] += 1
+    tempo = time.perf_counter() - inicio
+    print(
+        json.dumps(
+            {
+                'partidas': partidas,
+                'posicoes': posicoes,
+                'resultados': resultados,
+                'tempo_s': tempo,
+                'posicoes_por_segundo': posicoes / tempo if tempo else 0.0,
+            },
+            indent=2,
+        )
+    )
@@ -0,0 +1,53 @@
+from threading import Event, Thread
+
+from connect4.busca import BuscaCancelada
+
+
+class Ponderador:
+    # Usa a vez do humano para buscar, numa thread, a resposta da IA a cada
+    # jogada que ele pode fazer, das mais prováveis para as menos prováveis.
+    # `responder(coluna, cancelamento)` recebe a jogada do humano e devolve o
+    # resultado da busca da IA na posição seguinte.
+    def __init__(self, responder, colunas):
+        self.responder = responder
+        self.colunas = list(colunas)
+        self.resultados = {}
+        self.cancelamento = Event()
+        # Jogada do humano cuja resposta interessa, informada ao cancelar
+        self.coluna = None
+        self.thread = Thread(target=self.executar, daemon=True)
+        self.thread.start()
+
+    def executar(self):
+        for coluna in self.colunas:
+            if self.cancelamento.is_set():
+                return
+            try:
+                self.resultados[coluna] = self.responder(coluna, self.cancelamento)
+            except BuscaCancelada:
+                return
+
+    def cancelar(self, coluna=None):
+        # Pede o fim da ponderação sem esperar a thread, para quem não pode
+        # bloquear, como o loop do pygame: `pronto()` diz quando ela terminou e
+        # `resposta()` devolve então o que foi calculado para `coluna`
+        self.coluna = coluna
+        self.cancelamento.set()
+
+    def pronto(self) -> bool:
+        return not self.thread.is_alive()
+
+    def resposta(self):
+        return self.resultados.get(self.coluna)
+
+    def parar(self):
+        # A busca confere o cancelamento a cada poucos nós, então a espera é curta
+        self.cancelar()
+        self.thread.join()
+
+    def resultado(self, coluna):
+        # Para a ponderação e devolve a resposta já calculada para a jogada do
+        # humano, ou None se ela ainda não tinha sido buscada.
+        self.cancelar(coluna)
+        self.thread.join()
+        return self.resposta()
@@ -0,0 +1,289 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from threading import Event, Lock, Thread
+
+from connect4.backend import Connect4
+from connect4.busca import BuscaCancelada
+from connect4.instrumentacao import EstatisticasBusca, valor_json
+
+# Protocolo de linhas (entrada e saída em texto, uma mensagem por linha):
+#   posicao [jogadas]           colunas a partir de 0 desde o tabuleiro vazio,
+#                               ex.: "posicao 3443"; sem jogadas, tabuleiro vazio
+#   vai profundidade N | vai tempo MS
+#                               busca em segundo plano; responde
+#                               "info ..." por iteração e "melhor ..." no fim
+#   pare                        interrompe a busca e responde com a melhor
+#                               jogada da última iteração concluída
+#   {"id": ..., "jogadas": ..., "profundidade": N | "tempo_ms": MS}
+#                               pedido de análise em lote, resolvido no pool;
+#                               a resposta é uma linha JSON com o mesmo id, na
+#                               ordem em que as análises terminam
+#   sair
+# Quem joga na posição é sempre analisado como a IA do motor.
+
+# "vai" recebe o tipo do limite e o valor
+ARGUMENTOS_VAI = 2
+
+# Motores de cada processo do pool, reaproveitados entre os pedidos para que a
+# tabela de transposição e o livro continuem aquecidos. Há um por paridade da
+# sequência de jogadas: ela decide as cores das peças, e pedidos das duas
+# paridades alternados não desfazem o tabuleiro um do outro.
+_config = None
+_motores = {}
+
+
+def _iniciar_trabalhador(config):
+    global _config  # noqa: PLW0603
+    _config = config
+
+
+def _motor_da_paridade(paridade):
+    # (motor, jogadas carregadas nele)
+    if paridade not in _motores:
+        _motores[paridade] = (Connect4(**_config), [])
+    return _motores[paridade]
+
+
+def _carregar(jogo, atuais, jogadas):
+    # Desfaz só o que difere da posição anterior, que costuma ser um prefixo.
+    # As cores das peças dependem da paridade da sequência, já que quem joga
+    # depois dela é sempre a IA: com paridade diferente nada é aproveitado.
+    comum = 0
+    if len(atuais) % 2 == len(jogadas) % 2:
+        while (
+            comum < min(len(atuais), len(jogadas))
+            and atuais[comum] == jogadas[comum]
+        ):
+            comum += 1
+    for coluna in reversed(atuais[comum:]):
+        jogo.retornar_movimento(coluna)
+    del atuais[comum:]
+
+    # A IA (-1) é quem joga depois da última jogada
+    peca = -1 if len(jogadas) % 2 == 0 else 1
+    for indice, coluna in enumerate(jogadas):
+        if indice >= comum:
+            if not 0 <= coluna < jogo.colunas or not jogo.validar_movimento(coluna):
+                raise ValueError(f'coluna {coluna} inválida')
+            jogo.realizar_jogada(coluna, peca)
+            atuais.append(coluna)
+        peca = -peca
+
+
+def _buscar(
+    jogo, profundidade=None, tempo_ms=None, cancelamento=None, estatisticas=None
+):
+    # O livro responde antes da busca, como em escolher_jogada
+    jogo.nos = 0
+    if jogo.livro is not None:
+        jogada = jogo.livro.consultar(jogo.bitboard, -1)
+        if jogada is not None:
+            coluna, pontuacao = jogada
+            return pontuacao, coluna
+
+    ply = jogo.ply
+    if profundidade is not None:
+        jogo.ply = profundidade
+    try:
+        return jogo.buscar(tempo_ms, cancelamento, estatisticas)
+    finally:
+        jogo.ply = ply
+
+
+def _posicionar(jogadas):
+    # Motor do trabalhador com a posição de `jogadas` carregada
+    motor, atuais = _motor_da_paridade(len(jogadas) % 2)
+    _carregar(motor, atuais, jogadas)
+    if motor.bitboard.cheio():
+        raise ValueError('tabuleiro cheio')
+    return motor
+
+
+def _analisar(pedido):
+    inicio = time.perf_counter()
+    resposta = {'id': pedido.get('id')}
+    try:
+        motor = _posicionar([int(coluna) for coluna in pedido.get('jogadas', '')])
+        valor, coluna = _buscar(
+            motor, pedido.get('profundidade'), pedido.get('tempo_ms')
+        )
+    except ValueError as erro:
+        resposta['erro'] = str(erro)
+        return resposta
+    resposta.update(
+        coluna=coluna,
+        valor=valor_json(valor),
+        nos=motor.nos,
+        tempo_ms=(time.perf_counter() - inicio) * 1000,
+    )
+    return resposta
+
+
+class Servidor:
+    # Um motor no próprio processo para posicao/vai/pare e um pool de processos,
+    # cada um com o seu motor, para as análises em lote
+    def __init__(self, saida=sys.stdout, trabalhadores: int = 1, **config):
+        self.saida = saida
+        self.config = config
+        self.jogo = Connect4(**config)
+        self.jogadas = []
+        self.trabalhadores = trabalhadores
+        self.executor = None
+        self.trava_saida = Lock()
+
+        self.busca = None
+        self.cancelamento = None
+        self.estatisticas = None
+
+    def escrever(self, linha):
+        with self.trava_saida:
+            self.saida.write(linha + '\n')
+            self.saida.flush()
+
+    def executar(self, entrada=sys.stdin):
+        try:
+            for recebida in entrada:
+                linha = recebida.strip()
+                if not linha:
+                    continue
+                if linha == 'sair':
+                    break
+                try:
+                    self.tratar(linha)
+                except ValueError as erro:
+                    self.escrever(f'erro {erro}')
+        finally:
+            self.fechar()
+
+    def tratar(self, linha):
+        if linha.startswith('{'):
+            self.analisar(json.loads(linha))
+            return
+
+        comando, *argumentos = linha.split()
+        if comando == 'posicao':
+            self.posicao(argumentos[0] if argumentos else '')
+        elif comando == 'vai':
+            if len(argumentos) != ARGUMENTOS_VAI or argumentos[0] not in {
+                'profundidade',
+                'tempo',
+            }:
+                raise ValueError('use "vai profundidade N" ou "vai tempo MS"')
+            self.vai(**{argumentos[0]: int(argumentos[1])})
+        elif comando == 'pare':
+            self.pare()
+        else:
+            raise ValueError(f'comando desconhecido: {comando}')
+
+    def posicao(self, jogadas):
+        if self.buscando():
+            raise ValueError('busca em andamento')
+        _carregar(self.jogo, self.jogadas, [int(coluna) for coluna in jogadas])
+
+    def buscando(self) -> bool:
+        return self.busca is not None and self.busca.is_alive()
+
+    def vai(self, profundidade=None, tempo=None):
+        if self.buscando():
+            raise ValueError('busca em andamento')
+        if self.jogo.bitboard.cheio():
+            raise ValueError('tabuleiro cheio')
+        self.cancelamento = Event()
+        self.estatisticas = EstatisticasBusca(ao_iterar=self.informar)
+        self.busca = Thread(
+            target=self.buscar,
+            args=(profundidade, tempo, self.cancelamento, self.estatisticas),
+            daemon=True,
+        )
+        self.busca.start()
+
+    def buscar(self, profundidade, tempo_ms, cancelamento, estatisticas):
+        inicio = time.perf_counter()
+        try:
+            valor, coluna = _buscar(
+                self.jogo, profundidade, tempo_ms, cancelamento, estatisticas
+            )
+        except BuscaCancelada:
+            # Fica a última iteração concluída, se houver
+            if not estatisticas.iteracoes:
+                self.escrever('melhor nenhuma')
+                return
+            iteracao = estatisticas.iteracoes[-1]
+            valor, coluna = iteracao['valor'], iteracao['movimento']
+        tempo = (time.perf_counter() - inicio) * 1000
+        self.escrever(
+            f'melhor {coluna} valor {valor_json(valor)} '
+            f'nos {estatisticas.nos} tempo_ms {tempo:.1f}'
+        )
+
+    def informar(self, estatisticas):
+        iteracao = estatisticas.iteracoes[-1]
+        self.escrever(
+            f'info profundidade {iteracao["profundidade"]} '
+            f'valor {valor_json(iteracao["valor"])} nos {iteracao["nos"]} '
+            f'tempo_ms {iteracao["tempo_s"] * 1000:.1f} '
+            f'pv {" ".join(map(str, iteracao["variacao_principal"]))}'
+        )
+
+    def pare(self):
+        if self.buscando():
+            self.cancelamento.set()
+            self.busca.join()
+
+    def analisar(self, pedido):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                self.trabalhadores,
+                initializer=_iniciar_trabalhador,
+                initargs=(self.config,),
+            )
+        futuro = self.executor.submit(_analisar, pedido)
+        futuro.add_done_callback(
+            lambda futuro: self.responder(pedido.get('id'), futuro)
+        )
+
+    def responder(self, identificador, futuro):
+        # Chamado pela thread do pool assim que a análise termina
+        erro = futuro.exception()
+        if erro is not None:
+            resposta = {'id': identificador, 'erro': repr(erro)}
+        else:
+            resposta = futuro.result()
+        self.escrever(json.dumps(resposta))
+
+    def fechar(self):
+        self.pare()
+        if self.executor is not None:
+            # Espera as análises pendentes para que todas sejam respondidas
+            self.executor.shutdown()
+            self.executor = None
+        self.jogo.fechar()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Motor persistente com protocolo de linhas em stdin/stdout'
+    )
+    parser.add_argument('--linhas', type=int, default=7)
+    parser.add_argument('--colunas', type=int, default=8)
+    parser.add_argument('--minimax-puro', action='store_true')
+    parser.add_argument('--pvs', action='store_true')
+    parser.add_argument('--memoria-tt-mb', type=float, default=16)
+    parser.add_argument('--livro')
+    parser.add_argument('--pesos', help='arquivo de pesos de connect4 ajuste')
+    parser.add_argument('--trabalhadores', type=int, default=1)
+    args = parser.parse_args()
+
+    Servidor(
+        trabalhadores=args.trabalhadores,
+        linhas=args.linhas,
+        colunas=args.colunas,
+        usar_alpha_beta=not args.minimax_puro,
+        usar_pvs=args.pvs,
+        memoria_tt_mb=args.memoria_tt_mb,
+        livro=args.livro,
+        pesos=args.pesos,
+    ).executar()
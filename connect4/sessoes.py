@@ -0,0 +1,453 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from connect4.bitboard import Bitboard
+from connect4.instrumentacao import percentil
+from connect4.servidor import _analisar, _iniciar_trabalhador
+
+# Protocolo: uma mensagem JSON por linha, e uma resposta por mensagem na ordem
+# em que chegaram; a conexão só lê a próxima mensagem depois de responder.
+#   {"tipo": "nova", "ia_comeca": false}   cria uma sessão; responde com o id
+#                                          e as jogadas (a da IA, se ela começa)
+#   {"tipo": "jogar", "sessao": ID, "coluna": C}
+#                                          jogada do jogador (colunas a partir
+#                                          de 0); responde com a da IA e o
+#                                          resultado, se a partida terminou
+#   {"tipo": "fechar", "sessao": ID}
+#   {"tipo": "metricas"}
+# Com a fila de jogadas da IA cheia, "jogar" responde {"erro": "ocupado"} sem
+# mudar a partida, e o cliente tenta de novo depois.
+
+ENDERECO = '127.0.0.1'
+PORTA = 7654
+CONFIGURACAO = {'ply': 5, 'usar_alpha_beta': True}
+PRAZO_MS = 500
+# Fração do tempo restante dada ao motor; o resto cobre a fila e a resposta
+FRACAO_PRAZO = 0.7
+# Abaixo disso não vale mandar a jogada para o pool
+TEMPO_MINIMO_MS = 5
+# Jogadas da IA esperando ou rodando no pool, por trabalhador
+FILA_POR_TRABALHADOR = 8
+MAXIMO_SESSOES = 10000
+# Latências guardadas para os percentis
+JANELA_LATENCIAS = 10000
+
+
+class Sessao:
+    # Estado de uma partida: só o bitboard e as jogadas. O motor, com a tabela
+    # de transposição, fica nos processos do pool e é compartilhado entre as
+    # sessões. O jogador tem a peça 1 e a IA a -1.
+    def __init__(self, identificador, linhas, colunas):
+        self.identificador = identificador
+        self.bitboard = Bitboard(linhas, colunas, pecas=(1, -1))
+        self.jogadas = []
+        self.resultado = None
+
+    def jogar(self, coluna, peca):
+        self.bitboard.jogar(coluna, peca)
+        self.jogadas.append(coluna)
+        if self.bitboard.movimento_ganhador(peca):
+            self.resultado = 'jogador' if peca == 1 else 'ia'
+        elif self.bitboard.cheio():
+            self.resultado = 'empate'
+
+
+def jogada_reserva(bitboard) -> int:
+    # Jogada imediata para quando o prazo acaba antes da busca: vence, bloqueia
+    # ou joga a coluna mais central que não entrega a vitória ao jogador
+    vitorias, bloqueios, perdedoras = bitboard.ameacas(-1)
+    for mascara in (vitorias, bloqueios):
+        if mascara:
+            return bitboard.colunas_da_mascara(mascara)[0]
+    centro = (bitboard.colunas - 1) / 2
+    colunas = sorted(
+        bitboard.movimentos_validos(), key=lambda coluna: abs(coluna - centro)
+    )
+    for coluna in colunas:
+        if not perdedoras & bitboard.mascaras_coluna[coluna]:
+            return coluna
+    return colunas[0]
+
+
+class ServidorSessoes:
+    # Muitas partidas num só processo asyncio; as jogadas da IA vão para um
+    # pool limitado de processos, cada um com o seu motor
+    def __init__(
+        self,
+        trabalhadores: int | None = None,
+        configuracao=CONFIGURACAO,
+        prazo_ms: int = PRAZO_MS,
+        fila_maxima: int | None = None,
+        maximo_sessoes: int = MAXIMO_SESSOES,
+    ):
+        self.trabalhadores = trabalhadores or os.cpu_count() or 1
+        self.configuracao = dict(configuracao)
+        self.linhas = self.configuracao.get('linhas', 7)
+        self.colunas = self.configuracao.get('colunas', 8)
+        self.prazo_ms = prazo_ms
+        self.fila_maxima = fila_maxima or self.trabalhadores * FILA_POR_TRABALHADOR
+        self.maximo_sessoes = maximo_sessoes
+        self.executor = ProcessPoolExecutor(
+            self.trabalhadores,
+            initializer=_iniciar_trabalhador,
+            initargs=(self.configuracao,),
+        )
+        # Cada vaga é um processo livre; quem não tem vaga espera na fila
+        self.vagas = asyncio.Semaphore(self.trabalhadores)
+        self.sessoes = {}
+        self.identificadores = itertools.count(1)
+        # Escritor -> tarefa de cada conexão aberta, para encerrar sem cancelar
+        self.conexoes = {}
+
+        self.na_fila = 0
+        self.no_pool = 0
+        self.fila_maior = 0
+        self.latencias_ms = deque(maxlen=JANELA_LATENCIAS)
+        self.jogadas_ia = 0
+        self.prazos_perdidos = 0
+        self.respostas_invalidas = 0
+        self.recusadas = 0
+        self.inicio = time.perf_counter()
+
+    async def iniciar(self, endereco=ENDERECO, porta=PORTA, caminho=None):
+        # Escuta em TCP local ou, com `caminho`, num socket Unix
+        if caminho is not None:
+            return await asyncio.start_unix_server(self.atender, caminho)
+        return await asyncio.start_server(self.atender, endereco, porta)
+
+    async def encerrar(self, soquete):
+        # Fecha as conexões em vez de cancelar as tarefas delas: cada uma vê o
+        # fim da entrada e termina normalmente
+        soquete.close()
+        tarefas = list(self.conexoes.values())
+        for escritor in list(self.conexoes):
+            escritor.close()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        await soquete.wait_closed()
+        self.executor.shutdown(cancel_futures=True)
+
+    def excede_fila(self) -> bool:
+        # Contrapressão: com a fila cheia a jogada é recusada antes de mudar a
+        # partida, e o cliente tenta de novo depois
+        if self.na_fila + self.no_pool >= self.fila_maxima:
+            self.recusadas += 1
+            return True
+        return False
+
+    async def atender(self, leitor, escritor):
+        # As sessões criadas pela conexão acabam com ela
+        criadas = set()
+        self.conexoes[escritor] = asyncio.current_task()
+        try:
+            await self.conversar(leitor, escritor, criadas)
+        except ConnectionError:
+            pass
+        finally:
+            for identificador in criadas:
+                self.sessoes.pop(identificador, None)
+            del self.conexoes[escritor]
+            escritor.close()
+
+    async def conversar(self, leitor, escritor, criadas):
+        # Uma resposta por linha pedida, até a conexão fechar
+        while linha := await leitor.readline():
+            try:
+                resposta = await self.tratar(json.loads(linha), criadas)
+            except (ValueError, KeyError, TypeError) as erro:
+                resposta = {'erro': str(erro)}
+            escritor.write(json.dumps(resposta).encode() + b'\n')
+            await escritor.drain()
+
+    async def tratar(self, pedido, criadas):
+        tipo = pedido['tipo']
+        if tipo == 'nova':
+            resposta = await self.nova_sessao(pedido.get('ia_comeca', False))
+            if 'sessao' in resposta:
+                criadas.add(resposta['sessao'])
+            return resposta
+        if tipo == 'jogar':
+            return await self.jogar(pedido['sessao'], int(pedido['coluna']))
+        if tipo == 'fechar':
+            self.sessoes.pop(pedido['sessao'], None)
+            return {'sessao': pedido['sessao']}
+        if tipo == 'metricas':
+            return self.metricas()
+        raise ValueError(f'tipo desconhecido: {tipo}')
+
+    async def nova_sessao(self, ia_comeca):
+        if len(self.sessoes) >= self.maximo_sessoes:
+            return {'erro': 'sessões demais'}
+        if ia_comeca and self.excede_fila():
+            return {'erro': 'ocupado'}
+        sessao = Sessao(next(self.identificadores), self.linhas, self.colunas)
+        self.sessoes[sessao.identificador] = sessao
+        if ia_comeca:
+            sessao.jogar(await self.jogada_ia(sessao, time.perf_counter()), -1)
+        return {'sessao': sessao.identificador, 'jogadas': sessao.jogadas}
+
+    async def jogar(self, identificador, coluna):
+        recebido = time.perf_counter()
+        sessao = self.sessoes.get(identificador)
+        if sessao is None:
+            raise ValueError(f'sessão {identificador} não existe')
+        if sessao.resultado is not None:
+            raise ValueError('a partida já terminou')
+        if not 0 <= coluna < self.colunas or not sessao.bitboard.validar_movimento(
+            coluna
+        ):
+            raise ValueError(f'coluna {coluna} inválida')
+        if self.excede_fila():
+            return {'sessao': identificador, 'erro': 'ocupado'}
+
+        sessao.jogar(coluna, 1)
+        resposta = {'sessao': identificador}
+        if sessao.resultado is None:
+            resposta['coluna'] = await self.jogada_ia(sessao, recebido)
+            sessao.jogar(resposta['coluna'], -1)
+            self.latencias_ms.append((time.perf_counter() - recebido) * 1000)
+        resposta['resultado'] = sessao.resultado
+        return resposta
+
+    async def jogada_ia(self, sessao, recebido):
+        # A busca tem até o prazo da jogada, contado desde que ela chegou; se
+        # ele acabar antes, na fila ou no pool, a IA usa a jogada de reserva e
+        # a busca já enviada termina sem segurar a resposta
+        self.jogadas_ia += 1
+        prazo = recebido + self.prazo_ms / 1000
+        # A vaga na fila é contada já aqui, antes de a tarefa começar, para que
+        # os pedidos seguintes vejam a fila como ela vai estar
+        self.na_fila += 1
+        self.fila_maior = max(self.fila_maior, self.na_fila + self.no_pool)
+        tarefa = asyncio.ensure_future(self.buscar(list(sessao.jogadas), prazo))
+        try:
+            resposta = await asyncio.wait_for(
+                asyncio.shield(tarefa), prazo - time.perf_counter()
+            )
+        except TimeoutError:
+            resposta = None
+        if resposta is None or 'coluna' not in resposta:
+            self.prazos_perdidos += 1
+            return jogada_reserva(sessao.bitboard)
+        # A resposta vem de outro processo: uma coluna que não cabe na partida
+        # nunca chega a Sessao.jogar
+        coluna = resposta['coluna']
+        if not (
+            isinstance(coluna, int)
+            and 0 <= coluna < self.colunas
+            and sessao.bitboard.validar_movimento(coluna)
+        ):
+            self.respostas_invalidas += 1
+            return jogada_reserva(sessao.bitboard)
+        return coluna
+
+    async def buscar(self, jogadas, prazo):
+        try:
+            await self.vagas.acquire()
+        finally:
+            self.na_fila -= 1
+        try:
+            restante_ms = (prazo - time.perf_counter()) * 1000
+            if restante_ms < TEMPO_MINIMO_MS:
+                return None
+            self.no_pool += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.executor,
+                    _analisar,
+                    {'jogadas': jogadas, 'tempo_ms': restante_ms * FRACAO_PRAZO},
+                )
+            finally:
+                self.no_pool -= 1
+        finally:
+            self.vagas.release()
+
+    def metricas(self) -> dict:
+        latencias = list(self.latencias_ms)
+        tempo = time.perf_counter() - self.inicio
+        return {
+            'sessoes': len(self.sessoes),
+            'sessoes_por_nucleo': len(self.sessoes) / (os.cpu_count() or 1),
+            'trabalhadores': self.trabalhadores,
+            'na_fila': self.na_fila,
+            'no_pool': self.no_pool,
+            'fila_maior': self.fila_maior,
+            'fila_maxima': self.fila_maxima,
+            'jogadas_ia': self.jogadas_ia,
+            'jogadas_por_segundo': self.jogadas_ia / tempo if tempo else 0.0,
+            'prazos_perdidos': self.prazos_perdidos,
+            'respostas_invalidas': self.respostas_invalidas,
+            'recusadas': self.recusadas,
+            'latencia_p50_ms': percentil(latencias, 0.50),
+            'latencia_p95_ms': percentil(latencias, 0.95),
+            'latencia_p99_ms': percentil(latencias, 0.99),
+        }
+
+
+async def _pedir(leitor, escritor, pedido):
+    escritor.write(json.dumps(pedido).encode() + b'\n')
+    await escritor.drain()
+    return json.loads(await leitor.readline())
+
+
+async def _jogar_sessao(  # noqa: PLR0913, PLR0917
+    endereco, porta, semente, linhas, colunas, contagem
+):
+    # Um cliente: conecta, cria a sessão e joga colunas aleatórias até o fim
+    gerador = random.Random(semente)
+    leitor, escritor = await asyncio.open_connection(endereco, porta)
+    try:
+        pedido = {'tipo': 'nova', 'ia_comeca': semente % 2 == 1}
+        resposta = await _pedir(leitor, escritor, pedido)
+        while resposta.get('erro') == 'ocupado':
+            contagem['ocupado'] += 1
+            await asyncio.sleep(0.01 + gerador.random() * 0.05)
+            resposta = await _pedir(leitor, escritor, pedido)
+        identificador = resposta['sessao']
+        bitboard = Bitboard(linhas, colunas, pecas=(1, -1))
+        for coluna in resposta['jogadas']:
+            bitboard.jogar(coluna, -1)
+
+        while True:
+            coluna = gerador.choice(bitboard.movimentos_validos())
+            inicio = time.perf_counter()
+            resposta = await _pedir(
+                leitor,
+                escritor,
+                {'tipo': 'jogar', 'sessao': identificador, 'coluna': coluna},
+            )
+            if resposta.get('erro') == 'ocupado':
+                contagem['ocupado'] += 1
+                await asyncio.sleep(0.01 + gerador.random() * 0.05)
+                continue
+            if 'erro' in resposta:
+                raise RuntimeError(resposta['erro'])
+            contagem['latencias_ms'].append((time.perf_counter() - inicio) * 1000)
+            bitboard.jogar(coluna, 1)
+            if 'coluna' in resposta:
+                bitboard.jogar(resposta['coluna'], -1)
+            if resposta['resultado'] is not None:
+                contagem['resultados'][resposta['resultado']] += 1
+                break
+        await _pedir(leitor, escritor, {'tipo': 'fechar', 'sessao': identificador})
+    finally:
+        escritor.close()
+        await escritor.wait_closed()
+
+
+async def carga(  # noqa: PLR0913
+    endereco=ENDERECO,
+    porta=PORTA,
+    *,
+    sessoes=100,
+    simultaneas=None,
+    linhas=7,
+    colunas=8,
+    semente=0,
+):
+    # Joga `sessoes` partidas, no máximo `simultaneas` ao mesmo tempo, e
+    # devolve as medidas do lado do cliente com as métricas do servidor
+    simultaneas = simultaneas or sessoes
+    limite = asyncio.Semaphore(simultaneas)
+    contagem = {
+        'latencias_ms': [],
+        'ocupado': 0,
+        'resultados': {'jogador': 0, 'ia': 0, 'empate': 0},
+    }
+
+    async def sessao(numero):
+        async with limite:
+            await _jogar_sessao(
+                endereco, porta, semente + numero, linhas, colunas, contagem
+            )
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(sessao(numero) for numero in range(sessoes)))
+    tempo = time.perf_counter() - inicio
+
+    leitor, escritor = await asyncio.open_connection(endereco, porta)
+    try:
+        metricas = await _pedir(leitor, escritor, {'tipo': 'metricas'})
+    finally:
+        escritor.close()
+        await escritor.wait_closed()
+    latencias = contagem['latencias_ms']
+    return {
+        'sessoes': sessoes,
+        'simultaneas': simultaneas,
+        'tempo_s': tempo,
+        'partidas_por_segundo': sessoes / tempo if tempo else 0.0,
+        'jogadas': len(latencias),
+        'ocupado': contagem['ocupado'],
+        'resultados': contagem['resultados'],
+        'latencia_p50_ms': percentil(latencias, 0.50),
+        'latencia_p95_ms': percentil(latencias, 0.95),
+        'latencia_p99_ms': percentil(latencias, 0.99),
+        'servidor': metricas,
+    }
+
+
+async def _servir(args):
+    servidor = ServidorSessoes(
+        args.trabalhadores, prazo_ms=args.prazo_ms, fila_maxima=args.fila_maxima
+    )
+    soquete = await servidor.iniciar(args.endereco, args.porta)
+    try:
+        await soquete.serve_forever()
+    finally:
+        await servidor.encerrar(soquete)
+
+
+async def _carregar(args):
+    # Com --embutido o servidor roda no mesmo laço, para medir com um comando só
+    servidor = None
+    soquete = None
+    if args.embutido:
+        servidor = ServidorSessoes(
+            args.trabalhadores, prazo_ms=args.prazo_ms, fila_maxima=args.fila_maxima
+        )
+        soquete = await servidor.iniciar(args.endereco, args.porta)
+    try:
+        return await carga(
+            args.endereco,
+            args.porta,
+            sessoes=args.sessoes,
+            simultaneas=args.simultaneas,
+            semente=args.semente,
+        )
+    finally:
+        if servidor is not None:
+            await servidor.encerrar(soquete)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Servidor de muitas partidas simultâneas e cliente de carga'
+    )
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    parser_servidor = subcomandos.add_parser('servidor')
+    parser_carga = subcomandos.add_parser('carga')
+    for subparser in (parser_servidor, parser_carga):
+        subparser.add_argument('--endereco', default=ENDERECO)
+        subparser.add_argument('--porta', type=int, default=PORTA)
+        subparser.add_argument('--trabalhadores', type=int)
+        subparser.add_argument('--prazo-ms', type=int, default=PRAZO_MS)
+        subparser.add_argument('--fila-maxima', type=int)
+    parser_carga.add_argument('--sessoes', type=int, default=100)
+    parser_carga.add_argument('--simultaneas', type=int)
+    parser_carga.add_argument('--semente', type=int, default=0)
+    parser_carga.add_argument(
+        '--embutido', action='store_true', help='sobe o servidor no mesmo processo'
+    )
+    args = parser.parse_args()
+
+    if args.comando == 'servidor':
+        asyncio.run(_servir(args))
+    else:
+        print(json.dumps(asyncio.run(_carregar(args)), indent=2))
@@ -0,0 +1,275 @@
+import argparse
+import json
+import time
+
+from connect4.bitboard import Bitboard
+from connect4.busca import INTERVALO_RELOGIO, TempoEsgotado, conferir_relogio
+from connect4.transposicao import (
+    LIMITE_INFERIOR,
+    LIMITE_SUPERIOR,
+    TabelaTransposicao,
+)
+
+VITORIA = 'vitoria'
+DERROTA = 'derrota'
+EMPATE = 'empate'
+
+# Posições de final de jogo no tabuleiro 7x8 (colunas a partir de 0, começando
+# pelo jogador), de 12 a 30 casas livres e sem vitória imediata para quem joga,
+# usadas no relatório de resolução
+POSICOES_FINAIS = (
+    '46750453501202422223155274554011061336641316',
+    '042062311272276711302402013331177366667675',
+    '6106352044332543110773315557144224207746',
+    '20554344245376106003375441747755521732',
+    '205643437244570574344331225070772703',
+    '0547624326351104345733417332177012',
+    '53000032621554255041136134274303',
+    '530631774461001247305603177704',
+    '7647357334465661172415733122',
+    '64373733040774443471400753',
+)
+
+
+class Solucionador:
+    # Negamax exato sobre as máscaras do bitboard, com sondagens de janela nula
+    # (MTD(f)) e limites derivados do número de jogadas restantes. A pontuação
+    # é do ponto de vista de quem joga: positiva se ele vence, maior quanto
+    # mais cedo, e zero no empate.
+    def __init__(self, linhas: int = 7, colunas: int = 8, memoria_tt_mb: float = 16):
+        self.linhas = linhas
+        self.colunas = colunas
+        self.casas = linhas * colunas
+        geometria = Bitboard(linhas, colunas)
+        self.altura_coluna = geometria.altura_coluna
+        self.mascara_fundo = geometria.mascara_fundo
+        self.mascara_tabuleiro = geometria.mascara_tabuleiro
+        # Casas livres que completariam quatro peças de uma máscara
+        self.casas_vencedoras = geometria.casas_vencedoras
+
+        centro = (colunas - 1) / 2
+        ordem = sorted(
+            range(colunas), key=lambda coluna: (abs(coluna - centro), coluna)
+        )
+        mascara_coluna = (1 << linhas) - 1
+        self.colunas_ordenadas = [
+            (coluna, mascara_coluna << (coluna * self.altura_coluna))
+            for coluna in ordem
+        ]
+
+        self.tabela = TabelaTransposicao(memoria_tt_mb)
+        self.cancelamento = None
+        self.prazo = None
+        self.nos = 0
+
+    def jogaveis(self, mascara) -> int:
+        return (mascara + self.mascara_fundo) & self.mascara_tabuleiro
+
+    def jogaveis_sem_perder(self, posicao, mascara) -> int:
+        # Jogadas que não entregam uma vitória imediata ao adversário
+        jogaveis = self.jogaveis(mascara)
+        ameacas = self.casas_vencedoras(posicao ^ mascara, mascara)
+        forcadas = jogaveis & ameacas
+        if forcadas:
+            # Duas ameaças ao mesmo tempo não dá para bloquear
+            if forcadas & (forcadas - 1):
+                return 0
+            jogaveis = forcadas
+        # Não joga logo abaixo de uma casa em que o adversário vence
+        return jogaveis & ~(ameacas >> 1)
+
+    def negamax(  # noqa: PLR0911, PLR0912
+        self, posicao, mascara, jogadas, alpha, beta
+    ) -> int:
+        # Supõe que quem joga não vence nesta jogada (verificado por quem chama).
+        # Os cortes ficam todos aqui, sem funções auxiliares, por ser a função
+        # mais chamada do solucionador
+        self.nos += 1
+        if self.nos % INTERVALO_RELOGIO == 0:
+            conferir_relogio(self.cancelamento, self.prazo)
+
+        proximas = self.jogaveis_sem_perder(posicao, mascara)
+        if not proximas:
+            return -((self.casas - jogadas) // 2)
+        if jogadas >= self.casas - 2:
+            return 0
+
+        # O adversário não vence na próxima jogada, então a derrota mais rápida
+        # possível é dois lances depois
+        minimo = -((self.casas - 2 - jogadas) // 2)
+        if alpha < minimo:
+            alpha = minimo
+            if alpha >= beta:
+                return alpha
+        # E quem joga também não vence agora
+        maximo = (self.casas - 1 - jogadas) // 2
+        if beta > maximo:
+            beta = maximo
+            if alpha >= beta:
+                return beta
+
+        chave = posicao + mascara
+        entrada = self.tabela.consultar(chave)
+        if entrada is not None:
+            valor, tipo = entrada[2], entrada[3]
+            if tipo == LIMITE_SUPERIOR and beta > valor:
+                beta = valor
+            elif tipo == LIMITE_INFERIOR and alpha < valor:
+                alpha = valor
+            if alpha >= beta:
+                return alpha
+
+        for movimento in self.ordenar(posicao, mascara, proximas):
+            valor = -self.negamax(
+                posicao ^ mascara, mascara | movimento, jogadas + 1, -beta, -alpha
+            )
+            if valor >= beta:
+                self.tabela.gravar(chave, 0, valor, LIMITE_INFERIOR, None)
+                return valor
+            alpha = max(alpha, valor)
+
+        self.tabela.gravar(chave, 0, alpha, LIMITE_SUPERIOR, None)
+        return alpha
+
+    def ordenar(self, posicao, mascara, proximas) -> list[int]:
+        # Primeiro as jogadas que criam mais casas vencedoras; no empate, do
+        # centro para as bordas
+        notas = []
+        for posicao_ordem, (_, mascara_coluna) in enumerate(self.colunas_ordenadas):
+            movimento = proximas & mascara_coluna
+            if movimento:
+                ameacas = self.casas_vencedoras(posicao | movimento, mascara)
+                notas.append((-ameacas.bit_count(), posicao_ordem, movimento))
+        notas.sort()
+        return [nota[2] for nota in notas]
+
+    def vence_agora(self, posicao, mascara) -> int:
+        return self.jogaveis(mascara) & self.casas_vencedoras(posicao, mascara)
+
+    def pontuar(self, posicao, mascara, jogadas) -> int:
+        # Pontuação exata por bissecção com janelas nulas, começando perto de
+        # zero, onde as sondagens são mais baratas
+        if self.vence_agora(posicao, mascara):
+            return (self.casas + 1 - jogadas) // 2
+
+        minimo = -((self.casas - jogadas) // 2)
+        maximo = (self.casas + 1 - jogadas) // 2
+        while minimo < maximo:
+            meio = minimo + (maximo - minimo) // 2
+            if meio <= 0 and minimo // 2 < meio:
+                meio = minimo // 2
+            elif meio >= 0 and maximo // 2 > meio:
+                meio = maximo // 2
+            valor = self.negamax(posicao, mascara, jogadas, meio, meio + 1)
+            if valor <= meio:
+                maximo = valor
+            else:
+                minimo = valor
+        return minimo
+
+    def resolver(self, bitboard, peca) -> tuple[int, int]:
+        # Devolve (pontuação, coluna) para quem joga com `peca`
+        posicao = bitboard.mascaras[bitboard.indices[peca]]
+        mascara = bitboard.ocupado()
+        jogadas = bitboard.jogadas
+
+        vencedoras = self.vence_agora(posicao, mascara)
+        for coluna, mascara_coluna in self.colunas_ordenadas:
+            if vencedoras & mascara_coluna:
+                return (self.casas + 1 - jogadas) // 2, coluna
+
+        pontuacao = self.pontuar(posicao, mascara, jogadas)
+        proximas = self.jogaveis_sem_perder(posicao, mascara)
+        if not proximas:
+            # Qualquer jogada perde no lance seguinte
+            proximas = self.jogaveis(mascara)
+            return pontuacao, self.coluna_do_movimento(
+                self.ordenar(posicao, mascara, proximas)[0]
+            )
+
+        # Uma sondagem por jogada basta para achar uma que garante a pontuação
+        movimentos = self.ordenar(posicao, mascara, proximas)
+        for movimento in movimentos:
+            valor = -self.negamax(
+                posicao ^ mascara,
+                mascara | movimento,
+                jogadas + 1,
+                -pontuacao,
+                -pontuacao + 1,
+            )
+            if valor >= pontuacao:
+                return pontuacao, self.coluna_do_movimento(movimento)
+        return pontuacao, self.coluna_do_movimento(movimentos[0])
+
+    def coluna_do_movimento(self, movimento) -> int:
+        return (movimento.bit_length() - 1) // self.altura_coluna
+
+    def desfecho(self, pontuacao, jogadas) -> tuple[str, int]:
+        # Converte a pontuação em (resultado, lances até o fim) para quem joga
+        # com `jogadas` peças no tabuleiro. Os lances contam os dos dois lados,
+        # incluindo o que vence.
+        if pontuacao > 0:
+            lances_proprios = (self.casas + 1 - jogadas) // 2 - pontuacao + 1
+            return VITORIA, 2 * lances_proprios - 1
+        if pontuacao < 0:
+            lances_adversario = (self.casas - jogadas) // 2 + pontuacao + 1
+            return DERROTA, 2 * lances_adversario
+        return EMPATE, self.casas - jogadas
+
+
+def taxa_resolucao(posicoes=POSICOES_FINAIS, tempo_ms=10000, linhas=7, colunas=8):
+    # Quantas posições do conjunto fixo são resolvidas dentro do tempo por
+    # posição, com o resultado, os nós e o tempo de cada uma
+    relatorio = []
+    for posicao in posicoes:
+        bitboard = Bitboard(linhas, colunas, pecas=(1, -1))
+        peca = 1
+        for coluna in posicao:
+            bitboard.jogar(int(coluna), peca)
+            peca = -peca
+
+        solucionador = Solucionador(linhas, colunas)
+        inicio = time.perf_counter()
+        solucionador.prazo = inicio + tempo_ms / 1000
+        try:
+            pontuacao, coluna = solucionador.resolver(bitboard, peca)
+        except TempoEsgotado:
+            pontuacao = coluna = None
+        tempo = time.perf_counter() - inicio
+
+        linha = {
+            'posicao': posicao,
+            'livres': linhas * colunas - bitboard.jogadas,
+            'resolvida': pontuacao is not None,
+            'tempo_s': tempo,
+            'nos': solucionador.nos,
+            'nos_por_segundo': solucionador.nos / tempo if tempo else 0.0,
+        }
+        if pontuacao is not None:
+            resultado, distancia = solucionador.desfecho(pontuacao, bitboard.jogadas)
+            linha.update(
+                resultado=resultado,
+                distancia=distancia,
+                pontuacao=pontuacao,
+                coluna=coluna,
+            )
+        relatorio.append(linha)
+
+    resolvidas = sum(linha['resolvida'] for linha in relatorio)
+    return {
+        'tempo_limite_ms': tempo_ms,
+        'resolvidas': resolvidas,
+        'total': len(relatorio),
+        'taxa_resolucao': resolvidas / len(relatorio) if relatorio else 0.0,
+        'posicoes': relatorio,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Taxa de resolução exata em posições de final de jogo'
+    )
+    parser.add_argument('--tempo-ms', type=int, default=10000)
+    args = parser.parse_args()
+
+    print(json.dumps(taxa_resolucao(tempo_ms=args.tempo_ms), indent=2))
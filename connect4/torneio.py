@@ -0,0 +1,260 @@
+import argparse
+import importlib
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from connect4.backend import Connect4
+from connect4.instrumentacao import percentil, valor_json
+
+# Configurações padrão: argumentos de Connect4 por nome
+CONFIGURACOES = {
+    'minimax_3': {'ply': 3},
+    'alpha_beta_5': {'ply': 5, 'usar_alpha_beta': True},
+}
+PLIES_ABERTURA = 2
+# Partidas na fila do pool por trabalhador; o resto espera para ser enviado,
+# então a memória não cresce com o tamanho do torneio
+PARTIDAS_POR_TRABALHADOR = 4
+Z_95 = 1.96
+
+
+def _criar_motor(config):
+    # `pontuar_janela` pode vir como 'modulo:funcao', para que a configuração
+    # caiba num arquivo JSON
+    config = dict(config)
+    funcao = config.get('pontuar_janela')
+    if isinstance(funcao, str):
+        modulo, nome = funcao.split(':')
+        config['pontuar_janela'] = getattr(importlib.import_module(modulo), nome)
+    return Connect4(**config)
+
+
+def sortear_abertura(semente, linhas=7, colunas=8, plies=PLIES_ABERTURA):
+    # Jogadas aleatórias que não terminam a partida
+    gerador = random.Random(semente)
+    jogo = Connect4(linhas, colunas, limite_solucionador=None)
+    abertura = []
+    peca = 1
+    while len(abertura) < plies:
+        coluna = gerador.choice(jogo.get_movimentos_validos())
+        jogo.realizar_jogada(coluna, peca)
+        if jogo.movimento_ganhador(peca):
+            jogo.retornar_movimento(coluna)
+            continue
+        abertura.append(coluna)
+        peca = -peca
+    return abertura
+
+
+def jogar_partida(partida, participante_a, participante_b, abertura, a_comeca):
+    # Cada participante é (nome, configuração do motor). Cada motor vê o
+    # próprio tabuleiro, em que ele é a IA (-1) e o outro é o jogador (1).
+    # Devolve o registro completo da partida.
+    nome_a, config_a = participante_a
+    nome_b, config_b = participante_b
+    with _criar_motor(config_a) as motor_a, _criar_motor(config_b) as motor_b:
+        motores = {nome_a: motor_a, nome_b: motor_b}
+        ordem = [nome_a, nome_b] if a_comeca else [nome_b, nome_a]
+
+        jogadas = []
+        tempos_ms = []
+        vencedor = None
+        inicio = time.perf_counter()
+        for indice, coluna in enumerate(abertura):
+            for nome, motor in motores.items():
+                motor.realizar_jogada(coluna, -1 if nome == ordem[indice % 2] else 1)
+            jogadas.append(coluna)
+
+        casas = motor_a.linhas * motor_a.colunas
+        while len(jogadas) < casas:
+            nome = ordem[len(jogadas) % 2]
+            inicio_jogada = time.perf_counter()
+            coluna = motores[nome].escolher_jogada()
+            tempos_ms.append((time.perf_counter() - inicio_jogada) * 1000)
+            for outro, motor in motores.items():
+                motor.realizar_jogada(coluna, -1 if outro == nome else 1)
+            jogadas.append(coluna)
+            if motores[nome].movimento_ganhador(-1):
+                vencedor = nome
+                break
+
+    return {
+        'partida': partida,
+        'primeiro': ordem[0],
+        'segundo': ordem[1],
+        'abertura': abertura,
+        'jogadas': jogadas,
+        'tempos_ms': tempos_ms,
+        'vencedor': vencedor,
+        'duracao_s': time.perf_counter() - inicio,
+    }
+
+
+def _elo(pontuacao):
+    if pontuacao <= 0:
+        return -math.inf
+    if pontuacao >= 1:
+        return math.inf
+    return -400 * math.log10(1 / pontuacao - 1)
+
+
+def resumo_confronto(vitorias, empates, derrotas) -> dict:
+    # Diferença de Elo do primeiro nome com intervalo de 95%, a partir do
+    # desvio padrão da pontuação por partida
+    partidas = vitorias + empates + derrotas
+    pontuacao = (vitorias + empates / 2) / partidas
+    variancia = (
+        vitorias * (1 - pontuacao) ** 2
+        + empates * (0.5 - pontuacao) ** 2
+        + derrotas * pontuacao**2
+    ) / partidas
+    margem = Z_95 * math.sqrt(variancia / partidas)
+    return {
+        'vitorias': vitorias,
+        'empates': empates,
+        'derrotas': derrotas,
+        'pontuacao': pontuacao,
+        # Sem nenhuma vitória ou derrota o Elo é infinito, que o JSON não tem
+        'elo': valor_json(_elo(pontuacao)),
+        'elo_min': valor_json(_elo(pontuacao - margem)),
+        'elo_max': valor_json(_elo(pontuacao + margem)),
+    }
+
+
+def torneio(  # noqa: PLR0913
+    saida,
+    configuracoes=CONFIGURACOES,
+    *,
+    partidas=100,
+    trabalhadores=None,
+    plies_abertura=PLIES_ABERTURA,
+    semente=0,
+    progresso=None,
+):
+    # Todos contra todos. Cada abertura sorteada é jogada duas vezes, trocando
+    # quem começa. Os registros vão para `saida` (uma partida JSON por linha)
+    # na ordem em que as partidas terminam.
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    confrontos = list(itertools.combinations(configuracoes, 2))
+
+    def tarefas():
+        for indice_confronto, (nome_a, nome_b) in enumerate(confrontos):
+            linhas = configuracoes[nome_a].get('linhas', 7)
+            colunas = configuracoes[nome_a].get('colunas', 8)
+            for numero in range(partidas):
+                abertura = sortear_abertura(
+                    semente + numero // 2, linhas, colunas, plies_abertura
+                )
+                yield (
+                    indice_confronto * partidas + numero,
+                    (nome_a, configuracoes[nome_a]),
+                    (nome_b, configuracoes[nome_b]),
+                    abertura,
+                    numero % 2 == 0,
+                )
+
+    placar = {confronto: [0, 0, 0] for confronto in confrontos}
+    latencias = {nome: [] for nome in configuracoes}
+    concluidas = 0
+    inicio = time.perf_counter()
+    with (
+        open(saida, 'w', encoding='utf-8') as arquivo,
+        ProcessPoolExecutor(trabalhadores) as executor,
+    ):
+        pendentes = set()
+        fila = tarefas()
+        while True:
+            for tarefa in itertools.islice(
+                fila, trabalhadores * PARTIDAS_POR_TRABALHADOR - len(pendentes)
+            ):
+                pendentes.add(executor.submit(jogar_partida, *tarefa))
+            if not pendentes:
+                break
+            prontas, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in prontas:
+                registro = futuro.result()
+                arquivo.write(json.dumps(registro) + '\n')
+                arquivo.flush()
+
+                nomes = (registro['primeiro'], registro['segundo'])
+                confronto = nomes if nomes in placar else nomes[::-1]
+                if registro['vencedor'] is None:
+                    placar[confronto][1] += 1
+                elif registro['vencedor'] == confronto[0]:
+                    placar[confronto][0] += 1
+                else:
+                    placar[confronto][2] += 1
+                # Os tempos começam depois da abertura
+                vez = len(registro['abertura'])
+                for indice, tempo in enumerate(registro['tempos_ms'], vez):
+                    latencias[nomes[indice % 2]].append(tempo)
+
+                concluidas += 1
+                if progresso is not None:
+                    progresso(concluidas)
+    tempo = time.perf_counter() - inicio
+
+    todas = [latencia for lista in latencias.values() for latencia in lista]
+    return {
+        'partidas': concluidas,
+        'tempo_s': tempo,
+        'partidas_por_segundo': concluidas / tempo if tempo else 0.0,
+        'latencia_media_ms': sum(todas) / len(todas) if todas else 0.0,
+        'latencia_p99_ms': percentil(todas, 0.99),
+        'latencia_por_configuracao': {
+            nome: {
+                'media_ms': sum(lista) / len(lista) if lista else 0.0,
+                'p99_ms': percentil(lista, 0.99),
+            }
+            for nome, lista in latencias.items()
+        },
+        'confrontos': [
+            {'a': nome_a, 'b': nome_b, **resumo_confronto(*placar[nome_a, nome_b])}
+            for nome_a, nome_b in confrontos
+            if sum(placar[nome_a, nome_b])
+        ],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Torneio entre configurações da IA, sem interface'
+    )
+    parser.add_argument('saida', help='arquivo JSONL com os registros das partidas')
+    parser.add_argument(
+        '--configuracoes',
+        help='arquivo JSON {nome: argumentos de Connect4}',
+    )
+    parser.add_argument('--partidas', type=int, default=100, help='por confronto')
+    parser.add_argument('--trabalhadores', type=int)
+    parser.add_argument('--plies-abertura', type=int, default=PLIES_ABERTURA)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    configuracoes = CONFIGURACOES
+    if args.configuracoes:
+        with open(args.configuracoes, encoding='utf-8') as arquivo:
+            configuracoes = json.load(arquivo)
+
+    print(
+        json.dumps(
+            torneio(
+                args.saida,
+                configuracoes,
+                partidas=args.partidas,
+                trabalhadores=args.trabalhadores,
+                plies_abertura=args.plies_abertura,
+                semente=args.semente,
+                progresso=lambda n: print(
+                    f'\r{n} partidas', end='', file=sys.stderr, flush=True
+                ),
+            ),
+            indent=2,
+        )
+    )
@@ -0,0 +1,112 @@
+EXATO = 0
+LIMITE_INFERIOR = 1
+LIMITE_SUPERIOR = 2
+
+# Estimativa do custo de uma entrada no CPython: a tupla de 6 campos mais a
+# chave de 64 bits e o valor (int grande ou float) que ela referencia.
+BYTES_POR_ENTRADA = 160
+# Misturado ao hash Zobrist quando é a vez do maximizador: as mesmas peças com
+# o outro lado a jogar são outra posição, com outro valor
+LADO_MAXIMIZADOR = 0x9E3779B97F4A7C15
+
+
+def chave_posicao(hash_zobrist, maximizar) -> int:
+    # Chave da tabela para a posição com `hash_zobrist` e o lado que joga
+    return hash_zobrist ^ LADO_MAXIMIZADOR if maximizar else hash_zobrist
+
+
+def entrada_decide(entrada, profundidade, alpha, beta) -> bool:
+    # Se a entrada, buscada ao menos até `profundidade`, já dá o valor do nó na
+    # janela (alpha, beta): é exata ou é um limite que fica fora da janela
+    if entrada is None or entrada[1] < profundidade:
+        return False
+    valor, tipo = entrada[2], entrada[3]
+    if tipo == LIMITE_INFERIOR:
+        return valor >= beta
+    if tipo == LIMITE_SUPERIOR:
+        return valor <= alpha
+    return True
+
+
+def tipo_entrada(valor, alpha, beta) -> int:
+    # Um valor fora da janela (alpha, beta) da busca é só um limite
+    if valor <= alpha:
+        return LIMITE_SUPERIOR
+    if valor >= beta:
+        return LIMITE_INFERIOR
+    return EXATO
+
+
+class TabelaTransposicao:
+    # Tabela de tamanho fixo indexada pelo hash Zobrist da posição. Cada entrada
+    # é a tupla (chave, profundidade, valor, tipo, melhor_movimento, geracao).
+    def __init__(self, memoria_mb: float = 16):
+        self.tamanho = max(1, int(memoria_mb * 1024 * 1024) // BYTES_POR_ENTRADA)
+        self.entradas = [None] * self.tamanho
+        self.geracao = 0
+        self.ocupadas = 0
+
+        self.acertos = 0
+        self.falhas = 0
+        self.colisoes = 0
+        self.gravacoes = 0
+        self.substituicoes = 0
+
+    def nova_busca(self):
+        # Entradas de buscas anteriores continuam válidas, mas passam a ceder
+        # lugar para as da busca atual (envelhecimento).
+        self.geracao += 1
+
+    def limpar(self):
+        self.entradas = [None] * self.tamanho
+        self.ocupadas = 0
+
+    def consultar(self, chave):
+        entrada = self.entradas[chave % self.tamanho]
+        if entrada is None:
+            self.falhas += 1
+            return None
+        if entrada[0] != chave:
+            self.colisoes += 1
+            return None
+        self.acertos += 1
+        return entrada
+
+    def gravar(self, chave, profundidade, valor, tipo, melhor_movimento):
+        indice = chave % self.tamanho
+        atual = self.entradas[indice]
+        if atual is None:
+            self.ocupadas += 1
+        elif atual[0] != chave:
+            # Substituição preferindo profundidade: só sobrescreve uma posição
+            # diferente se ela for de uma busca antiga ou mais rasa.
+            if atual[5] == self.geracao and atual[1] > profundidade:
+                return
+            self.substituicoes += 1
+        elif melhor_movimento is None:
+            melhor_movimento = atual[4]
+
+        self.gravacoes += 1
+        self.entradas[indice] = (
+            chave,
+            profundidade,
+            valor,
+            tipo,
+            melhor_movimento,
+            self.geracao,
+        )
+
+    def estatisticas(self) -> dict:
+        consultas = self.acertos + self.falhas + self.colisoes
+        return {
+            'tamanho': self.tamanho,
+            'ocupadas': self.ocupadas,
+            'ocupacao': self.ocupadas / self.tamanho,
+            'memoria_estimada_mb': self.tamanho * BYTES_POR_ENTRADA / (1024 * 1024),
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'colisoes': self.colisoes,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            'gravacoes': self.gravacoes,
+            'substituicoes': self.substituicoes,
+        }
@@ -0,0 +1,92 @@
+import json
+import random
+import subprocess
+import sys
+
+import pytest
+
+from connect4.ajuste import ESCALA, ajustar, extrair, montar_pesos
+from connect4.backend import Connect4
+from connect4.main import Tabuleiro
+from connect4.partidas import EMPATE, PRIMEIRO, SEGUNDO, gravar_partida
+
+CONFIGURACAO = {'profundidade': 4, 'tempo_ms': None}
+PARTIDAS = 30
+ITERACOES = 5
+
+
+def _gravar_partidas(caminho, linhas, colunas, partidas=PARTIDAS):
+    # Partidas aleatórias até a vitória ou o tabuleiro cheio
+    gerador = random.Random(linhas * colunas)
+    for _ in range(partidas):
+        jogo = Connect4(linhas, colunas, limite_solucionador=None)
+        jogadas = []
+        resultado = EMPATE
+        peca = 1
+        while movimentos := jogo.get_movimentos_validos():
+            coluna = gerador.choice(movimentos)
+            jogo.realizar_jogada(coluna, peca)
+            jogadas.append(coluna)
+            if jogo.movimento_ganhador(peca):
+                resultado = PRIMEIRO if peca == 1 else SEGUNDO
+                break
+            peca = -peca
+        gravar_partida(
+            caminho,
+            linhas,
+            colunas,
+            jogadas,
+            [0] * len(jogadas),
+            resultado,
+            CONFIGURACAO,
+        )
+
+
+def test_ajuste_usa_o_tamanho_das_partidas(tmp_path):
+    partidas = tmp_path / 'partidas.c4p'
+    saida = tmp_path / 'pesos.json'
+    _gravar_partidas(partidas, 6, 7)
+    # Os padrões --linhas/--colunas (7x8) são só para os JSONL
+    subprocess.run(
+        [
+            sys.executable,
+            '-m',
+            'connect4.ajuste',
+            str(partidas),
+            '--saida',
+            str(saida),
+            '--iteracoes',
+            str(ITERACOES),
+        ],
+        capture_output=True,
+        check=True,
+    )
+    pesos = json.loads(saida.read_text())
+    assert (pesos['linhas'], pesos['colunas']) == (6, 7)
+
+    # O tabuleiro da interface carrega os pesos e o motor 7x8 os recusa
+    Tabuleiro(str(saida))
+    with pytest.raises(ValueError, match='ajustados para 6x7'):
+        Connect4(pesos=str(saida))
+
+
+def test_partidas_de_tamanhos_diferentes_sao_recusadas(tmp_path):
+    pequenas = tmp_path / 'pequenas.c4p'
+    grandes = tmp_path / 'grandes.c4p'
+    _gravar_partidas(pequenas, 6, 7, partidas=2)
+    _gravar_partidas(grandes, 7, 8, partidas=2)
+    with pytest.raises(ValueError, match='ajuste cada tamanho'):
+        extrair([pequenas, grandes])
+
+
+def test_perda_cai_a_cada_passo(tmp_path):
+    partidas = tmp_path / 'partidas.c4p'
+    _gravar_partidas(partidas, 6, 7)
+    x, y, quantidade, tamanho = extrair([partidas])
+    assert quantidade == PARTIDAS
+    assert len(x) == len(y)
+
+    pesos, historico = ajustar(x, y, ITERACOES)
+    assert all(depois <= antes for antes, depois in zip(historico, historico[1:]))
+    assert historico[-1] < historico[0]
+    assert montar_pesos(pesos, *tamanho)['centro'] == round(pesos[-1] * ESCALA)
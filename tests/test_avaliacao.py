@@ -0,0 +1,154 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from connect4.avaliacao import AvaliadorIncremental, PontuacaoAjustada, gerar_janelas
+from connect4.backend import Connect4
+from connect4.lote import AvaliadorLote
+from connect4.main import PECA_IA, PECA_JOGADOR, Tabuleiro
+
+BONUS_CENTRO = 5
+
+
+def _avaliacao_completa(tabuleiro, pontuar_janela, peca_centro, bonus_centro):
+    # Soma de todas as janelas refeita do zero a partir da lista de listas
+    linhas, colunas = len(tabuleiro), len(tabuleiro[0])
+    pontos = 0
+    vitorias = derrotas = False
+    for casas in gerar_janelas(linhas, colunas):
+        pecas = [tabuleiro[linha][coluna] for linha, coluna in casas]
+        valor = pontuar_janela(pecas.count(1), pecas.count(-1))
+        if valor == math.inf:
+            vitorias = True
+        elif valor == -math.inf:
+            derrotas = True
+        else:
+            pontos += valor
+    if vitorias and derrotas:
+        return math.nan
+    if vitorias:
+        return math.inf
+    if derrotas:
+        return -math.inf
+    centro = [linha[colunas // 2] for linha in tabuleiro]
+    return pontos + centro.count(peca_centro) * bonus_centro
+
+
+def _mesmo_valor(a, b):
+    return (math.isnan(a) and math.isnan(b)) or a == b
+
+
+def _conferir_partidas(criar_jogo, pontuar_janela, bonus_centro, partidas=20):
+    # Joga partidas aleatórias até o fim e as desfaz, comparando a avaliação
+    # incremental com a completa a cada jogada
+    gerador = random.Random(5)
+    for _ in range(partidas):
+        jogo = criar_jogo()
+        jogadas = []
+        peca = 1
+        while movimentos := jogo.get_movimentos_validos():
+            coluna = gerador.choice(movimentos)
+            jogo.realizar_jogada(coluna, peca)
+            jogadas.append(coluna)
+            peca = -peca
+            assert _mesmo_valor(
+                jogo.avaliar_tabuleiro(),
+                _avaliacao_completa(
+                    jogo.tabuleiro, pontuar_janela, -1, bonus_centro
+                ),
+            )
+
+        # Desfazer passa pelos mesmos valores na volta
+        while jogadas:
+            jogo.retornar_movimento(jogadas.pop())
+            assert _mesmo_valor(
+                jogo.avaliar_tabuleiro(),
+                _avaliacao_completa(
+                    jogo.tabuleiro, pontuar_janela, -1, bonus_centro
+                ),
+            )
+
+
+def test_incremental_igual_a_avaliacao_completa():
+    _conferir_partidas(
+        lambda: Connect4(limite_solucionador=None),
+        Connect4.pontuar_janela,
+        BONUS_CENTRO,
+    )
+
+
+def _pesos(linhas, colunas):
+    gerador = random.Random(11)
+    return {
+        'linhas': linhas,
+        'colunas': colunas,
+        'janelas': [
+            [gerador.randrange(-50, 50) for _ in range(5 - jogador)]
+            for jogador in range(5)
+        ],
+        'centro': 7,
+    }
+
+
+def test_incremental_com_pesos_ajustados():
+    pesos = _pesos(7, 8)
+    _conferir_partidas(
+        lambda: Connect4(limite_solucionador=None, pesos=pesos),
+        PontuacaoAjustada(pesos),
+        pesos['centro'],
+    )
+
+
+def test_pesos_de_outro_tabuleiro_sao_recusados():
+    with pytest.raises(ValueError, match='janelas'):
+        Connect4(6, 7, pesos=_pesos(7, 8))
+
+
+def test_avaliador_sem_pecas_vale_so_as_janelas_vazias():
+    avaliador = AvaliadorIncremental(6, 7, lambda jogador, ia: 1)
+    assert avaliador.valor() == len(gerar_janelas(6, 7))
+
+
+def test_copia_do_avaliador_e_independente():
+    avaliador = AvaliadorIncremental(6, 7, Connect4.pontuar_janela)
+    copia = avaliador.copiar()
+    copia.jogar(5, 3, 1)
+    assert avaliador.valor() != copia.valor()
+    copia.desfazer(5, 3, 1)
+    assert avaliador.valor() == copia.valor()
+
+
+def test_avaliador_em_lote_igual_ao_incremental():
+    gerador = random.Random(8)
+    jogo = Connect4(limite_solucionador=None)
+    lote = AvaliadorLote.do_motor(jogo.avaliador)
+    tabuleiros, esperados = [], []
+    peca = 1
+    while (movimentos := jogo.get_movimentos_validos()) and not (
+        jogo.movimento_ganhador(1) or jogo.movimento_ganhador(-1)
+    ):
+        jogo.realizar_jogada(gerador.choice(movimentos), peca)
+        peca = -peca
+        tabuleiros.append([linha[:] for linha in jogo.tabuleiro])
+        esperados.append(jogo.avaliar_tabuleiro())
+    assert list(lote.avaliar(np.array(tabuleiros))) == esperados
+
+
+def test_avaliador_em_lote_da_interface():
+    # Peças 1 e 2 e o centro contado para a IA, como no Tabuleiro da janela
+    gerador = random.Random(9)
+    tabuleiro = Tabuleiro()
+    lote = AvaliadorLote.do_motor(tabuleiro.avaliador)
+    tabuleiros, esperados = [], []
+    peca = PECA_JOGADOR
+    while (movimentos := tabuleiro.get_movimentos_validos()) and not (
+        tabuleiro.movimento_ganhador(PECA_JOGADOR)
+        or tabuleiro.movimento_ganhador(PECA_IA)
+    ):
+        tabuleiro.jogar(gerador.choice(movimentos), peca)
+        peca = PECA_IA if peca == PECA_JOGADOR else PECA_JOGADOR
+        tabuleiros.append(np.copy(tabuleiro.tabuleiro))
+        esperados.append(tabuleiro.avaliador.valor())
+    assert list(lote.avaliar(np.array(tabuleiros))) == esperados
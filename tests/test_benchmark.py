@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from connect4.benchmark import BASE, PROFUNDIDADES, comparar
+from connect4.corpus import VERSAO_CORPUS
+
+LIMITE = 0.10
+
+
+def _resultado(**metricas):
+    return {
+        'versao_corpus': VERSAO_CORPUS,
+        'profundidades': dict(PROFUNDIDADES),
+        'metricas': metricas,
+    }
+
+
+def _pioradas(atual, base):
+    return [regressao['metrica'] for regressao in comparar(atual, base, LIMITE)]
+
+
+def test_limite_e_relativo_a_base():
+    base = _resultado(**{'a/nos_por_segundo': 1000.0, 'b/tempo_s': 2.0})
+    dentro = _resultado(**{'a/nos_por_segundo': 950.0, 'b/tempo_s': 2.1})
+    fora = _resultado(**{'a/nos_por_segundo': 850.0, 'b/tempo_s': 2.5})
+    assert _pioradas(dentro, base) == []
+    assert _pioradas(fora, base) == ['a/nos_por_segundo', 'b/tempo_s']
+
+
+def test_melhoras_e_contagens_de_nos_nao_sao_regressao():
+    base = _resultado(**{'a/nos_por_segundo': 1000.0, 'b/tempo_s': 2.0, 'c/nos': 10})
+    atual = _resultado(**{
+        'a/nos_por_segundo': 5000.0,
+        'b/tempo_s': 0.5,
+        'c/nos': 99,
+    })
+    assert _pioradas(atual, base) == []
+
+
+def test_modulo_pesado_a_mais_e_regressao():
+    base = _resultado(**{'importacao/x/modulos_pesados': 0})
+    atual = _resultado(**{'importacao/x/modulos_pesados': 1})
+    assert _pioradas(atual, base) == ['importacao/x/modulos_pesados']
+
+
+def test_base_de_outro_corpus_e_recusada():
+    base = _resultado()
+    base['versao_corpus'] = VERSAO_CORPUS - 1
+    with pytest.raises(ValueError, match='corpus da base'):
+        comparar(_resultado(), base)
+
+
+def test_base_do_repositorio_e_do_corpus_atual():
+    with open(BASE, encoding='utf-8') as arquivo:
+        base = json.load(arquivo)
+    assert base['versao_corpus'] == VERSAO_CORPUS
+    assert base['profundidades'] == PROFUNDIDADES
+    assert comparar(base, base) == []
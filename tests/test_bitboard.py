@@ -0,0 +1,129 @@
+import random
+
+import pytest
+
+from connect4.backend import Connect4
+from connect4.bitboard import Bitboard
+
+DIRECOES = ((0, 1), (1, 0), (1, 1), (-1, 1))
+# Colunas que completam a linha de baixo nas posições táticas
+VITORIA_IA = 4
+BLOQUEIO = 3
+
+
+def _quatro_em_linha(matriz, peca):
+    # Verificação direta sobre a lista de listas, casa a casa
+    linhas, colunas = len(matriz), len(matriz[0])
+    for linha in range(linhas):
+        for coluna in range(colunas):
+            for delta_linha, delta_coluna in DIRECOES:
+                casas = [
+                    (linha + i * delta_linha, coluna + i * delta_coluna)
+                    for i in range(4)
+                ]
+                if all(
+                    0 <= lin < linhas
+                    and 0 <= col < colunas
+                    and matriz[lin][col] == peca
+                    for lin, col in casas
+                ):
+                    return True
+    return False
+
+
+@pytest.mark.parametrize(('linhas', 'colunas'), [(6, 7), (7, 8), (4, 5)])
+def test_vitoria_do_bitboard_igual_a_da_lista(linhas, colunas):
+    gerador = random.Random(linhas * colunas)
+    for _ in range(30):
+        jogo = Connect4(linhas, colunas, limite_solucionador=None)
+        peca = 1
+        # Continua depois das vitórias para cobrir tabuleiros com várias linhas
+        while movimentos := jogo.get_movimentos_validos():
+            jogo.realizar_jogada(gerador.choice(movimentos), peca)
+            for lado in (1, -1):
+                assert jogo.movimento_ganhador(lado) == _quatro_em_linha(
+                    jogo.tabuleiro, lado
+                )
+            peca = -peca
+
+
+def test_de_matriz_reproduz_as_pecas_e_o_hash():
+    gerador = random.Random(3)
+    jogo = Connect4(6, 7, limite_solucionador=None)
+    jogo.carregar_jogadas([gerador.randrange(7) for _ in range(20)])
+    bitboard = Bitboard.de_matriz(jogo.tabuleiro)
+    assert bitboard.mascaras == jogo.bitboard.mascaras
+    assert bitboard.alturas == jogo.bitboard.alturas
+    assert all(
+        bitboard.peca_em(linha, coluna) == jogo.tabuleiro[linha][coluna]
+        for linha in range(6)
+        for coluna in range(7)
+    )
+
+
+def test_desfazer_volta_ao_hash_anterior():
+    bitboard = Bitboard(6, 7)
+    hashes = [bitboard.hash]
+    jogadas = [3, 3, 2, 4, 3, 0, 6]
+    peca = 1
+    for coluna in jogadas:
+        bitboard.jogar(coluna, peca)
+        hashes.append(bitboard.hash)
+        peca = -peca
+    for coluna in reversed(jogadas):
+        hashes.pop()
+        bitboard.desfazer(coluna)
+        assert bitboard.hash == hashes[-1]
+    assert bitboard.ocupado() == 0
+
+
+def _ameacas_por_simulacao(jogo, peca):
+    # Colunas de vitória, de bloqueio e perdedoras, jogando cada coluna e
+    # procurando quatro em linha na lista de listas
+    vitorias, bloqueios, perdedoras = [], [], []
+    for coluna in jogo.get_movimentos_validos():
+        for lado, colunas in ((peca, vitorias), (-peca, bloqueios)):
+            jogo.realizar_jogada(coluna, lado)
+            if _quatro_em_linha(jogo.tabuleiro, lado):
+                colunas.append(coluna)
+            jogo.retornar_movimento(coluna)
+
+        jogo.realizar_jogada(coluna, peca)
+        if jogo.validar_movimento(coluna):
+            jogo.realizar_jogada(coluna, -peca)
+            if _quatro_em_linha(jogo.tabuleiro, -peca):
+                perdedoras.append(coluna)
+            jogo.retornar_movimento(coluna)
+        jogo.retornar_movimento(coluna)
+    return vitorias, bloqueios, perdedoras
+
+
+@pytest.mark.parametrize(('linhas', 'colunas'), [(6, 7), (7, 8)])
+def test_ameacas_iguais_a_simulacao(linhas, colunas):
+    gerador = random.Random(linhas + colunas)
+    for _ in range(4):
+        jogo = Connect4(linhas, colunas, limite_solucionador=None)
+        peca = 1
+        while movimentos := jogo.get_movimentos_validos():
+            coluna = gerador.choice(movimentos)
+            jogo.realizar_jogada(coluna, peca)
+            if jogo.movimento_ganhador(peca):
+                break
+            for lado in (1, -1):
+                mascaras = jogo.bitboard.ameacas(lado)
+                assert [
+                    jogo.bitboard.colunas_da_mascara(mascara) for mascara in mascaras
+                ] == list(_ameacas_por_simulacao(jogo, lado))
+            peca = -peca
+
+
+def test_ia_vence_antes_de_bloquear():
+    # A IA (-1) tem três na linha de baixo, assim como o jogador
+    jogo = Connect4(limite_solucionador=None)
+    jogo.carregar_jogadas([0, 7, 1, 6, 2, 5])
+    assert jogo.escolher_jogada() == VITORIA_IA
+
+    # Sem vitória própria, bloqueia a do jogador
+    jogo = Connect4(limite_solucionador=None)
+    jogo.carregar_jogadas([0, 7, 1, 7, 2, 5])
+    assert jogo.escolher_jogada() == BLOQUEIO
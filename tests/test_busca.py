@@ -0,0 +1,119 @@
+import math
+import threading
+import time
+
+import pytest
+
+from connect4 import backend
+from connect4.backend import Connect4
+from connect4.busca import (
+    BuscaCancelada,
+    TempoEsgotado,
+    aprofundamento_iterativo,
+    conferir_relogio,
+)
+from connect4.main import IA, Tabuleiro
+
+TEMPO_MS = 100
+# Folga para a iteração em andamento terminar de conferir o relógio
+TOLERANCIA_S = 1.0
+# Profundidade em que as buscas falsas estouram o tempo ou se resolvem
+PROFUNDIDADE_LIMITE = 3
+PROFUNDIDADE_PVS = 5
+
+
+def test_aprofundamento_devolve_a_ultima_iteracao_completa():
+    prazos = []
+
+    def buscar(profundidade, prazo):
+        prazos.append(prazo)
+        if profundidade == PROFUNDIDADE_LIMITE:
+            raise TempoEsgotado
+        return profundidade
+
+    assert aprofundamento_iterativo(buscar, 10_000, 10) == PROFUNDIDADE_LIMITE - 1
+    # A primeira iteração roda sem prazo para sempre haver uma jogada
+    assert prazos[0] is None
+    assert all(prazo is not None for prazo in prazos[1:])
+
+
+def test_aprofundamento_para_quando_o_resultado_esta_resolvido():
+    profundidades = []
+
+    def buscar(profundidade, _):
+        profundidades.append(profundidade)
+        return profundidade
+
+    aprofundamento_iterativo(
+        buscar, 10_000, 10, resolvido=lambda valor: valor == PROFUNDIDADE_LIMITE
+    )
+    assert profundidades == list(range(1, PROFUNDIDADE_LIMITE + 1))
+
+
+def test_conferir_relogio():
+    conferir_relogio(None, None)
+    with pytest.raises(TempoEsgotado):
+        conferir_relogio(None, time.perf_counter() - 1)
+    cancelamento = threading.Event()
+    cancelamento.set()
+    with pytest.raises(BuscaCancelada):
+        conferir_relogio(cancelamento, None)
+
+
+def test_motor_respeita_o_tempo():
+    jogo = Connect4(ply=40, usar_alpha_beta=True, tempo_ms=TEMPO_MS)
+    jogo.carregar_jogadas([3, 4])
+    inicio = time.perf_counter()
+    _, coluna = jogo.buscar()
+    assert time.perf_counter() - inicio < TEMPO_MS / 1000 + TOLERANCIA_S
+    assert jogo.validar_movimento(coluna)
+
+
+def test_ia_da_interface_respeita_o_tempo():
+    ia = IA(profundidade=40, usar_poda=True, tempo_ms=TEMPO_MS)
+    inicio = time.perf_counter()
+    coluna, _ = ia.buscar(Tabuleiro())
+    assert time.perf_counter() - inicio < TEMPO_MS / 1000 + TOLERANCIA_S
+    assert coluna is not None
+
+
+def test_busca_cancelada_nao_devolve_jogada():
+    cancelamento = threading.Event()
+    cancelamento.set()
+    jogo = Connect4(ply=8, usar_alpha_beta=True)
+    with pytest.raises(BuscaCancelada):
+        jogo.buscar(cancelamento=cancelamento)
+    # O tabuleiro volta ao estado anterior à busca
+    assert jogo.bitboard.jogadas == 0
+    assert jogo.cancelamento is None
+
+
+@pytest.mark.parametrize('janela', [backend.JANELA_ASPIRACAO, 1])
+@pytest.mark.parametrize('jogadas', [[3], [3, 4, 3], [3, 3, 4, 2, 5]])
+def test_pvs_e_aspiracao_dao_o_valor_da_alpha_beta(monkeypatch, janela, jogadas):
+    # Com janela 1 toda aspiração falha e a raiz é buscada de novo
+    monkeypatch.setattr(backend, 'JANELA_ASPIRACAO', janela)
+    for profundidade in range(1, PROFUNDIDADE_PVS + 1):
+        alpha_beta = Connect4(usar_alpha_beta=True, limite_solucionador=None)
+        alpha_beta.carregar_jogadas(jogadas)
+        esperado, _ = alpha_beta.minimax(profundidade, -math.inf, math.inf, True)
+
+        # O PVS aprofunda na mesma posição, com a aspiração centrada no valor
+        # da iteração anterior
+        pvs = Connect4(usar_pvs=True, limite_solucionador=None)
+        pvs.carregar_jogadas(jogadas)
+        for atual in range(1, profundidade + 1):
+            valor, coluna = pvs.buscar_profundidade(atual)
+        assert valor == esperado
+        assert pvs.validar_movimento(coluna)
+
+
+def test_poda_da_interface_nao_muda_o_valor():
+    tabuleiro = Tabuleiro()
+    for coluna in (3, 3, 4):
+        tabuleiro.jogar(coluna, 1 if tabuleiro.bitboard.jogadas % 2 == 0 else 2)
+    valores = [
+        IA(PROFUNDIDADE_PVS - 1, usar_poda=usar_poda).buscar(tabuleiro)[1]
+        for usar_poda in (False, True)
+    ]
+    assert valores[0] == valores[1]
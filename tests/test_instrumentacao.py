@@ -0,0 +1,69 @@
+import pytest
+
+from connect4.backend import Connect4
+from connect4.instrumentacao import EstatisticasBusca
+from connect4.main import IA, Tabuleiro
+
+PROFUNDIDADE = 4
+INTERVALO_NOS = 100
+
+
+def _buscar_backend(estatisticas=None):
+    jogo = Connect4(ply=PROFUNDIDADE, usar_alpha_beta=True, limite_solucionador=None)
+    jogo.carregar_jogadas([3, 4])
+    resultado = jogo.buscar(estatisticas=estatisticas)
+    return resultado[0], resultado[1], jogo.nos
+
+
+def _buscar_interface(estatisticas=None):
+    ia = IA(PROFUNDIDADE, usar_poda=True)
+    tabuleiro = Tabuleiro()
+    tabuleiro.jogar(3, 1)
+    coluna, valor = ia.buscar(tabuleiro, estatisticas=estatisticas)
+    return valor, coluna, ia.nos
+
+
+@pytest.mark.parametrize('buscar', [_buscar_backend, _buscar_interface])
+def test_estatisticas_da_busca(buscar):
+    iteracoes = []
+    progressos = []
+    estatisticas = EstatisticasBusca(
+        ao_iterar=lambda e: iteracoes.append(e.iteracoes[-1]['profundidade']),
+        ao_progresso=lambda e: progressos.append(e.nos),
+        intervalo_nos=INTERVALO_NOS,
+    )
+    valor, coluna, nos = buscar(estatisticas)
+
+    assert estatisticas.nos == nos
+    assert sum(estatisticas.nos_por_profundidade) == nos
+    assert len(estatisticas.nos_por_profundidade) == PROFUNDIDADE + 1
+    assert estatisticas.nos_por_profundidade[0] == 1
+    assert estatisticas.avaliacoes > 0
+    assert sum(estatisticas.cortes_por_indice) == estatisticas.cortes > 0
+    assert estatisticas.variacao_principal[0] == coluna
+    assert iteracoes == [PROFUNDIDADE]
+    assert estatisticas.iteracoes[-1]['valor'] == valor
+    assert progressos == list(range(INTERVALO_NOS, nos + 1, INTERVALO_NOS))
+    assert estatisticas.tempo_s > 0
+
+
+@pytest.mark.parametrize('buscar', [_buscar_backend, _buscar_interface])
+def test_estatisticas_nao_mudam_a_busca(buscar):
+    sem = buscar()
+    com = buscar(EstatisticasBusca())
+    # A coluna da interface é sorteada entre as empatadas
+    assert (sem[0], sem[2]) == (com[0], com[2])
+
+
+def test_fator_de_ramificacao_efetivo():
+    estatisticas = EstatisticasBusca()
+    assert estatisticas.fator_ramificacao_efetivo == 0.0
+    estatisticas.iniciar_iteracao()
+    estatisticas.nos = 8
+    estatisticas.concluir_iteracao(3, 0, 0, [0])
+    # Com uma iteração só: a raiz cúbica dos 8 nós
+    assert estatisticas.fator_ramificacao_efetivo == pytest.approx(2.0)
+    estatisticas.iniciar_iteracao()
+    estatisticas.nos += 40
+    estatisticas.concluir_iteracao(4, 0, 0, [0])
+    assert estatisticas.fator_ramificacao_efetivo == pytest.approx(5.0)
@@ -0,0 +1,86 @@
+import pytest
+
+from connect4.backend import Connect4
+from connect4.livro import MOTOR_INTERFACE, Livro, gerar_livro
+from connect4.main import IA, Tabuleiro
+
+LINHAS, COLUNAS, PLIES, PROFUNDIDADE = 5, 5, 3, 3
+
+
+@pytest.fixture(scope='module')
+def livro(tmp_path_factory):
+    caminho = tmp_path_factory.mktemp('livro') / 'livro.bin'
+    gerar_livro(caminho, LINHAS, COLUNAS, plies=PLIES, profundidade=PROFUNDIDADE)
+    livro = Livro(caminho)
+    yield livro
+    livro.fechar()
+
+
+@pytest.fixture(scope='module')
+def livro_interface(tmp_path_factory):
+    caminho = tmp_path_factory.mktemp('livro') / 'interface.bin'
+    gerar_livro(
+        caminho,
+        6,
+        7,
+        motor=MOTOR_INTERFACE,
+        plies=2,
+        profundidade=PROFUNDIDADE,
+    )
+    return caminho
+
+
+def _busca_nova(jogadas):
+    # Quem joga fica como a IA (-1) do motor, como na geração do livro
+    jogo = Connect4(LINHAS, COLUNAS, usar_alpha_beta=True)
+    jogo.carregar_jogadas(jogadas, -1 if len(jogadas) % 2 == 0 else 1)
+    return jogo, jogo.buscar_profundidade(PROFUNDIDADE)
+
+
+@pytest.mark.parametrize('jogadas', [[], [2], [0], [4], [2, 1], [1, 3]])
+def test_livro_devolve_o_valor_da_busca(livro, jogadas):
+    jogo, (valor, _) = _busca_nova(jogadas)
+    coluna, pontuacao = livro.consultar(jogo.bitboard, -1)
+    assert pontuacao == valor
+    assert jogo.validar_movimento(coluna)
+
+
+def test_posicao_espelhada_devolve_a_coluna_espelhada(livro):
+    jogo, _ = _busca_nova([0])
+    espelho, _ = _busca_nova([COLUNAS - 1])
+    coluna, pontuacao = livro.consultar(jogo.bitboard, -1)
+    assert livro.consultar(espelho.bitboard, -1) == (COLUNAS - 1 - coluna, pontuacao)
+
+
+def test_fora_do_livro_nao_devolve_nada(livro):
+    jogo, _ = _busca_nova([2, 2, 2])
+    assert livro.consultar(jogo.bitboard, -1) is None
+
+
+def test_livro_de_outro_tabuleiro_e_recusado(livro):
+    with pytest.raises(ValueError, match='livro para'):
+        livro.consultar(Connect4(6, 7).bitboard, -1)
+
+
+@pytest.mark.parametrize('jogadas', [[], [3]])
+def test_livro_da_interface_devolve_a_busca_da_ia(livro_interface, jogadas):
+    tabuleiro = Tabuleiro()
+    for coluna in jogadas:
+        tabuleiro.jogar(coluna, 1)
+    _, valor = IA(PROFUNDIDADE, usar_poda=True).buscar(tabuleiro)
+    coluna, pontuacao = IA(livro=str(livro_interface)).buscar(tabuleiro)
+    assert pontuacao == valor
+    assert tabuleiro.validar_movimento(coluna)
+
+
+def test_livro_e_recusado_pelo_outro_motor(livro, livro_interface):
+    with pytest.raises(ValueError, match='motor backend'):
+        IA(livro=str(livro.caminho)).buscar(Tabuleiro())
+    jogo = Connect4(6, 7, livro=str(livro_interface))
+    with pytest.raises(ValueError, match='motor interface'):
+        jogo.livro.consultar(jogo.bitboard, -1)
+
+
+def test_interface_so_gera_livro_do_seu_tabuleiro(tmp_path):
+    with pytest.raises(ValueError, match='interface joga em'):
+        gerar_livro(tmp_path / 'livro.bin', 7, 8, motor=MOTOR_INTERFACE)
@@ -0,0 +1,54 @@
+import math
+
+from connect4.backend import Connect4
+from connect4.ordenacao import OrdenadorFixo, OrdenadorMovimentos
+
+COLUNAS = 7
+TODAS = list(range(COLUNAS))
+ORDEM_ESTATICA = [3, 2, 4, 1, 5, 0, 6]
+
+
+def test_ordem_estatica_do_centro_para_as_bordas():
+    assert OrdenadorMovimentos(COLUNAS).ordenar(TODAS, 0, 0) == ORDEM_ESTATICA
+
+
+def test_movimento_da_tabela_vem_antes_dos_assassinos():
+    ordenador = OrdenadorMovimentos(COLUNAS, usar_historico=False)
+    ordenador.registrar_corte(0, 5, 0, 3, 2)
+    ordenador.registrar_corte(6, 5, 0, 3, 1)
+    # O assassino mais recente vem primeiro; só no mesmo ply
+    assert ordenador.ordenar(TODAS, 5, 0)[:3] == [6, 0, 3]
+    assert ordenador.ordenar(TODAS, 5, 0, movimento_tabela=1)[:3] == [1, 6, 0]
+    assert ordenador.ordenar(TODAS, 6, 0) == ORDEM_ESTATICA
+
+
+def test_assassinos_guardam_so_os_dois_ultimos():
+    ordenador = OrdenadorMovimentos(COLUNAS, usar_historico=False)
+    for coluna in (0, 1, 6):
+        ordenador.registrar_corte(coluna, 4, 0, 1, 1)
+    assert ordenador.assassinos[4] == [6, 1]
+
+
+def test_historico_por_peca_e_envelhecido_a_cada_busca():
+    ordenador = OrdenadorMovimentos(COLUNAS, usar_assassinos=False)
+    ordenador.registrar_corte(5, 4, 1, 3, 0)
+    assert ordenador.ordenar(TODAS, 9, 1) == [5, 3, 2, 4, 1, 0, 6]
+    assert ordenador.ordenar(TODAS, 9, 0) == ORDEM_ESTATICA
+
+    ordenador.nova_busca()
+    assert ordenador.historico[1] == [0, 0, 0, 0, 0, 3 * 3 // 2, 0]
+    assert ordenador.taxa_corte_primeiro == 0.0
+
+
+def test_ordenacao_nao_muda_o_valor_e_corta_mais_cedo():
+    resultados = {}
+    for nome, ordenador in (
+        ('fixo', OrdenadorFixo(8)),
+        ('heuristico', OrdenadorMovimentos(8)),
+    ):
+        jogo = Connect4(usar_alpha_beta=True, ordenador=ordenador)
+        jogo.carregar_jogadas([3, 4, 3, 4])
+        valor, _ = jogo.minimax(5, -math.inf, math.inf, True)
+        resultados[nome] = (valor, jogo.nos)
+    assert resultados['fixo'][0] == resultados['heuristico'][0]
+    assert resultados['heuristico'][1] < resultados['fixo'][1]
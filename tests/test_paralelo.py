@@ -0,0 +1,73 @@
+import math
+import threading
+
+import pytest
+
+from connect4 import paralelo
+from connect4.backend import Connect4
+from connect4.busca import BuscaCancelada
+from connect4.paralelo import BuscaParalela
+
+PROFUNDIDADE = 4
+POSICOES = ('3', '434', '33425')
+
+
+def _jogo(posicao, **config):
+    jogo = Connect4(usar_alpha_beta=True, limite_solucionador=None, **config)
+    jogo.carregar_jogadas(int(coluna) for coluna in posicao)
+    return jogo
+
+
+@pytest.mark.parametrize('posicao', POSICOES)
+def test_busca_paralela_igual_a_serial(posicao):
+    jogo = _jogo(posicao)
+    valor, _ = jogo.minimax(PROFUNDIDADE, -math.inf, math.inf, True)
+    resultados = []
+    for trabalhadores in (1, 2):
+        with BuscaParalela(trabalhadores, usar_alpha_beta=True) as busca:
+            busca.nova_busca()
+            resultados.append(busca.buscar(_jogo(posicao), PROFUNDIDADE))
+    assert resultados[0] == resultados[1]
+    assert resultados[0][0] == valor
+
+
+def test_fechar_encerra_os_processos():
+    with BuscaParalela(2, usar_alpha_beta=True) as busca:
+        busca.buscar(_jogo('3'), PROFUNDIDADE)
+        processos = list(busca.executor._processes.values())
+    assert busca.executor is None
+    for processo in processos:
+        processo.join()
+        assert not processo.is_alive()
+
+
+def test_cancelamento_chega_aos_processos():
+    cancelamento = threading.Event()
+    cancelamento.set()
+    with BuscaParalela(2, usar_alpha_beta=True) as busca:
+        with pytest.raises(BuscaCancelada):
+            busca.buscar(_jogo('3'), 20, cancelamento=cancelamento)
+        # A busca seguinte não herda o cancelamento
+        _, coluna = busca.buscar(_jogo('3'), PROFUNDIDADE)
+        assert coluna is not None
+
+
+def test_tabelas_dos_trabalhadores_envelhecem_a_cada_busca_da_raiz():
+    with BuscaParalela(1, usar_alpha_beta=True) as busca:
+        busca.nova_busca()
+        # As iterações de uma mesma busca não envelhecem a tabela
+        for profundidade in range(1, PROFUNDIDADE + 1):
+            busca.buscar(_jogo('3'), profundidade)
+        guardado, _ = paralelo._jogos[busca.sessao]
+        geracao = guardado.tabela.geracao
+        assert geracao == 1
+        busca.nova_busca()
+        busca.buscar(_jogo('3'), PROFUNDIDADE)
+        assert guardado.tabela.geracao == geracao + 1
+
+
+def test_busca_rasa_fica_no_proprio_processo():
+    with _jogo('3', ply=PROFUNDIDADE, trabalhadores=2) as jogo:
+        _, coluna = jogo.buscar()
+        assert jogo.validar_movimento(coluna)
+        assert jogo.busca_paralela.executor is None
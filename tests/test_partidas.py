@@ -0,0 +1,72 @@
+import pytest
+
+from connect4.partidas import (
+    EMPATE,
+    INTERROMPIDA,
+    PRIMEIRO,
+    TEMPO_MAXIMO_MS,
+    LeitorPartidas,
+    gravar_partida,
+)
+
+CONFIGURACAO = {
+    'profundidade': 5,
+    'tempo_ms': 250,
+    'alpha_beta': True,
+    'ponderar': False,
+    'livro': True,
+    'ia_comeca': False,
+}
+
+
+def test_partidas_gravadas_sao_lidas_de_volta(tmp_path):
+    caminho = tmp_path / 'partidas.c4p'
+    # Número ímpar de jogadas, para a última coluna ficar sozinha no byte
+    gravar_partida(
+        caminho, 7, 8, [3, 4, 3, 4, 3], [10, 20, 30, 40, 50], PRIMEIRO, CONFIGURACAO
+    )
+    sem_limite = {**CONFIGURACAO, 'tempo_ms': None, 'livro': False}
+    gravar_partida(
+        caminho, 6, 7, [6, 0, 6, 0], [1, 2, 3, 4], INTERROMPIDA, sem_limite
+    )
+
+    with LeitorPartidas(caminho) as leitor:
+        primeira, segunda = leitor
+    assert primeira == {
+        'linhas': 7,
+        'colunas': 8,
+        'jogadas': [3, 4, 3, 4, 3],
+        'tempos_ms': [10, 20, 30, 40, 50],
+        'resultado': 'primeiro',
+        **CONFIGURACAO,
+    }
+    assert segunda['jogadas'] == [6, 0, 6, 0]
+    assert segunda['resultado'] == 'interrompida'
+    assert segunda['tempo_ms'] is None
+    assert not segunda['livro']
+
+
+def test_tempo_longo_e_limitado_ao_maximo(tmp_path):
+    caminho = tmp_path / 'partidas.c4p'
+    gravar_partida(caminho, 7, 8, [3], [10 * TEMPO_MAXIMO_MS], EMPATE, CONFIGURACAO)
+    with LeitorPartidas(caminho) as leitor:
+        assert next(iter(leitor))['tempos_ms'] == [TEMPO_MAXIMO_MS]
+
+
+def test_posicoes_ignoram_partidas_interrompidas(tmp_path):
+    caminho = tmp_path / 'partidas.c4p'
+    gravar_partida(caminho, 7, 8, [3, 4], [1, 1], INTERROMPIDA, CONFIGURACAO)
+    gravar_partida(caminho, 7, 8, [3, 4, 2], [1, 1, 1], PRIMEIRO, CONFIGURACAO)
+    with LeitorPartidas(caminho) as leitor:
+        posicoes = [
+            (bitboard.jogadas, coluna, resultado)
+            for bitboard, coluna, resultado in leitor.posicoes()
+        ]
+    assert posicoes == [(0, 3, 1), (1, 4, -1), (2, 2, 1)]
+
+
+def test_arquivo_invalido_e_recusado(tmp_path):
+    caminho = tmp_path / 'outro.bin'
+    caminho.write_bytes(b'nada disso')
+    with pytest.raises(ValueError, match='não é um arquivo de partidas'):
+        LeitorPartidas(caminho)
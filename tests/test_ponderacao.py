@@ -0,0 +1,59 @@
+import threading
+
+from connect4.backend import Connect4
+from connect4.busca import BuscaCancelada
+from connect4.ponderacao import Ponderador
+
+RESPOSTA_DA_COLUNA_2 = 20
+
+
+def _respostas(coluna, _):
+    return coluna * 10
+
+
+def test_resultado_da_jogada_ponderada():
+    ponderador = Ponderador(_respostas, [3, 2, 4])
+    ponderador.thread.join()
+    assert ponderador.resultado(2) == RESPOSTA_DA_COLUNA_2
+    # Uma jogada que não foi ponderada fica sem resposta
+    assert ponderador.resultado(6) is None
+
+
+def test_cancelar_nao_espera_a_thread():
+    liberar = threading.Event()
+
+    def responder(coluna, cancelamento):
+        if coluna == 0:
+            return 'pronta'
+        liberar.wait()
+        if cancelamento.is_set():
+            raise BuscaCancelada
+        return 'tarde demais'
+
+    ponderador = Ponderador(responder, [0, 1, 2])
+    ponderador.cancelar(0)
+    assert not ponderador.pronto()
+
+    liberar.set()
+    ponderador.thread.join()
+    assert ponderador.pronto()
+    assert ponderador.resposta() == 'pronta'
+    assert 1 not in ponderador.resultados
+
+
+def test_acerto_da_ponderacao_dispensa_a_busca():
+    jogo = Connect4(ply=3, usar_alpha_beta=True, limite_solucionador=None)
+    jogo.carregar_jogadas([3, 4])
+    jogo.iniciar_ponderacao()
+    jogo.ponderador.thread.join()
+    coluna = jogo.ponderador.colunas[0]
+    resposta = jogo.parar_ponderacao(coluna)
+    assert jogo.ponderador is None
+
+    # A resposta ponderada é a da busca feita depois da jogada
+    jogo.realizar_jogada(coluna, 1)
+    novo = Connect4(ply=3, usar_alpha_beta=True, limite_solucionador=None)
+    novo.carregar_jogadas([3, 4, coluna])
+    assert resposta == novo.escolher_jogada()
+    # Ponderar usa cópias: o tabuleiro do jogo não muda
+    assert jogo.tabuleiro == novo.tabuleiro
@@ -0,0 +1,70 @@
+import pytest
+
+from connect4 import main
+from connect4.main import AMARELO, COLUNAS, LINHAS, PECA_IA, Renderizador
+
+# O pygame não é dependência do pacote; importar main não o carrega
+pygame = pytest.importorskip('pygame')
+
+TAMANHO = 20
+
+
+@pytest.fixture
+def renderizador(monkeypatch):
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+    main.carregar_pygame()
+    pygame.init()
+    tela = pygame.display.set_mode((COLUNAS * TAMANHO, (LINHAS + 1) * TAMANHO))
+    atualizados = []
+    monkeypatch.setattr(pygame.display, 'update', atualizados.append)
+    renderizador = Renderizador(tela, TAMANHO)
+    renderizador.atualizados = atualizados
+    yield renderizador
+    pygame.quit()
+
+
+def _quadro(renderizador):
+    # Retângulos enviados à tela no quadro
+    renderizador.atualizados.clear()
+    renderizador.desenhar()
+    return [list(map(tuple, retangulos)) for retangulos in renderizador.atualizados]
+
+
+def test_so_a_casa_que_mudou_e_atualizada(renderizador):
+    vazio = [[0] * COLUNAS for _ in range(LINHAS)]
+    renderizador.atualizar_tabuleiro(vazio)
+    assert _quadro(renderizador) == [
+        [tuple(renderizador.tela.get_rect())]
+        + [
+            (coluna * TAMANHO, (linha + 1) * TAMANHO, TAMANHO, TAMANHO)
+            for linha in range(LINHAS)
+            for coluna in range(COLUNAS)
+        ]
+    ]
+
+    # Tabuleiro igual: nada a desenhar, nem chamada à tela
+    renderizador.atualizar_tabuleiro(vazio)
+    assert _quadro(renderizador) == []
+
+    vazio[LINHAS - 1][2] = PECA_IA
+    renderizador.atualizar_tabuleiro(vazio)
+    assert _quadro(renderizador) == [
+        [(2 * TAMANHO, LINHAS * TAMANHO, TAMANHO, TAMANHO)]
+    ]
+    centro = (2 * TAMANHO + TAMANHO // 2, LINHAS * TAMANHO + TAMANHO // 2)
+    assert tuple(renderizador.tela.get_at(centro))[:3] == AMARELO
+
+
+def test_cursor_parado_nao_redesenha(renderizador):
+    _quadro(renderizador)
+    renderizador.atualizar_cursor(TAMANHO)
+    (retangulos,) = _quadro(renderizador)
+    assert len(retangulos) == 1
+
+    renderizador.atualizar_cursor(TAMANHO)
+    assert _quadro(renderizador) == []
+
+    # Mover apaga a peça antiga e desenha a nova
+    antigo = tuple(renderizador.cursor)
+    renderizador.atualizar_cursor(2 * TAMANHO)
+    assert _quadro(renderizador) == [[antigo, tuple(renderizador.cursor)]]
@@ -0,0 +1,98 @@
+import io
+import json
+
+from connect4 import servidor as modulo_servidor
+from connect4.backend import Connect4
+from connect4.servidor import Servidor
+
+CONFIG = {'limite_solucionador': None}
+
+
+def _servidor():
+    return Servidor(saida=io.StringIO(), **CONFIG)
+
+
+def _linhas(servidor):
+    return servidor.saida.getvalue().splitlines()
+
+
+def _tabuleiro(jogadas):
+    # Posição carregada do zero, com a IA jogando depois da última jogada
+    jogo = Connect4(**CONFIG)
+    jogo.carregar_jogadas(jogadas, -1 if len(jogadas) % 2 == 0 else 1)
+    return jogo.tabuleiro
+
+
+def test_posicao_aproveita_o_prefixo_com_a_mesma_paridade():
+    servidor = _servidor()
+    servidor.posicao('34')
+    servidor.posicao('3443')
+    assert servidor.jogadas == [3, 4, 4, 3]
+    assert servidor.jogo.tabuleiro == _tabuleiro([3, 4, 4, 3])
+
+
+def test_posicao_com_outra_paridade_recoloca_as_pecas():
+    servidor = _servidor()
+    servidor.posicao('343')
+    servidor.posicao('34')
+    assert servidor.jogo.tabuleiro == _tabuleiro([3, 4])
+
+    servidor.posicao('345')
+    assert servidor.jogo.tabuleiro == _tabuleiro([3, 4, 5])
+
+
+def test_posicao_vazia_limpa_o_tabuleiro():
+    servidor = _servidor()
+    servidor.posicao('3443')
+    servidor.posicao('')
+    assert servidor.jogadas == []
+    assert servidor.jogo.tabuleiro == _tabuleiro([])
+
+
+def test_vai_responde_info_e_melhor():
+    servidor = _servidor()
+    servidor.tratar('posicao 3443')
+    servidor.tratar('vai profundidade 3')
+    servidor.busca.join()
+
+    info, melhor = _linhas(servidor)
+    assert info.startswith('info profundidade 3 ')
+    melhor = melhor.split()
+    assert melhor[0] == 'melhor'
+    assert 0 <= int(melhor[1]) < servidor.jogo.colunas
+
+
+def test_comandos_invalidos_respondem_erro():
+    servidor = _servidor()
+    comandos = ['vai rapido', 'posicao 9', 'dance']
+    servidor.executar([*comandos, 'sair'])
+    linhas = _linhas(servidor)
+    assert len(linhas) == len(comandos)
+    assert all(linha.startswith('erro ') for linha in linhas)
+    assert servidor.jogadas == []
+
+
+def test_pedido_json_responde_com_o_mesmo_id():
+    servidor = _servidor()
+    servidor.executar([
+        json.dumps({'id': 7, 'jogadas': '3443', 'profundidade': 3}),
+        json.dumps({'id': 8, 'jogadas': '99'}),
+        'sair',
+    ])
+    respostas = {
+        resposta['id']: resposta for resposta in map(json.loads, _linhas(servidor))
+    }
+    assert 0 <= respostas[7]['coluna'] < servidor.jogo.colunas
+    assert respostas[7]['nos'] > 0
+    assert 'erro' in respostas[8]
+
+
+def test_trabalhador_tem_um_motor_por_paridade(monkeypatch):
+    monkeypatch.setattr(modulo_servidor, '_motores', {})
+    modulo_servidor._iniciar_trabalhador(CONFIG)
+    for jogadas in ([3, 4, 3], [3, 4], [3, 4, 3, 3], [3, 4, 5]):
+        resposta = modulo_servidor._analisar({'jogadas': jogadas, 'profundidade': 2})
+        assert 'coluna' in resposta
+        motor, atuais = modulo_servidor._motores[len(jogadas) % 2]
+        assert atuais == jogadas
+        assert motor.tabuleiro == _tabuleiro(jogadas)
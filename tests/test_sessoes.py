@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+from connect4.bitboard import Bitboard
+from connect4.sessoes import ServidorSessoes, jogada_reserva
+
+LINHAS, COLUNAS = 7, 8
+CONFIGURACAO = {'ply': 2, 'usar_alpha_beta': True}
+# Colunas das posições táticas, com as peças na linha de baixo
+VITORIA_IA = 4
+BLOQUEIO = 3
+CENTRO = 3
+
+
+def _bitboard(jogadas):
+    bitboard = Bitboard(LINHAS, COLUNAS, pecas=(1, -1))
+    peca = 1
+    for coluna in jogadas:
+        bitboard.jogar(coluna, peca)
+        peca = -peca
+    return bitboard
+
+
+def _com_servidor(usar, **opcoes):
+    # Roda `usar(servidor)` num laço novo e encerra o pool no fim
+    async def executar():
+        servidor = ServidorSessoes(1, CONFIGURACAO, **opcoes)
+        try:
+            return servidor, await usar(servidor)
+        finally:
+            servidor.executor.shutdown(cancel_futures=True)
+
+    return asyncio.run(executar())
+
+
+def test_jogada_de_reserva():
+    assert jogada_reserva(_bitboard([0, 7, 1, 6, 2, 5])) == VITORIA_IA
+    assert jogada_reserva(_bitboard([0, 7, 1, 7, 2, 5])) == BLOQUEIO
+    assert jogada_reserva(_bitboard([])) == CENTRO
+
+
+def test_partida_pela_conexao():
+    async def partida(servidor):
+        soquete = await servidor.iniciar(porta=0)
+        porta = soquete.sockets[0].getsockname()[1]
+        leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+
+        async def pedir(pedido):
+            escritor.write(json.dumps(pedido).encode() + b'\n')
+            await escritor.drain()
+            return json.loads(await leitor.readline())
+
+        nova = await pedir({'tipo': 'nova'})
+        sessao = nova['sessao']
+        respostas = [
+            nova,
+            await pedir({'tipo': 'jogar', 'sessao': sessao, 'coluna': 3}),
+            await pedir({'tipo': 'jogar', 'sessao': sessao, 'coluna': COLUNAS}),
+            await pedir({'tipo': 'outro'}),
+            await pedir({'tipo': 'metricas'}),
+        ]
+        escritor.close()
+        await servidor.encerrar(soquete)
+        return respostas
+
+    servidor, (nova, jogada, invalida, desconhecida, metricas) = _com_servidor(
+        partida
+    )
+    assert nova['jogadas'] == []
+    assert jogada['coluna'] in range(COLUNAS)
+    assert jogada['resultado'] is None
+    assert invalida == {'erro': f'coluna {COLUNAS} inválida'}
+    assert desconhecida == {'erro': 'tipo desconhecido: outro'}
+    assert (metricas['sessoes'], metricas['jogadas_ia']) == (1, 1)
+    # As sessões da conexão acabam com ela
+    assert servidor.sessoes == {}
+
+
+def test_resposta_invalida_do_pool_usa_a_reserva():
+    async def jogar(servidor):
+        async def buscar(jogadas, prazo):
+            servidor.na_fila -= 1
+            return {'coluna': COLUNAS}
+
+        servidor.buscar = buscar
+        nova = await servidor.nova_sessao(False)
+        return await servidor.jogar(nova['sessao'], 0)
+
+    servidor, resposta = _com_servidor(jogar)
+    assert servidor.respostas_invalidas == 1
+    assert resposta['coluna'] == jogada_reserva(_bitboard([0]))
+
+
+def test_prazo_perdido_usa_a_reserva():
+    async def jogar(servidor):
+        async def buscar(jogadas, prazo):
+            servidor.na_fila -= 1
+            await asyncio.sleep(1)
+
+        servidor.buscar = buscar
+        nova = await servidor.nova_sessao(False)
+        return await servidor.jogar(nova['sessao'], 0)
+
+    servidor, resposta = _com_servidor(jogar, prazo_ms=20)
+    assert servidor.prazos_perdidos == 1
+    assert resposta['coluna'] == jogada_reserva(_bitboard([0]))
+
+
+def test_fila_cheia_recusa_sem_mudar_a_partida():
+    async def jogar(servidor):
+        nova = await servidor.nova_sessao(False)
+        servidor.no_pool = servidor.fila_maxima
+        return await servidor.jogar(nova['sessao'], 0), nova['sessao']
+
+    servidor, (resposta, sessao) = _com_servidor(jogar)
+    assert resposta == {'sessao': sessao, 'erro': 'ocupado'}
+    assert servidor.sessoes[sessao].jogadas == []
+    assert servidor.recusadas == 1
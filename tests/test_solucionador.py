@@ -0,0 +1,91 @@
+import random
+import time
+
+import pytest
+
+from connect4.backend import Connect4
+from connect4.bitboard import Bitboard
+from connect4.instrumentacao import EstatisticasBusca
+from connect4.solucionador import DERROTA, EMPATE, VITORIA, Solucionador
+
+LINHAS, COLUNAS = 4, 5
+TEMPO_MS = 100
+# Folga para a iteração em andamento terminar de conferir o relógio
+TOLERANCIA_S = 1.0
+
+
+def _forca_bruta(bitboard, peca, memoria):
+    # Negamax completo sem cortes, com a pontuação do solucionador: quanto mais
+    # cedo quem joga vence, maior
+    chave = (bitboard.mascaras[0], bitboard.mascaras[1])
+    if chave in memoria:
+        return memoria[chave]
+    movimentos = bitboard.movimentos_validos()
+    melhor = None
+    for coluna in movimentos:
+        bitboard.jogar(coluna, peca)
+        if bitboard.movimento_ganhador(peca):
+            valor = (bitboard.linhas * bitboard.colunas + 2 - bitboard.jogadas) // 2
+        else:
+            valor = -_forca_bruta(bitboard, -peca, memoria)
+        bitboard.desfazer(coluna)
+        if melhor is None or valor > melhor:
+            melhor = valor
+    memoria[chave] = melhor if movimentos else 0
+    return memoria[chave]
+
+
+def _posicoes(quantidade, pecas_colocadas):
+    # Posições aleatórias sem vitória e com quem joga sem vitória imediata
+    gerador = random.Random(pecas_colocadas)
+    posicoes = []
+    while len(posicoes) < quantidade:
+        bitboard = Bitboard(LINHAS, COLUNAS)
+        peca = 1
+        for _ in range(pecas_colocadas):
+            bitboard.jogar(gerador.choice(bitboard.movimentos_validos()), peca)
+            peca = -peca
+        if not (bitboard.movimento_ganhador(1) or bitboard.movimento_ganhador(-1)):
+            posicoes.append((bitboard, peca))
+    return posicoes
+
+
+@pytest.mark.parametrize('pecas_colocadas', [6, 9, 12])
+def test_solucionador_igual_a_forca_bruta(pecas_colocadas):
+    memoria = {}
+    for bitboard, peca in _posicoes(10, pecas_colocadas):
+        esperado = _forca_bruta(bitboard, peca, memoria)
+        pontuacao, coluna = Solucionador(LINHAS, COLUNAS).resolver(bitboard, peca)
+        assert pontuacao == esperado
+
+        # A coluna devolvida garante a pontuação
+        bitboard.jogar(coluna, peca)
+        if not bitboard.movimento_ganhador(peca):
+            assert -_forca_bruta(bitboard, -peca, memoria) == pontuacao
+        bitboard.desfazer(coluna)
+
+
+def test_desfecho_conta_os_lances_ate_o_fim():
+    solucionador = Solucionador(LINHAS, COLUNAS)
+    casas = LINHAS * COLUNAS
+    # Vitória na própria jogada, com 10 peças no tabuleiro
+    assert solucionador.desfecho((casas + 1 - 10) // 2, 10) == (VITORIA, 1)
+    # Derrota na jogada seguinte do adversário
+    assert solucionador.desfecho(-((casas - 10) // 2), 10) == (DERROTA, 2)
+    assert solucionador.desfecho(0, 10) == (EMPATE, casas - 10)
+
+
+def test_final_que_nao_cabe_no_tempo_volta_para_a_heuristica():
+    # Com o limite no tamanho do tabuleiro o motor tenta resolver desde a
+    # abertura, o que não termina no tempo
+    jogo = Connect4(usar_alpha_beta=True, tempo_ms=TEMPO_MS, limite_solucionador=56)
+    jogo.carregar_jogadas([3, 4])
+    assert jogo.final_resolvivel()
+    estatisticas = EstatisticasBusca()
+    inicio = time.perf_counter()
+    _, coluna = jogo.buscar(estatisticas=estatisticas)
+    assert time.perf_counter() - inicio < TEMPO_MS / 1000 + TOLERANCIA_S
+    assert jogo.validar_movimento(coluna)
+    # As iterações que ficaram são as do aprofundamento iterativo
+    assert estatisticas.iteracoes[0]['profundidade'] == 1
+    assert jogo.solucionador.prazo is None
@@ -0,0 +1,72 @@
+import json
+import math
+
+import pytest
+
+from connect4.torneio import jogar_partida, resumo_confronto, torneio
+
+PEQUENO = {'linhas': 4, 'colunas': 5, 'limite_solucionador': None}
+CONFIGURACOES = {
+    'raso': {**PEQUENO, 'ply': 1},
+    'fundo': {**PEQUENO, 'ply': 3, 'usar_alpha_beta': True},
+}
+PARTIDAS = 4
+PARTIDA = 7
+
+
+def _elo(pontuacao):
+    return -400 * math.log10(1 / pontuacao - 1)
+
+
+def test_elo_com_intervalo_de_95_por_cento():
+    resumo = resumo_confronto(60, 20, 20)
+    # Pontuação 0.7 com desvio padrão 0.4 por partida em 100 partidas
+    margem = 1.96 * 0.4 / 10
+    assert resumo['pontuacao'] == pytest.approx(0.7)
+    assert resumo['elo'] == pytest.approx(_elo(0.7))
+    assert resumo['elo_min'] == pytest.approx(_elo(0.7 - margem))
+    assert resumo['elo_max'] == pytest.approx(_elo(0.7 + margem))
+
+
+def test_so_empates_nao_tem_margem():
+    resumo = resumo_confronto(0, 10, 0)
+    assert resumo['elo'] == resumo['elo_min'] == resumo['elo_max'] == 0
+
+
+def test_elo_infinito_vira_texto():
+    resumo = resumo_confronto(10, 0, 0)
+    assert resumo['elo'] == 'vitoria'
+    assert resumo_confronto(0, 0, 10)['elo'] == 'derrota'
+
+
+def test_partida_comeca_pela_abertura():
+    registro = jogar_partida(
+        PARTIDA,
+        ('raso', CONFIGURACOES['raso']),
+        ('fundo', CONFIGURACOES['fundo']),
+        [2, 2],
+        False,
+    )
+    assert registro['partida'] == PARTIDA
+    assert (registro['primeiro'], registro['segundo']) == ('fundo', 'raso')
+    assert registro['jogadas'][:2] == [2, 2]
+    assert len(registro['tempos_ms']) == len(registro['jogadas']) - 2
+    assert registro['vencedor'] in {'raso', 'fundo', None}
+
+
+def test_torneio_grava_e_pontua_todas_as_partidas(tmp_path):
+    saida = tmp_path / 'partidas.jsonl'
+    resultado = torneio(
+        saida, CONFIGURACOES, partidas=PARTIDAS, trabalhadores=1, plies_abertura=2
+    )
+    registros = [json.loads(linha) for linha in saida.read_text().splitlines()]
+    assert len(registros) == resultado['partidas'] == PARTIDAS
+    registros.sort(key=lambda registro: registro['partida'])
+    assert [registro['partida'] for registro in registros] == list(range(PARTIDAS))
+    # Cada abertura é jogada duas vezes, trocando quem começa
+    for par in (registros[:2], registros[2:]):
+        assert par[0]['abertura'] == par[1]['abertura']
+        assert par[0]['primeiro'] == par[1]['segundo']
+    (confronto,) = resultado['confrontos']
+    placar = confronto['vitorias'] + confronto['empates'] + confronto['derrotas']
+    assert placar == PARTIDAS
@@ -0,0 +1,92 @@
+import math
+
+from connect4.backend import Connect4
+from connect4.transposicao import (
+    EXATO,
+    LIMITE_INFERIOR,
+    LIMITE_SUPERIOR,
+    TabelaTransposicao,
+    chave_posicao,
+    entrada_decide,
+    tipo_entrada,
+)
+
+
+def test_gravar_e_consultar():
+    tabela = TabelaTransposicao(0.01)
+    tabela.gravar(12345, 3, 17, EXATO, 2)
+    assert tabela.consultar(12345)[1:5] == (3, 17, EXATO, 2)
+    assert tabela.consultar(54321) is None
+    assert tabela.acertos == 1
+
+
+def test_colisao_nao_devolve_a_outra_posicao():
+    tabela = TabelaTransposicao(0.01)
+    tabela.gravar(5, 3, 17, EXATO, 2)
+    assert tabela.consultar(5 + tabela.tamanho) is None
+    assert tabela.colisoes == 1
+
+
+def test_substituicao_prefere_a_mais_profunda_da_busca_atual():
+    tabela = TabelaTransposicao(0.01)
+    outra = 5 + tabela.tamanho
+    tabela.gravar(5, 6, 17, EXATO, 2)
+    tabela.gravar(outra, 2, 3, EXATO, 1)
+    assert tabela.consultar(5) is not None
+
+    # Depois de uma nova busca a entrada antiga cede o lugar
+    tabela.nova_busca()
+    tabela.gravar(outra, 2, 3, EXATO, 1)
+    assert tabela.consultar(5) is None
+    assert tabela.consultar(outra)[1:5] == (2, 3, EXATO, 1)
+
+
+def test_regravar_sem_movimento_mantem_o_anterior():
+    tabela = TabelaTransposicao(0.01)
+    tabela.gravar(5, 2, 17, EXATO, 4)
+    tabela.gravar(5, 3, 9, LIMITE_SUPERIOR, None)
+    assert tabela.consultar(5)[2:5] == (9, LIMITE_SUPERIOR, 4)
+
+
+def test_lado_que_joga_muda_a_chave():
+    jogo = Connect4(limite_solucionador=None)
+    jogo.carregar_jogadas([3, 4, 3, 4])
+    hash_zobrist = jogo.bitboard.hash
+    assert chave_posicao(hash_zobrist, True) != chave_posicao(hash_zobrist, False)
+
+    tabela = TabelaTransposicao(0.01)
+    tabela.gravar(chave_posicao(hash_zobrist, True), 4, 50, EXATO, 3)
+    assert tabela.consultar(chave_posicao(hash_zobrist, False)) is None
+
+
+def test_tipo_e_uso_da_entrada_pela_janela():
+    assert tipo_entrada(5, 0, 10) == EXATO
+    assert tipo_entrada(0, 0, 10) == LIMITE_SUPERIOR
+    assert tipo_entrada(12, 0, 10) == LIMITE_INFERIOR
+
+    inferior = (1, 4, 12, LIMITE_INFERIOR, 0, 0)
+    assert entrada_decide(inferior, 4, 0, 10)
+    assert not entrada_decide(inferior, 4, 0, 20)
+    assert not entrada_decide(inferior, 5, 0, 10)
+    superior = (1, 4, -3, LIMITE_SUPERIOR, 0, 0)
+    assert entrada_decide(superior, 2, -3, math.inf)
+    assert not entrada_decide(superior, 2, -5, math.inf)
+    assert not entrada_decide(None, 0, 0, 1)
+
+
+def test_tabela_aquecida_nao_muda_o_resultado():
+    # A mesma tabela usada nas duas vezes de jogar de várias posições dá o
+    # resultado de buscas novas
+    aquecido = Connect4(usar_alpha_beta=True, limite_solucionador=None)
+    janela = (-math.inf, math.inf)
+    for jogadas in ([3, 4], [3, 4, 3], [3, 3, 4, 4], [2, 4, 3, 3, 4]):
+        aquecido.carregar_jogadas(jogadas)
+        for maximizar in (True, False):
+            novo = Connect4(usar_alpha_beta=True, limite_solucionador=None)
+            novo.carregar_jogadas(jogadas)
+            assert (
+                aquecido.minimax(5, *janela, maximizar)[0]
+                == (novo.minimax(5, *janela, maximizar)[0])
+            )
+        for coluna in reversed(jogadas):
+            aquecido.retornar_movimento(coluna)